@@ -0,0 +1,184 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+from engine import bitboard
+from engine.bitboard import DIRECTIONS
+from engine.rules import GridRules, PackedRules
+
+
+class TranspositionTable:
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[float]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: float):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SearchStats:
+    def __init__(self):
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.depth = 0
+        self.searches = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class ExpectimaxPlayer:
+    def __init__(self, config_manager, time_budget: float = 0.005, max_depth: int = 6,
+                 cache_size: int = 100000, probability_cutoff: float = 0.0001):
+        self.config = config_manager
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.probability_cutoff = probability_cutoff
+        self.cache = TranspositionTable(cache_size)
+        self.stats = SearchStats()
+        self.last_stats = SearchStats()
+        self.rules = None
+        self.tiles: List[Tuple[int, float]] = []
+        self.deadline = 0.0
+        self.pruned = False
+
+    def prepare(self):
+        size = self.config.board_size
+        if self.rules is None or self.rules.size != size:
+            self.rules = PackedRules() if size == bitboard.SIZE else GridRules(size)
+            self.cache.clear()
+        self.tiles = [(int(value_str).bit_length() - 1, prob)
+                      for value_str, prob in self.config.probabilities.items() if prob > 0]
+
+    def best_move(self, board: List[List[int]], time_budget: Optional[float] = None) -> Optional[str]:
+        self.prepare()
+        if self.config.board_size == bitboard.SIZE and bitboard.try_encode(board) is None:
+            return self.fallback_move(GridRules(bitboard.SIZE), board)
+
+        budget = self.time_budget if time_budget is None else time_budget
+        started = time.perf_counter()
+        self.deadline = started + budget
+        self.last_stats = SearchStats()
+        self.pruned = False
+        hits, misses = self.cache.hits, self.cache.misses
+
+        state = self.rules.encode(board)
+        children = []
+        for direction in DIRECTIONS:
+            new_state, _ = self.rules.move(state, direction)
+            if new_state != state:
+                children.append((direction, new_state))
+
+        best = children[0][0] if children else None
+        if len(children) > 1:
+            for depth in range(1, self.max_depth + 1):
+                try:
+                    scores = [(self.chance_node(child, depth, 1.0), direction) for direction, child in children]
+                except _SearchTimeout:
+                    break
+                best = max(scores, key=lambda item: item[0])[1]
+                self.last_stats.depth = depth
+
+        elapsed = time.perf_counter() - started
+        self.last_stats.elapsed = elapsed
+        self.last_stats.searches = 1
+        self.last_stats.cache_hits = self.cache.hits - hits
+        self.last_stats.cache_misses = self.cache.misses - misses
+        self.stats.nodes += self.last_stats.nodes
+        self.stats.elapsed += elapsed
+        self.stats.searches += 1
+        self.stats.depth = self.last_stats.depth
+        self.stats.cache_hits += self.last_stats.cache_hits
+        self.stats.cache_misses += self.last_stats.cache_misses
+        return best
+
+    def fallback_move(self, rules, board: List[List[int]]) -> Optional[str]:
+        state = rules.encode(board)
+        best = None
+        best_value = None
+        for direction in DIRECTIONS:
+            new_state, _ = rules.move(state, direction)
+            if new_state != state:
+                value = rules.evaluate(new_state)
+                if best_value is None or value > best_value:
+                    best, best_value = direction, value
+        return best
+
+    def max_node(self, state: Hashable, depth: int, probability: float) -> float:
+        self.last_stats.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise _SearchTimeout()
+
+        best = 0.0
+        for direction in DIRECTIONS:
+            new_state, _ = self.rules.move(state, direction)
+            if new_state != state:
+                value = self.chance_node(new_state, depth - 1, probability)
+                if value > best:
+                    best = value
+        return best
+
+    def chance_node(self, state: Hashable, depth: int, probability: float) -> float:
+        if depth <= 0:
+            return self.rules.evaluate(state)
+        if probability < self.probability_cutoff:
+            self.pruned = True
+            return self.rules.evaluate(state)
+
+        key = (state, depth)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        pruned_outside = self.pruned
+        self.pruned = False
+        total = 0.0
+        count = 0
+        for exponent, tile_probability in self.tiles:
+            children = self.rules.spawns(state, exponent)
+            count = len(children)
+            child_probability = probability * tile_probability / max(count, 1)
+            for child in children:
+                total += tile_probability * self.max_node(child, depth, child_probability)
+
+        value = total / count if count else self.rules.evaluate(state)
+        if not self.pruned:
+            self.cache.put(key, value)
+        self.pruned = self.pruned or pruned_outside
+        return value
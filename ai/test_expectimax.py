@@ -0,0 +1,66 @@
+import math
+import random
+import time
+
+import pytest
+
+from ai.expectimax import ExpectimaxPlayer
+from engine import bitboard
+from engine.bitboard import DIRECTIONS
+
+
+def random_board(rng: random.Random, size: int) -> list:
+    return [[rng.choice([0, 0, 2, 2, 4, 8, 16, 32]) for _ in range(size)] for _ in range(size)]
+
+
+def searching_player(config, cache_size: int, probability_cutoff: float) -> ExpectimaxPlayer:
+    player = ExpectimaxPlayer(config, cache_size=cache_size, probability_cutoff=probability_cutoff)
+    player.prepare()
+    player.deadline = math.inf
+    return player
+
+
+@pytest.mark.parametrize('size', [4, 5])
+def test_cache_only_holds_unpruned_values(make_config, size):
+    config = make_config(board_size=size)
+    player = searching_player(config, 100000, 0.01)
+    rng = random.Random(size)
+    states = [player.rules.encode(random_board(rng, size)) for _ in range(20)]
+    for state in states:
+        player.chance_node(state, 2, 0.001)
+        assert (state, 2) not in player.cache.entries
+        for probability in (0.02, 1.0, 0.05, 0.3):
+            player.chance_node(state, 2, probability)
+    assert player.cache.hits
+
+    exact = searching_player(config, 0, 0.0)
+    for (state, depth), value in player.cache.entries.items():
+        assert value == exact.chance_node(state, depth, 1.0)
+
+
+def test_best_move_edge_cases(make_config):
+    player = ExpectimaxPlayer(make_config(), time_budget=0.05)
+    assert player.best_move([[2, 4, 2, 4], [4, 2, 4, 2], [2, 4, 2, 4], [4, 2, 4, 2]]) is None
+    assert player.best_move([[2, 4, 2, 4], [4, 2, 4, 2], [2, 4, 2, 4], [4, 2, 4, 0]]) in ('right', 'down')
+    assert player.best_move([[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [2, 4, 8, 16]]) in DIRECTIONS
+
+
+def test_search_respects_time_budget(make_config):
+    player = ExpectimaxPlayer(make_config(), time_budget=0.01, max_depth=30, probability_cutoff=0.0)
+    board = [[2, 0, 4, 0], [0, 8, 0, 2], [4, 0, 2, 0], [0, 2, 0, 16]]
+    started = time.perf_counter()
+    assert player.best_move(board) in DIRECTIONS
+    assert time.perf_counter() - started < 0.2
+    assert 1 <= player.last_stats.depth < 30
+    assert player.last_stats.nodes
+
+
+def test_search_plays_better_than_random(make_config):
+    from render.board_manager import BoardManager
+    config = make_config(target_score=1 << 30)
+    player = ExpectimaxPlayer(config, time_budget=0.002, max_depth=2)
+    searched = BoardManager(config, animate=False, seed=4)
+    while not searched.game_over and searched.score < 3000:
+        searched.move(player.best_move(searched.board))
+    assert searched.score >= 3000
+    assert bitboard.max_tile(searched.packed_state()) >= 256
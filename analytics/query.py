@@ -0,0 +1,180 @@
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from analytics.store import TILE_EXPONENTS, AnalyticsRecorder, ColumnStore, ColumnWriter, ingest_replay
+from config.config_manager import GameConfigManager
+
+PERCENTILES = (0.10, 0.25, 0.50, 0.75, 0.90, 0.99)
+
+
+class ValueCounts:
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+
+    def add(self, values: np.ndarray):
+        unique, counts = np.unique(values, return_counts=True)
+        for value, count in zip(unique.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def mean(self) -> float:
+        total = self.total()
+        return sum(value * count for value, count in self.counts.items()) / total if total else 0.0
+
+    def percentiles(self, fractions: Sequence[float]) -> Dict[str, int]:
+        total = self.total()
+        if not total:
+            return {}
+        result = {}
+        ordered = sorted(self.counts.items())
+        k = 0
+        seen = ordered[0][1]
+        for fraction in sorted(fractions):
+            rank = min(total - 1, int(fraction * total))
+            while seen <= rank:
+                k += 1
+                seen += ordered[k][1]
+            result[f'p{round(fraction * 100)}'] = ordered[k][0]
+        return result
+
+
+class TileFrequency(NamedTuple):
+    move: int
+    positions: int
+    presence: np.ndarray
+    mean_count: np.ndarray
+
+
+def grow(values: np.ndarray, rows: int) -> np.ndarray:
+    if rows <= values.shape[0]:
+        return values
+    grown = np.zeros((rows,) + values.shape[1:], dtype=values.dtype)
+    grown[:values.shape[0]] = values
+    return grown
+
+
+def score_percentiles(store: ColumnStore, fractions: Sequence[float] = PERCENTILES,
+                      config_hash: Optional[str] = None) -> Dict[int, Dict]:
+    per_size: Dict[int, ValueCounts] = {}
+    for chunk in store.scan('games', ('board_size', 'score'), config_hash):
+        sizes = np.asarray(chunk['board_size'])
+        for size in np.unique(sizes).tolist():
+            per_size.setdefault(size, ValueCounts()).add(chunk['score'][sizes == size])
+    return {size: {'games': counts.total(), 'mean': counts.mean(), 'percentiles': counts.percentiles(fractions)}
+            for size, counts in sorted(per_size.items())}
+
+
+def tile_frequency(store: ColumnStore, bucket: int = 50,
+                   config_hash: Optional[str] = None) -> Iterator[TileFrequency]:
+    positions = np.zeros(0, dtype=np.int64)
+    present = np.zeros((0, TILE_EXPONENTS), dtype=np.int64)
+    counts = np.zeros((0, TILE_EXPONENTS), dtype=np.int64)
+    for chunk in store.scan('moves', ('move', 'tiles'), config_hash):
+        if not chunk['move'].shape[0]:
+            continue
+        buckets = np.asarray(chunk['move']) // bucket
+        tiles = np.asarray(chunk['tiles'])
+        rows = int(buckets.max()) + 1
+        positions = grow(positions, rows)
+        present = grow(present, rows)
+        counts = grow(counts, rows)
+        positions[:rows] += np.bincount(buckets, minlength=rows)
+        for exponent in range(TILE_EXPONENTS):
+            column = tiles[:, exponent]
+            present[:rows, exponent] += np.bincount(buckets, weights=column > 0, minlength=rows).astype(np.int64)
+            counts[:rows, exponent] += np.bincount(buckets, weights=column, minlength=rows).astype(np.int64)
+    for k in range(positions.shape[0]):
+        if positions[k]:
+            yield TileFrequency(k * bucket, int(positions[k]), present[k] / positions[k], counts[k] / positions[k])
+
+
+def moves_to_tile(store: ColumnStore, tile: int, fractions: Sequence[float] = PERCENTILES,
+                  config_hash: Optional[str] = None) -> Dict[int, Dict]:
+    exponent = tile.bit_length() - 1
+    if tile < 2 or tile & (tile - 1) or exponent >= TILE_EXPONENTS:
+        raise ValueError(f'tile must be a power of two below {1 << TILE_EXPONENTS}, got {tile}')
+    games: Dict[int, int] = {}
+    per_size: Dict[int, ValueCounts] = {}
+    for chunk in store.scan('games', ('board_size', 'reached'), config_hash):
+        sizes = np.asarray(chunk['board_size'])
+        reached = np.asarray(chunk['reached'][:, exponent])
+        for size in np.unique(sizes).tolist():
+            mask = sizes == size
+            games[size] = games.get(size, 0) + int(mask.sum())
+            per_size.setdefault(size, ValueCounts()).add(reached[mask & (reached >= 0)])
+    result = {}
+    for size, total in sorted(games.items()):
+        counts = per_size[size]
+        result[size] = {'games': total, 'reached': counts.total(),
+                        'rate': counts.total() / total if total else 0.0,
+                        'mean_moves': counts.mean(), 'percentiles': counts.percentiles(fractions)}
+    return result
+
+
+def format_tiles(values: np.ndarray, minimum: float) -> str:
+    return '  '.join(f'{1 << exponent}: {value:.3f}' for exponent, value in enumerate(values)
+                     if exponent and value >= minimum)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Query the game analytics store, run as: python -m analytics.query')
+    parser.add_argument('store', help='analytics store directory')
+    parser.add_argument('--config-hash', help='only use chunks recorded with this config hash (prefix)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('configs', help='list the configs recorded in the store')
+    commands.add_parser('scores', help='score percentiles per board size')
+    tiles = commands.add_parser('tiles', help='tile presence over move number')
+    tiles.add_argument('--bucket', type=int, default=50, help='moves per row')
+    tiles.add_argument('--min-presence', type=float, default=0.01)
+    target = commands.add_parser('target', help='moves needed to reach a tile')
+    target.add_argument('--tile', type=int, default=2048)
+    ingest = commands.add_parser('ingest', help='append recorded replays to the store')
+    ingest.add_argument('replays', nargs='+')
+    ingest.add_argument('--config', default='config/config.json')
+    args = parser.parse_args(argv)
+
+    store = ColumnStore(args.store)
+    if args.command == 'ingest':
+        config = GameConfigManager()
+        config.load_config(args.config)
+        writer = ColumnWriter(args.store, config)
+        recorder = AnalyticsRecorder(writer)
+        for path in args.replays:
+            ingest_replay(path, config, recorder)
+        recorder.close()
+        print(f'ingested {len(args.replays)} replays into {writer.chunks} chunks, config {writer.config_hash}')
+        return 0
+
+    if args.command == 'configs':
+        result = store.configs()
+    elif args.command == 'scores':
+        result = score_percentiles(store, config_hash=args.config_hash)
+    elif args.command == 'target':
+        result = moves_to_tile(store, args.tile, config_hash=args.config_hash)
+    else:
+        rows = tile_frequency(store, args.bucket, args.config_hash)
+        if args.json:
+            result = [{'move': row.move, 'positions': row.positions, 'presence': row.presence.tolist(),
+                       'mean_count': row.mean_count.tolist()} for row in rows]
+        else:
+            for row in rows:
+                print(f'move {row.move:6d}  n {row.positions:8d}  {format_tiles(row.presence, args.min_presence)}')
+            return 0
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    for key, value in result.items():
+        print(f'{key}: {json.dumps(value)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import json
+import os
+import time
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from config.config_snapshot import GAMEPLAY_KEYS
+from engine import bitboard
+from replay.replay_log import ReplayReader
+
+FORMAT_VERSION = 1
+TILE_EXPONENTS = 24
+DEFAULT_CHUNK_ROWS = 1 << 16
+META_FILE = 'meta.json'
+CHUNK_PREFIX = 'chunk-'
+
+GAME_COLUMNS = {
+    'game_id': ('q', np.int64),
+    'board_size': ('h', np.int16),
+    'score': ('q', np.int64),
+    'moves': ('i', np.int32),
+    'max_tile': ('q', np.int64),
+    'won': ('b', np.bool_),
+    'reached': ('i', np.int32),
+}
+MOVE_COLUMNS = {
+    'game_id': ('q', np.int64),
+    'move': ('i', np.int32),
+    'direction': ('b', np.int8),
+    'score': ('q', np.int64),
+    'max_tile': ('q', np.int64),
+    'tiles': ('h', np.int16),
+}
+TABLES = {'games': GAME_COLUMNS, 'moves': MOVE_COLUMNS}
+WIDE_COLUMNS = {'reached', 'tiles'}
+DIRECTION_CODES = {direction: code for code, direction in enumerate(bitboard.DIRECTIONS)}
+
+
+def tile_counts(board_manager) -> List[int]:
+    counts = [0] * TILE_EXPONENTS
+    state = board_manager.packed_state()
+    if state is not None:
+        for shift in range(0, 64, 4):
+            counts[state >> shift & 0xF] += 1
+        return counts
+    last = TILE_EXPONENTS - 1
+    for row in board_manager.board:
+        for value in row:
+            counts[min(value.bit_length() - 1, last) if value else 0] += 1
+    return counts
+
+
+class ChunkInfo(NamedTuple):
+    path: str
+    config_hash: str
+    config: Dict
+    games: int
+    moves: int
+
+
+class ColumnWriter:
+    def __init__(self, root: str, config_manager, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.config_hash = config_manager.config_hash().hex()
+        self.config = {key: config_manager.config[key] for key in GAMEPLAY_KEYS if key in config_manager.config}
+        self.sequence = 0
+        self.chunks = 0
+        self.columns = {table: {name: array(code) for name, (code, _) in columns.items()}
+                        for table, columns in TABLES.items()}
+        os.makedirs(root, exist_ok=True)
+
+    def rows(self, table: str) -> int:
+        return len(self.columns[table]['game_id'])
+
+    def append_move(self, game_id: int, move: int, direction: str, score: int, max_tile: int, tiles: Sequence[int]):
+        columns = self.columns['moves']
+        columns['game_id'].append(game_id)
+        columns['move'].append(move)
+        columns['direction'].append(DIRECTION_CODES[direction])
+        columns['score'].append(score)
+        columns['max_tile'].append(max_tile)
+        columns['tiles'].extend(tiles)
+
+    def drop_move(self):
+        for column, values in self.columns['moves'].items():
+            del values[-TILE_EXPONENTS if column in WIDE_COLUMNS else -1:]
+
+    def append_game(self, game_id: int, board_size: int, score: int, moves: int, max_tile: int, won: bool,
+                    reached: Sequence[int]):
+        columns = self.columns['games']
+        columns['game_id'].append(game_id)
+        columns['board_size'].append(board_size)
+        columns['score'].append(score)
+        columns['moves'].append(moves)
+        columns['max_tile'].append(max_tile)
+        columns['won'].append(won)
+        columns['reached'].extend(reached)
+        if self.rows('moves') >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        games = self.rows('games')
+        if not games:
+            return
+        self.sequence += 1
+        name = f'{CHUNK_PREFIX}{time.time_ns():016x}-{os.getpid()}-{self.sequence}'
+        temp_path = os.path.join(self.root, f'.{name}.tmp')
+        os.makedirs(temp_path)
+        for table, columns in TABLES.items():
+            for column, (_, dtype) in columns.items():
+                data = np.frombuffer(self.columns[table][column], dtype=dtype)
+                if column in WIDE_COLUMNS:
+                    data = data.reshape(-1, TILE_EXPONENTS)
+                np.save(os.path.join(temp_path, f'{table}.{column}.npy'), data)
+        meta = {'version': FORMAT_VERSION, 'config_hash': self.config_hash, 'config': self.config,
+                'games': games, 'moves': self.rows('moves')}
+        with open(os.path.join(temp_path, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        os.rename(temp_path, os.path.join(self.root, name))
+        self.columns = {table: {column: array(code) for column, (code, _) in columns.items()}
+                        for table, columns in TABLES.items()}
+        self.chunks += 1
+
+
+class AnalyticsRecorder:
+    def __init__(self, writer: ColumnWriter):
+        self.writer = writer
+        self.game_id: Optional[int] = None
+        self.moves = 0
+        self.reached: List[int] = []
+        self.size = 0
+        self.score = 0
+        self.won = False
+
+    def attach(self, board_manager):
+        board_manager.recorders.append(self)
+        self.start(board_manager)
+
+    def detach(self, board_manager):
+        board_manager.recorders.remove(self)
+
+    def start(self, board_manager):
+        self.finish(board_manager)
+        self.game_id = board_manager.seed
+        self.moves = 0
+        self.reached = [0 if count else -1 for count in tile_counts(board_manager)]
+        self.track(board_manager)
+
+    def track(self, board_manager):
+        self.size = len(board_manager.board)
+        self.score = board_manager.score
+        self.won = board_manager.won
+
+    def record(self, board_manager, direction: str):
+        self.moves += 1
+        tiles = tile_counts(board_manager)
+        reached = self.reached
+        top = 0
+        for exponent, count in enumerate(tiles):
+            if count:
+                top = exponent
+                if reached[exponent] < 0:
+                    reached[exponent] = self.moves
+        self.track(board_manager)
+        self.writer.append_move(self.game_id, self.moves, direction, board_manager.score, 1 << top if top else 0,
+                                tiles)
+
+    def rewind(self, board_manager):
+        if self.game_id is None or not self.moves:
+            return
+        self.writer.drop_move()
+        self.reached = [-1 if move == self.moves else move for move in self.reached]
+        self.moves -= 1
+        self.track(board_manager)
+
+    def finish(self, board_manager):
+        if self.game_id is None:
+            return
+        top = max((exponent for exponent, move in enumerate(self.reached) if move >= 0 and exponent), default=0)
+        self.writer.append_game(self.game_id, self.size, self.score, self.moves, 1 << top if top else 0, self.won,
+                                self.reached)
+        self.game_id = None
+
+    def close(self, board_manager=None):
+        if board_manager is not None:
+            self.finish(board_manager)
+        self.writer.flush()
+
+
+class ColumnStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def chunks(self, config_hash: Optional[str] = None) -> Iterator[ChunkInfo]:
+        if not os.path.isdir(self.root):
+            return
+        for name in sorted(os.listdir(self.root)):
+            if not name.startswith(CHUNK_PREFIX):
+                continue
+            path = os.path.join(self.root, name)
+            with open(os.path.join(path, META_FILE), 'r') as f:
+                meta = json.load(f)
+            if meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f'{path} has unsupported analytics format {meta.get("version")!r}')
+            if config_hash is not None and not meta['config_hash'].startswith(config_hash):
+                continue
+            yield ChunkInfo(path, meta['config_hash'], meta['config'], meta['games'], meta['moves'])
+
+    def scan(self, table: str, columns: Sequence[str],
+             config_hash: Optional[str] = None) -> Iterator[Dict[str, np.ndarray]]:
+        for column in columns:
+            if column not in TABLES[table]:
+                raise ValueError(f'unknown {table} column {column!r}')
+        for chunk in self.chunks(config_hash):
+            yield {column: np.load(os.path.join(chunk.path, f'{table}.{column}.npy'), mmap_mode='r')
+                   for column in columns}
+
+    def configs(self) -> Dict[str, Dict]:
+        result: Dict[str, Dict] = {}
+        for chunk in self.chunks():
+            entry = result.setdefault(chunk.config_hash, {'config': chunk.config, 'chunks': 0, 'games': 0, 'moves': 0})
+            entry['chunks'] += 1
+            entry['games'] += chunk.games
+            entry['moves'] += chunk.moves
+        return result
+
+
+def ingest_replay(path: str, config_manager, recorder: AnalyticsRecorder):
+    with ReplayReader(path) as replay:
+        board_manager = replay.seek(config_manager, 0)
+        recorder.attach(board_manager)
+        for direction in replay.iter_moves():
+            board_manager.move(direction)
+        recorder.finish(board_manager)
+        recorder.detach(board_manager)
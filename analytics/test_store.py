@@ -0,0 +1,150 @@
+import random
+
+import numpy as np
+import pytest
+
+from analytics.query import ValueCounts, main, moves_to_tile, score_percentiles, tile_frequency
+from analytics.store import (TILE_EXPONENTS, AnalyticsRecorder, ColumnStore, ColumnWriter, ingest_replay,
+                             tile_counts)
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+from replay.replay_log import ReplayRecorder
+
+
+def exponents(board) -> set:
+    return {value.bit_length() - 1 if value else 0 for row in board for value in row}
+
+
+def play(board_manager: BoardManager, moves: int, rng: random.Random) -> dict:
+    reached = {exponent: 0 for exponent in exponents(board_manager.board)}
+    rows = []
+    while len(rows) < moves and not board_manager.game_over:
+        direction = rng.choice(DIRECTIONS)
+        if board_manager.move(direction):
+            for exponent in exponents(board_manager.board):
+                reached.setdefault(exponent, len(rows) + 1)
+            rows.append((len(rows) + 1, DIRECTIONS.index(direction), board_manager.score, tile_counts(board_manager)))
+    top = max(exponent for exponent in reached if exponent)
+    return {'game_id': board_manager.seed, 'board_size': len(board_manager.board), 'score': board_manager.score,
+            'moves': len(rows), 'max_tile': 1 << top, 'won': board_manager.won,
+            'reached': [reached.get(exponent, -1) for exponent in range(TILE_EXPONENTS)], 'rows': rows}
+
+
+def record_games(root: str, make_config, chunk_rows: int = 64) -> list:
+    games = []
+    for size in (4, 5):
+        config = make_config(board_size=size, target_score=1 << 30)
+        writer = ColumnWriter(root, config, chunk_rows)
+        recorder = AnalyticsRecorder(writer)
+        board_manager = BoardManager(config, animate=False, seed=size * 100)
+        recorder.attach(board_manager)
+        rng = random.Random(size)
+        for seed in range(size * 100, size * 100 + 4):
+            if seed != board_manager.seed:
+                board_manager.reset_game(seed)
+            games.append(play(board_manager, 40 + seed % 7 * 10, rng))
+        recorder.close(board_manager)
+        assert writer.chunks > 1
+    return games
+
+
+def read_table(store: ColumnStore, table: str, columns) -> dict:
+    parts = list(store.scan(table, columns))
+    return {column: np.concatenate([np.asarray(part[column]) for part in parts]) for column in columns}
+
+
+def test_games_and_moves_round_trip(tmp_path, make_config):
+    games = record_games(str(tmp_path), make_config)
+    store = ColumnStore(str(tmp_path))
+
+    table = read_table(store, 'games', ('game_id', 'board_size', 'score', 'moves', 'max_tile', 'won', 'reached'))
+    assert table['game_id'].tolist() == [game['game_id'] for game in games]
+    for column in ('board_size', 'score', 'moves', 'max_tile', 'won', 'reached'):
+        assert table[column].tolist() == [game[column] for game in games]
+
+    table = read_table(store, 'moves', ('game_id', 'move', 'direction', 'score', 'tiles'))
+    expected = [(game['game_id'],) + row[:3] for game in games for row in game['rows']]
+    assert list(zip(*(table[column].tolist() for column in ('game_id', 'move', 'direction', 'score')))) == expected
+    assert table['tiles'].tolist() == [row[3] for game in games for row in game['rows']]
+
+    configs = store.configs()
+    assert len(configs) == 2
+    assert sum(entry['games'] for entry in configs.values()) == len(games)
+    assert sum(entry['moves'] for entry in configs.values()) == sum(game['moves'] for game in games)
+
+
+def test_queries_match_recorded_games(tmp_path, make_config):
+    games = record_games(str(tmp_path), make_config)
+    store = ColumnStore(str(tmp_path))
+
+    scores = score_percentiles(store, (0.5,))
+    for size in (4, 5):
+        sized = sorted(game['score'] for game in games if game['board_size'] == size)
+        assert scores[size]['games'] == len(sized)
+        assert scores[size]['mean'] == pytest.approx(sum(sized) / len(sized))
+        assert scores[size]['percentiles'] == {'p50': sized[len(sized) // 2]}
+
+    target = moves_to_tile(store, 16)
+    for size in (4, 5):
+        reached = [game['reached'][4] for game in games if game['board_size'] == size and game['reached'][4] >= 0]
+        assert target[size]['reached'] == len(reached)
+        assert target[size]['mean_moves'] == pytest.approx(sum(reached) / len(reached) if reached else 0.0)
+
+    rows = list(tile_frequency(store, bucket=10))
+    assert sum(row.positions for row in rows) == sum(game['moves'] for game in games)
+    first = [row[3] for game in games for row in game['rows'] if row[0] < 10]
+    assert rows[0].positions == len(first)
+    assert rows[0].mean_count.tolist() == pytest.approx(np.mean(first, axis=0).tolist())
+
+    config_hash = next(iter(store.configs()))
+    assert sum(entry['games'] for entry in score_percentiles(store, config_hash=config_hash[:8]).values()) == 4
+
+    with pytest.raises(ValueError):
+        moves_to_tile(store, 12)
+
+
+def test_undo_drops_recorded_moves(tmp_path, make_config):
+    config = make_config(target_score=1 << 30, undo_memory_kb=64)
+    writer = ColumnWriter(str(tmp_path), config)
+    recorder = AnalyticsRecorder(writer)
+    board_manager = BoardManager(config, animate=False, seed=9, history=True)
+    recorder.attach(board_manager)
+    expected = play(board_manager, 20, random.Random(9))
+    for _ in range(5):
+        assert board_manager.move('left') or board_manager.move('up') or board_manager.move('right')
+        assert board_manager.undo()
+    recorder.close(board_manager)
+
+    store = ColumnStore(str(tmp_path))
+    assert read_table(store, 'moves', ('move',))['move'].tolist() == list(range(1, 21))
+    assert read_table(store, 'games', ('reached',))['reached'].tolist() == [expected['reached']]
+
+
+def test_ingest_matches_live_recording(tmp_path, make_config):
+    config = make_config()
+    board_manager = BoardManager(config, animate=False, seed=31)
+    replay = ReplayRecorder(str(tmp_path / 'replays'), config, 16)
+    replay.attach(board_manager)
+    live = ColumnWriter(str(tmp_path / 'live'), config)
+    recorder = AnalyticsRecorder(live)
+    recorder.attach(board_manager)
+    play(board_manager, 60, random.Random(31))
+    recorder.close(board_manager)
+    path = replay.writer.path
+    replay.close()
+
+    assert main([str(tmp_path / 'ingested'), 'ingest', path]) == 0
+    for table, columns in (('games', ('game_id', 'score', 'moves', 'reached')), ('moves', ('move', 'score', 'tiles'))):
+        ingested = read_table(ColumnStore(str(tmp_path / 'ingested')), table, columns)
+        recorded = read_table(ColumnStore(str(tmp_path / 'live')), table, columns)
+        for column in columns:
+            assert ingested[column].tolist() == recorded[column].tolist()
+
+
+def test_value_counts_percentiles():
+    counts = ValueCounts()
+    counts.add(np.array([5, 1, 3]))
+    counts.add(np.array([3, 9]))
+    assert counts.total() == 5 and counts.mean() == pytest.approx(4.2)
+    assert counts.percentiles((0.0, 0.5, 0.99)) == {'p0': 1, 'p50': 3, 'p99': 9}
+    assert ValueCounts().percentiles((0.5,)) == {}
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Iterable, Optional, Tuple
 from enum import Enum
 
 class AnimationType(Enum):
@@ -7,8 +7,11 @@ class AnimationType(Enum):
     APPEAR = 3
 
 class TileAnimation:
+    __slots__ = ('start_pos', 'end_pos', 'value', 'anim_type', 'duration', 'progress', 'current_pos', 'end_cell')
+
     def __init__(self, start_pos: Tuple[int, int], end_pos: Tuple[int, int], 
-                 value: int, anim_type: AnimationType, duration: int = 10):
+                 value: int, anim_type: AnimationType, duration: int = 10,
+                 end_cell: Optional[Tuple[int, int]] = None):
         self.start_pos = start_pos
         self.end_pos = end_pos
         self.value = value
@@ -16,6 +19,7 @@ class TileAnimation:
         self.duration = duration
         self.progress = 0
         self.current_pos = start_pos
+        self.end_cell = end_cell
         
     def update(self) -> bool:
         self.progress += 1
@@ -26,4 +30,100 @@ class TileAnimation:
         x = self.start_pos[0] + (self.end_pos[0] - self.start_pos[0]) * t
         y = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * t
         self.current_pos = (int(x), int(y))
-        return False
\ No newline at end of file
+        return False
+
+class AnimationPool:
+    __slots__ = ('board_size', 'capacity', 'count', 'start_x', 'start_y', 'end_x', 'end_y',
+                 'current_x', 'current_y', 'value', 'anim_type', 'duration', 'progress', 'cell', 'occupancy')
+
+    def __init__(self, board_size: int, capacity: int = 32):
+        self.board_size = board_size
+        self.capacity = capacity
+        self.count = 0
+        self.start_x = [0] * capacity
+        self.start_y = [0] * capacity
+        self.end_x = [0] * capacity
+        self.end_y = [0] * capacity
+        self.current_x = [0] * capacity
+        self.current_y = [0] * capacity
+        self.value = [0] * capacity
+        self.anim_type = [AnimationType.MOVE] * capacity
+        self.duration = [1] * capacity
+        self.progress = [0] * capacity
+        self.cell = [-1] * capacity
+        self.occupancy = [0] * (board_size * board_size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def grow(self):
+        extra = self.capacity or 1
+        for name in ('start_x', 'start_y', 'end_x', 'end_y', 'current_x', 'current_y',
+                     'value', 'progress'):
+            getattr(self, name).extend([0] * extra)
+        self.anim_type.extend([AnimationType.MOVE] * extra)
+        self.duration.extend([1] * extra)
+        self.cell.extend([-1] * extra)
+        self.capacity += extra
+
+    def add(self, start_pos: Tuple[int, int], end_pos: Tuple[int, int], value: int,
+            anim_type: AnimationType, duration: int, end_cell: Optional[Tuple[int, int]] = None):
+        if self.count == self.capacity:
+            self.grow()
+        k = self.count
+        self.start_x[k], self.start_y[k] = start_pos
+        self.end_x[k], self.end_y[k] = end_pos
+        self.current_x[k], self.current_y[k] = start_pos
+        self.value[k] = value
+        self.anim_type[k] = anim_type
+        self.duration[k] = max(1, duration)
+        self.progress[k] = 0
+        cell = -1
+        if end_cell is not None and anim_type != AnimationType.MOVE:
+            cell = end_cell[0] * self.board_size + end_cell[1]
+            self.occupancy[cell] += 1
+        self.cell[k] = cell
+        self.count = k + 1
+
+    def extend(self, animations: Iterable[TileAnimation]):
+        for anim in animations:
+            self.add(anim.start_pos, anim.end_pos, anim.value, anim.anim_type, anim.duration, anim.end_cell)
+
+    def is_animating(self, i: int, j: int) -> bool:
+        return self.occupancy[i * self.board_size + j] > 0
+
+    def update(self, steps: float = 1.0):
+        start_x, start_y = self.start_x, self.start_y
+        end_x, end_y = self.end_x, self.end_y
+        current_x, current_y = self.current_x, self.current_y
+        value, anim_type, duration = self.value, self.anim_type, self.duration
+        progress, cell, occupancy = self.progress, self.cell, self.occupancy
+        
+        alive = 0
+        for k in range(self.count):
+            step = progress[k] + steps
+            if step >= duration[k]:
+                if cell[k] >= 0:
+                    occupancy[cell[k]] -= 1
+                continue
+            t = step / duration[k]
+            if alive != k:
+                start_x[alive], start_y[alive] = start_x[k], start_y[k]
+                end_x[alive], end_y[alive] = end_x[k], end_y[k]
+                value[alive], anim_type[alive] = value[k], anim_type[k]
+                duration[alive], cell[alive] = duration[k], cell[k]
+            progress[alive] = step
+            current_x[alive] = int(start_x[alive] + (end_x[alive] - start_x[alive]) * t)
+            current_y[alive] = int(start_y[alive] + (end_y[alive] - start_y[alive]) * t)
+            alive += 1
+        self.count = alive
+
+    def clear(self):
+        occupancy, cell = self.occupancy, self.cell
+        for k in range(self.count):
+            if cell[k] >= 0:
+                occupancy[cell[k]] = 0
+        self.count = 0
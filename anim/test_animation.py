@@ -0,0 +1,64 @@
+import random
+
+from anim.animation import AnimationPool, AnimationType, TileAnimation
+
+
+def random_animations(rng: random.Random, count: int, size: int) -> list:
+    animations = []
+    for _ in range(count):
+        end_cell = (rng.randrange(size), rng.randrange(size))
+        animations.append(TileAnimation((rng.randrange(400), rng.randrange(400)),
+                                        (rng.randrange(400), rng.randrange(400)),
+                                        rng.choice([2, 4, 8]), rng.choice(list(AnimationType)),
+                                        rng.randrange(1, 12), end_cell))
+    return animations
+
+
+def pool_state(pool: AnimationPool) -> list:
+    return [((pool.current_x[k], pool.current_y[k]), pool.value[k], pool.anim_type[k]) for k in range(pool.count)]
+
+
+def test_pool_matches_tile_animations():
+    rng = random.Random(6)
+    animations = random_animations(rng, 50, 4)
+    pool = AnimationPool(4, 8)
+    pool.extend(animations)
+    assert len(pool) == 50 and pool.capacity >= 50
+
+    while pool:
+        animations = [anim for anim in animations if not anim.update()]
+        pool.update()
+        assert pool_state(pool) == [(anim.current_pos, anim.value, anim.anim_type) for anim in animations]
+        for i in range(4):
+            for j in range(4):
+                expected = any(anim.end_cell == (i, j) and anim.anim_type != AnimationType.MOVE
+                               for anim in animations)
+                assert pool.is_animating(i, j) == expected
+    assert not animations
+    assert not any(pool.occupancy)
+
+
+def test_fractional_steps_accumulate():
+    whole = AnimationPool(4)
+    halves = AnimationPool(4)
+    animations = random_animations(random.Random(1), 10, 4)
+    whole.extend(animations)
+    halves.extend(animations)
+    for _ in range(3):
+        whole.update(1.0)
+        halves.update(0.5)
+        halves.update(0.5)
+        assert pool_state(whole) == pool_state(halves)
+
+
+def test_grow_from_empty_and_clear():
+    pool = AnimationPool(3, 0)
+    assert not pool
+    pool.add((0, 0), (10, 0), 2, AnimationType.APPEAR, 5, (1, 2))
+    pool.add((0, 0), (10, 0), 2, AnimationType.MERGE, 5, (1, 2))
+    pool.add((0, 0), (10, 0), 2, AnimationType.MOVE, 5, (0, 0))
+    assert len(pool) == 3
+    assert pool.occupancy[1 * 3 + 2] == 2
+    assert not pool.is_animating(0, 0)
+    pool.clear()
+    assert not pool and not any(pool.occupancy)
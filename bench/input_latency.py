@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from config.config_manager import GameConfigManager
+from engine import bitboard
+from engine.rng import GameRandom
+from render.board_manager import BoardManager
+from render.renderer import ARROW_KEYS, Renderer
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+DEFAULT_RATES = [30, 60, 144]
+MODES = {
+    'drop': {'input_buffer_size': 0, 'fast_forward_animations': False},
+    'queue': {'input_buffer_size': 4, 'fast_forward_animations': False},
+    'fast-forward': {'input_buffer_size': 4, 'fast_forward_animations': True},
+}
+KEYS = list(ARROW_KEYS)
+
+
+def measure(target_fps: int, mode: str, duration: float, interval_ms: float, seed: int) -> Dict[str, float]:
+    config = GameConfigManager()
+    config.load_config(CONFIG_PATH)
+    config.update(target_fps=target_fps, target_score=1 << 30, hot_reload=False, **MODES[mode])
+    renderer = Renderer(config, BoardManager(config, seed=seed))
+    rng = GameRandom(seed)
+    bitboard.build_tables()
+    renderer.tile_cache.prewarm(1 << 16)
+    renderer.render_frame()
+
+    stop = threading.Event()
+
+    def press_keys():
+        while not stop.wait(interval_ms / 1000):
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=rng.choice(KEYS)))
+
+    presser = threading.Thread(target=press_keys, daemon=True)
+    started = time.perf_counter()
+    presser.start()
+    while time.perf_counter() - started < duration:
+        if renderer.board.game_over:
+            renderer.board.reset_game()
+        renderer.run_frame()
+    stop.set()
+    presser.join()
+
+    queue = renderer.input_queue
+    return {
+        'inputs': queue.received,
+        'dropped': queue.dropped,
+        'mean_ms': queue.mean_latency(),
+        'p95_ms': queue.latency(0.95),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Input-to-display latency, run as: python -m bench.input_latency')
+    parser.add_argument('--rates', type=int, nargs='+', default=DEFAULT_RATES, help='clock.tick rates to test')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per rate and mode')
+    parser.add_argument('--interval-ms', type=float, default=90.0, help='time between simulated key presses')
+    parser.add_argument('--seed', type=int, default=2048)
+    args = parser.parse_args(argv)
+
+    for target_fps in args.rates:
+        for mode in args.modes:
+            result = measure(target_fps, mode, args.duration, args.interval_ms, args.seed)
+            print(f"{target_fps:4d} Hz  {mode:13} inputs {result['inputs']:4d}  dropped {result['dropped']:4d}  "
+                  f"latency mean {result['mean_ms']:6.1f} ms  p95 {result['p95_ms']:6.1f} ms")
+    pygame.quit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
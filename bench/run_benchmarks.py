@@ -0,0 +1,265 @@
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from config.config_manager import GameConfigManager
+from render.board_manager import BoardManager
+from engine.bitboard import DIRECTIONS
+
+DEFAULT_SIZES = [4, 6, 8, 16]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT, 'config', 'config.json')
+
+
+def make_config(size: int) -> GameConfigManager:
+    config = GameConfigManager()
+    config.load_config(CONFIG_PATH)
+    step = (config.window_size[0] - 60) // size
+    padding = max(2, step // 8)
+    config.update(board_size=size, target_score=1 << 30, padding=padding, tile_size=step - padding)
+    return config
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(benchmark, duration: float, min_samples: int = 50, warmup: int = 20) -> Dict[str, float]:
+    prepare = getattr(benchmark, 'prepare', None)
+    for _ in range(warmup):
+        if prepare:
+            prepare()
+        benchmark()
+
+    samples = []
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    while len(samples) < min_samples or time.perf_counter() - started < duration:
+        if prepare:
+            prepare()
+        before = clock()
+        benchmark()
+        samples.append(clock() - before)
+    total = sum(samples) / 1e9
+    return {
+        'ops_per_sec': len(samples) / total if total else 0.0,
+        'p50_us': percentile(samples, 0.50) / 1000,
+        'p99_us': percentile(samples, 0.99) / 1000,
+        'samples': len(samples),
+    }
+
+
+def peak_memory(benchmark, repeats: int) -> float:
+    prepare = getattr(benchmark, 'prepare', None)
+    gc.collect()
+    tracemalloc.start()
+    for _ in range(repeats):
+        if prepare:
+            prepare()
+        benchmark()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def seeded_board(size: int, seed: int, moves: int, animate: bool) -> BoardManager:
+    random.seed(seed)
+    board = BoardManager(make_config(size), animate=animate)
+    rng = random.Random(seed)
+    for _ in range(moves):
+        if board.game_over:
+            board.reset_game()
+        board.move(rng.choice(DIRECTIONS))
+        board.animations.clear()
+        board.new_tile_animations.clear()
+    return board
+
+
+class EngineMoves:
+    name = 'engine_moves'
+
+    def __init__(self, size: int, seed: int):
+        random.seed(seed)
+        self.rng = random.Random(seed)
+        self.board = BoardManager(make_config(size), animate=False)
+        self.direction = DIRECTIONS[0]
+
+    def prepare(self):
+        if self.board.game_over:
+            self.board.reset_game()
+        self.direction = self.rng.choice(DIRECTIONS)
+
+    def __call__(self):
+        self.board.move(self.direction)
+
+
+class CompressWithAnimation:
+    name = 'compress_with_animation'
+
+    def __init__(self, size: int, seed: int):
+        self.board = seeded_board(size, seed, 4 * size, True)
+        rng = random.Random(seed)
+        self.lines = []
+        for _ in range(256):
+            line = [rng.choice([0, 2, 2, 4, 8]) for _ in range(size)]
+            self.lines.append(([cell for cell in line if cell], rng.randrange(size), rng.choice(DIRECTIONS)))
+        self.index = 0
+
+    def __call__(self):
+        line, index, direction = self.lines[self.index]
+        self.index = (self.index + 1) % len(self.lines)
+        self.board.compress_with_animation(line, index, direction)
+
+
+class UpdateAnimations:
+    name = 'update_animations'
+
+    def __init__(self, size: int, seed: int):
+        self.board = seeded_board(size, seed, 4 * size, True)
+        self.rng = random.Random(seed)
+
+    def prepare(self):
+        board = self.board
+        if board.animations:
+            return
+        while not board.move(self.rng.choice(DIRECTIONS)):
+            if board.game_over:
+                board.reset_game()
+
+    def __call__(self):
+        self.board.update_animations()
+
+
+class DrawBoard:
+    name = 'draw_board'
+
+    def __init__(self, size: int, seed: int):
+        from render.renderer import Renderer
+        self.board = seeded_board(size, seed, 4 * size, True)
+        self.renderer = Renderer(self.board.config, self.board)
+        self.rng = random.Random(seed)
+
+    def prepare(self):
+        board = self.board
+        if not board.animations:
+            while not board.move(self.rng.choice(DIRECTIONS)):
+                if board.game_over:
+                    board.reset_game()
+        board.update_animations()
+
+    def __call__(self):
+        self.renderer.draw_board()
+
+
+BENCHMARKS = [EngineMoves, CompressWithAnimation, UpdateAnimations, DrawBoard]
+
+
+def run(sizes: List[int], seed: int, duration: float, memory_repeats: int) -> Dict[str, dict]:
+    results = {}
+    for benchmark in BENCHMARKS:
+        for size in sizes:
+            key = f'{benchmark.name}[{size}]'
+            result = measure(benchmark(size, seed), duration)
+            result['peak_kb'] = peak_memory(benchmark(size, seed), memory_repeats)
+            results[key] = result
+            print(f"{key:32} {result['ops_per_sec']:12.0f} ops/s  p50 {result['p50_us']:9.1f} us  "
+                  f"p99 {result['p99_us']:9.1f} us  peak {result['peak_kb']:9.1f} KiB")
+    return results
+
+
+def source_fingerprint() -> str:
+    bench_dir = os.path.join(ROOT, 'bench') + os.sep
+    paths = {CONFIG_PATH}
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if path and path.startswith(ROOT + os.sep) and not path.startswith(bench_dir):
+            paths.add(os.path.abspath(path))
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, ROOT).replace(os.sep, '/').encode())
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for key, expected in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        floor = expected['ops_per_sec'] * (1 - tolerance)
+        if current['ops_per_sec'] < floor:
+            regressions.append(f"{key}: {current['ops_per_sec']:.0f} ops/s < {floor:.0f} "
+                               f"(baseline {expected['ops_per_sec']:.0f}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Offline benchmarks, run as: python -m bench.run_benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=2048)
+    parser.add_argument('--duration', type=float, default=1.0, help='seconds per benchmark and size')
+    parser.add_argument('--memory-repeats', type=int, default=200)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed throughput drop vs baseline')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--allow-stale', action='store_true',
+                        help='compare against a baseline recorded for different sources')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.seed, args.duration, args.memory_repeats)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'duration': args.duration,
+            'sizes': args.sizes,
+            'sources': source_fingerprint(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'baseline written to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}, skipping comparison')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    stale = baseline['meta'].get('sources') != report['meta']['sources']
+    if stale:
+        print(f'STALE baseline {args.baseline} was recorded for different sources, '
+              f'rerun with --update-baseline', file=sys.stderr)
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}', file=sys.stderr)
+    return 1 if regressions or (stale and not args.allow_stale) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
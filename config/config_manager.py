@@ -1,58 +1,164 @@
 import json
-from typing import Dict
+import os
+import sys
+import time
+from config.config_snapshot import ConfigSnapshot, build_snapshot
+from typing import Dict, Mapping, Optional, Tuple
 
 class GameConfigManager:
     def __init__(self):
         self.config = {}
+        self.snapshot: ConfigSnapshot = build_snapshot(self.config)
+        self.path: Optional[str] = None
+        self.mtime: Optional[int] = None
+        self.next_check = 0.0
         
     def load_config(self, config_path: str):
         with open(config_path, 'r') as f:
-            self.config = json.load(f)
+            self.apply(json.load(f))
+        self.path = config_path
+        self.mtime = os.stat(config_path).st_mtime_ns
+    
+    def apply(self, config: Dict):
+        snapshot = build_snapshot(config)
+        self.config = config
+        self.snapshot = snapshot
+    
+    def update(self, **values):
+        self.apply({**self.config, **values})
+    
+    def reload_if_changed(self, allow_rule_changes: bool = True) -> bool:
+        if self.path is None or not self.snapshot.hot_reload:
+            return False
+        now = time.monotonic()
+        if now < self.next_check:
+            return False
+        self.next_check = now + self.snapshot.config_poll_interval_ms / 1000
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self.mtime:
+                return False
+            self.mtime = mtime
+            with open(self.path, 'r') as f:
+                config = json.load(f)
+            snapshot = build_snapshot(config)
+        except (OSError, ValueError) as e:
+            print(f'Ignoring config change in {self.path}: {e}', file=sys.stderr)
+            return False
+        if not allow_rule_changes and snapshot.config_hash != self.snapshot.config_hash:
+            print(f'Ignoring config change in {self.path}: gameplay rules are locked', file=sys.stderr)
+            return False
+        self.config = config
+        self.snapshot = snapshot
+        return True
+    
+    def config_hash(self) -> bytes:
+        return self.snapshot.config_hash
         
     @property
     def board_size(self) -> int:
-        return self.config.get('board_size', 4)
+        return self.snapshot.board_size
     
     @property
     def target_score(self) -> int:
-        return self.config.get('target_score', 2048)
+        return self.snapshot.target_score
     
     @property
     def initial_tiles(self) -> int:
-        return self.config.get('initial_tiles', 2)
+        return self.snapshot.initial_tiles
     
     @property
-    def probabilities(self) -> Dict[str, float]:
-        return self.config.get('probabilities', {"2": 0.9, "4": 0.1})
+    def probabilities(self) -> Mapping[str, float]:
+        return self.snapshot.probabilities
     
     @property
-    def colors(self) -> Dict[str, str]:
-        return self.config.get('colors', {})
+    def colors(self) -> Mapping[str, str]:
+        return self.snapshot.colors
     
     @property
-    def font_colors(self) -> Dict[str, str]:
-        return self.config.get('font_colors', {'light': '#F9F6F2', 'dark': '#776E65'})
+    def font_colors(self) -> Mapping[str, str]:
+        return self.snapshot.font_colors
     
     @property
-    def window_size(self) -> list:
-        return self.config.get('window_size', [600, 700])
+    def window_size(self) -> Tuple[int, int]:
+        return self.snapshot.window_size
     
     @property
     def tile_size(self) -> int:
-        return self.config.get('tile_size', 120)
+        return self.snapshot.tile_size
     
     @property
     def padding(self) -> int:
-        return self.config.get('padding', 15)
+        return self.snapshot.padding
     
     @property
-    def font_sizes(self) -> Dict[str, int]:
-        return self.config.get('font_sizes', {'small': 36, 'medium': 48, 'large': 60})
+    def font_sizes(self) -> Mapping[str, int]:
+        return self.snapshot.font_sizes
     
     @property
     def animation_speed(self) -> int:
-        return self.config.get('animation_speed', 10)
+        return self.snapshot.animation_speed
     
     @property
     def animation_duration(self) -> int:
-        return self.config.get('animation_duration', 15)
+        return self.snapshot.animation_duration
+    
+    @property
+    def ai_time_budget_ms(self) -> float:
+        return self.snapshot.ai_time_budget_ms
+    
+    @property
+    def incremental_rendering(self) -> bool:
+        return self.snapshot.incremental_rendering
+    
+    @property
+    def tile_cache_size(self) -> int:
+        return self.snapshot.tile_cache_size
+    
+    @property
+    def prewarm_tile_cache(self) -> bool:
+        return self.snapshot.prewarm_tile_cache
+    
+    @property
+    def hot_reload(self) -> bool:
+        return self.snapshot.hot_reload
+    
+    @property
+    def config_poll_interval_ms(self) -> int:
+        return self.snapshot.config_poll_interval_ms
+    
+    @property
+    def large_board_threshold(self) -> int:
+        return self.snapshot.large_board_threshold
+    
+    @property
+    def target_fps(self) -> int:
+        return self.snapshot.target_fps
+    
+    @property
+    def input_buffer_size(self) -> int:
+        return self.snapshot.input_buffer_size
+    
+    @property
+    def fast_forward_animations(self) -> bool:
+        return self.snapshot.fast_forward_animations
+    
+    @property
+    def input_max_wait_ms(self) -> int:
+        return self.snapshot.input_max_wait_ms
+    
+    @property
+    def spawn_distribution(self) -> str:
+        return self.snapshot.spawn_distribution
+    
+    @property
+    def rng_block_size(self) -> int:
+        return self.snapshot.rng_block_size
+    
+    @property
+    def undo_memory_kb(self) -> int:
+        return self.snapshot.undo_memory_kb
+    
+    @property
+    def font_metrics_cache(self) -> str:
+        return self.snapshot.font_metrics_cache
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import string
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Tuple
+
+from engine.spawn import SPAWN_DISTRIBUTIONS, AliasTable
+
+RGB = Tuple[int, int, int]
+
+BOARD_TOP = 100
+GAMEPLAY_KEYS = ('board_size', 'target_score', 'initial_tiles', 'probabilities', 'spawn_distribution')
+PROBABILITY_TOLERANCE = 1e-9
+DEFAULT_FONT_METRICS_CACHE = '~/.cache/py2048/font_metrics.json'
+DEFAULT_PROBABILITIES = {'2': 0.9, '4': 0.1}
+HEX_DIGITS = frozenset(string.hexdigits)
+POSITIVE_INT_KEYS = ('target_score', 'tile_size', 'animation_duration', 'tile_cache_size', 'large_board_threshold',
+                     'target_fps', 'rng_block_size')
+NON_NEGATIVE_INT_KEYS = ('padding', 'animation_speed', 'config_poll_interval_ms', 'input_buffer_size',
+                         'input_max_wait_ms', 'undo_memory_kb')
+BOOL_KEYS = ('incremental_rendering', 'prewarm_tile_cache', 'hot_reload', 'fast_forward_animations')
+
+
+def hex_to_rgb(hex_color: str) -> RGB:
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+class ConfigSnapshot(NamedTuple):
+    board_size: int
+    target_score: int
+    initial_tiles: int
+    probabilities: Mapping[str, float]
+    colors: Mapping[str, str]
+    font_colors: Mapping[str, str]
+    window_size: Tuple[int, int]
+    tile_size: int
+    padding: int
+    font_sizes: Mapping[str, int]
+    animation_speed: int
+    animation_duration: int
+    ai_time_budget_ms: float
+    incremental_rendering: bool
+    tile_cache_size: int
+    prewarm_tile_cache: bool
+    hot_reload: bool
+    config_poll_interval_ms: int
+    large_board_threshold: int
+    target_fps: int
+    input_buffer_size: int
+    fast_forward_animations: bool
+    input_max_wait_ms: int
+    spawn_distribution: str
+    rng_block_size: int
+    undo_memory_kb: int
+    font_metrics_cache: str
+    tile_step: int
+    board_width: int
+    board_origin: Tuple[int, int]
+    board_rect: Tuple[int, int, int, int]
+    tile_positions: Tuple[Tuple[Tuple[int, int], ...], ...]
+    color_rgb: Mapping[int, RGB]
+    empty_rgb: RGB
+    font_rgb: Mapping[str, RGB]
+    spawn_values: Tuple[int, ...]
+    spawn_cumulative: Tuple[float, ...]
+    spawn_sampler: AliasTable
+    config_hash: bytes
+
+
+def gameplay_hash(config: Dict) -> bytes:
+    rules = {key: config[key] for key in GAMEPLAY_KEYS if key in config}
+    canonical = json.dumps(rules, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).digest()[:16]
+
+
+def is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_color(value) -> bool:
+    if not isinstance(value, str):
+        return False
+    digits = value.lstrip('#')
+    return len(digits) == 6 and all(digit in HEX_DIGITS for digit in digits)
+
+
+def check_mapping(config: Dict, key: str, default: Dict, errors: list) -> Dict:
+    value = config.get(key, default)
+    if not isinstance(value, Mapping) or not all(isinstance(name, str) for name in value):
+        errors.append(f'{key} must be an object with string keys, got {value!r}')
+        return {}
+    return value
+
+
+def validate(config: Dict):
+    if not isinstance(config, Mapping):
+        raise ValueError(f'config must be an object, got {config!r}')
+    errors = []
+    board_size = config.get('board_size', 4)
+    if not is_int(board_size) or board_size < 2:
+        errors.append(f'board_size must be an integer >= 2, got {board_size!r}')
+    else:
+        initial_tiles = config.get('initial_tiles', 2)
+        if not is_int(initial_tiles) or not 0 <= initial_tiles <= board_size * board_size:
+            errors.append(f'initial_tiles must be an integer that fits on the board, got {initial_tiles!r}')
+    for key in POSITIVE_INT_KEYS:
+        value = config.get(key, 1)
+        if not is_int(value) or value < 1:
+            errors.append(f'{key} must be a positive integer, got {value!r}')
+    for key in NON_NEGATIVE_INT_KEYS:
+        value = config.get(key, 0)
+        if not is_int(value) or value < 0:
+            errors.append(f'{key} must be a non-negative integer, got {value!r}')
+    ai_time_budget_ms = config.get('ai_time_budget_ms', 5)
+    if not is_number(ai_time_budget_ms) or ai_time_budget_ms < 0:
+        errors.append(f'ai_time_budget_ms must be a non-negative number, got {ai_time_budget_ms!r}')
+    for key in BOOL_KEYS:
+        value = config.get(key, False)
+        if not isinstance(value, bool):
+            errors.append(f'{key} must be true or false, got {value!r}')
+    window_size = config.get('window_size', [600, 700])
+    if (not isinstance(window_size, (list, tuple)) or len(window_size) != 2
+            or any(not is_int(v) or v < 1 for v in window_size)):
+        errors.append(f'window_size must be two positive integers, got {window_size!r}')
+
+    probabilities = check_mapping(config, 'probabilities', DEFAULT_PROBABILITIES, errors)
+    if not probabilities and isinstance(config.get('probabilities'), Mapping):
+        errors.append('probabilities must not be empty')
+    numeric = True
+    for value_str, prob in probabilities.items():
+        if not value_str.isdecimal() or int(value_str) < 2 or int(value_str) & (int(value_str) - 1):
+            errors.append(f'probabilities key {value_str!r} is not a power of two >= 2')
+        if not is_number(prob) or prob < 0:
+            errors.append(f'probabilities[{value_str!r}] must be a non-negative number, got {prob!r}')
+            numeric = False
+    if probabilities and numeric and abs(sum(probabilities.values()) - 1.0) > PROBABILITY_TOLERANCE:
+        errors.append(f'probabilities must sum to 1, got {sum(probabilities.values())!r}')
+
+    spawn_distribution = config.get('spawn_distribution', 'weighted')
+    if not isinstance(spawn_distribution, str) or spawn_distribution not in SPAWN_DISTRIBUTIONS:
+        errors.append(f"spawn_distribution must be one of {', '.join(SPAWN_DISTRIBUTIONS)}, got {spawn_distribution!r}")
+    if not isinstance(config.get('font_metrics_cache', ''), str):
+        errors.append('font_metrics_cache must be a path string, empty to disable')
+    sections = {section: check_mapping(config, section, {}, errors) for section in ('colors', 'font_colors')}
+    for section, colors in sections.items():
+        for name, color in colors.items():
+            if not is_color(color):
+                errors.append(f'{section}[{name!r}] must be a #RRGGBB color, got {color!r}')
+    font_colors = sections['font_colors']
+    if font_colors and not {'light', 'dark'} <= set(font_colors):
+        errors.append("font_colors must define 'light' and 'dark'")
+    font_sizes = check_mapping(config, 'font_sizes', {}, errors)
+    if font_sizes and not {'small', 'medium', 'large'} <= set(font_sizes):
+        errors.append("font_sizes must define 'small', 'medium' and 'large'")
+    for name, size in font_sizes.items():
+        if not is_int(size) or size < 1:
+            errors.append(f'font_sizes[{name!r}] must be a positive integer, got {size!r}')
+    if errors:
+        raise ValueError('; '.join(errors))
+
+
+def build_snapshot(config: Dict) -> ConfigSnapshot:
+    validate(config)
+    board_size = config.get('board_size', 4)
+    tile_size = config.get('tile_size', 120)
+    padding = config.get('padding', 15)
+    window_size = tuple(config.get('window_size', [600, 700]))
+    probabilities = dict(config.get('probabilities', DEFAULT_PROBABILITIES))
+    colors = dict(config.get('colors', {}))
+    font_colors = dict(config.get('font_colors', {'light': '#F9F6F2', 'dark': '#776E65'}))
+
+    tile_step = tile_size + padding
+    board_width = board_size * tile_step + padding
+    origin_x = (window_size[0] - board_width) // 2
+    tile_positions = tuple(tuple((origin_x + j * tile_step, BOARD_TOP + i * tile_step) for j in range(board_size))
+                           for i in range(board_size))
+
+    return ConfigSnapshot(
+        board_size=board_size,
+        target_score=config.get('target_score', 2048),
+        initial_tiles=config.get('initial_tiles', 2),
+        probabilities=MappingProxyType(probabilities),
+        colors=MappingProxyType(colors),
+        font_colors=MappingProxyType(font_colors),
+        window_size=window_size,
+        tile_size=tile_size,
+        padding=padding,
+        font_sizes=MappingProxyType(dict(config.get('font_sizes', {'small': 36, 'medium': 48, 'large': 60}))),
+        animation_speed=config.get('animation_speed', 10),
+        animation_duration=config.get('animation_duration', 15),
+        ai_time_budget_ms=config.get('ai_time_budget_ms', 5),
+        incremental_rendering=config.get('incremental_rendering', True),
+        tile_cache_size=config.get('tile_cache_size', 256),
+        prewarm_tile_cache=config.get('prewarm_tile_cache', False),
+        hot_reload=config.get('hot_reload', True),
+        config_poll_interval_ms=config.get('config_poll_interval_ms', 500),
+        large_board_threshold=config.get('large_board_threshold', 8),
+        target_fps=config.get('target_fps', 60),
+        input_buffer_size=config.get('input_buffer_size', 4),
+        fast_forward_animations=config.get('fast_forward_animations', True),
+        input_max_wait_ms=config.get('input_max_wait_ms', 50),
+        spawn_distribution=config.get('spawn_distribution', 'weighted'),
+        rng_block_size=config.get('rng_block_size', 64),
+        undo_memory_kb=config.get('undo_memory_kb', 256),
+        font_metrics_cache=config.get('font_metrics_cache', DEFAULT_FONT_METRICS_CACHE),
+        tile_step=tile_step,
+        board_width=board_width,
+        board_origin=(origin_x, BOARD_TOP),
+        board_rect=(origin_x - padding, BOARD_TOP - padding, board_width, board_width),
+        tile_positions=tile_positions,
+        color_rgb=MappingProxyType({int(name): hex_to_rgb(color) for name, color in colors.items() if name.isdecimal()}),
+        empty_rgb=hex_to_rgb(colors.get('0', '#CDC1B4')),
+        font_rgb=MappingProxyType({name: hex_to_rgb(color) for name, color in font_colors.items()}),
+        spawn_values=tuple(int(value_str) for value_str in probabilities),
+        spawn_cumulative=tuple(accumulate(probabilities.values())),
+        spawn_sampler=AliasTable([int(value_str) for value_str in probabilities], list(probabilities.values())),
+        config_hash=gameplay_hash(config),
+    )
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from config.config_manager import GameConfigManager
+from config.config_snapshot import build_snapshot
+
+BAD_VALUES = [
+    ('board_size', 1),
+    ('board_size', '4'),
+    ('initial_tiles', 17),
+    ('initial_tiles', 'two'),
+    ('target_score', 'abc'),
+    ('target_score', 0),
+    ('tile_size', 12.5),
+    ('padding', -1),
+    ('animation_speed', None),
+    ('config_poll_interval_ms', '500'),
+    ('ai_time_budget_ms', 'fast'),
+    ('ai_time_budget_ms', True),
+    ('hot_reload', 'yes'),
+    ('window_size', 5),
+    ('window_size', [600]),
+    ('window_size', [600, '700']),
+    ('probabilities', [1]),
+    ('probabilities', {}),
+    ('probabilities', {'2': '0.9', '4': 0.1}),
+    ('probabilities', {'2': -0.5, '4': 1.5}),
+    ('probabilities', {'3': 1.0}),
+    ('probabilities', {'2': 0.5}),
+    ('spawn_distribution', ['weighted']),
+    ('spawn_distribution', 'gaussian'),
+    ('font_metrics_cache', 0),
+    ('colors', None),
+    ('colors', {'2': None}),
+    ('colors', {'2': 0xEEE4DA}),
+    ('colors', {'2': '#EEE4DZ'}),
+    ('font_colors', {'light': '#FFFFFF'}),
+    ('font_sizes', {'small': 36, 'medium': 48, 'large': '60'}),
+    ('font_sizes', {'small': 36, 'medium': 48}),
+    ('font_sizes', 48),
+]
+
+
+@pytest.fixture
+def base_config(make_config):
+    return make_config().config
+
+
+@pytest.mark.parametrize('key, value', BAD_VALUES)
+def test_bad_values_raise_value_error_naming_the_key(base_config, key, value):
+    with pytest.raises(ValueError, match=key):
+        build_snapshot(dict(base_config, **{key: value}))
+
+
+def test_non_object_config_is_rejected():
+    with pytest.raises(ValueError):
+        build_snapshot([1, 2])
+
+
+def test_defaults_and_shipped_config_are_valid(base_config):
+    assert build_snapshot({}).board_size == 4
+    snapshot = build_snapshot(base_config)
+    assert snapshot.color_rgb[2] == (0xEE, 0xE4, 0xDA)
+    assert snapshot.tile_positions[0][0] == snapshot.board_origin
+
+
+@pytest.fixture
+def config_file(tmp_path, base_config):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(dict(base_config, hot_reload=True, config_poll_interval_ms=0)))
+    config = GameConfigManager()
+    config.load_config(str(path))
+    return config, path
+
+
+def rewrite(path, config: dict):
+    path.write_text(json.dumps(config))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_keeps_old_snapshot_on_bad_config(config_file, capsys):
+    config, path = config_file
+    snapshot = config.snapshot
+    for key, value in [('colors', {'2': None}), ('window_size', 5), ('probabilities', [1])]:
+        rewrite(path, dict(config.config, **{key: value}))
+        assert not config.reload_if_changed()
+        assert config.snapshot is snapshot
+        assert key in capsys.readouterr().err
+    path.write_text('{"board_size": ')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+    assert not config.reload_if_changed()
+    assert config.snapshot is snapshot
+
+
+def test_reload_applies_good_config_and_locks_rules(config_file):
+    config, path = config_file
+    rewrite(path, dict(config.config, tile_size=100))
+    assert config.reload_if_changed()
+    assert config.tile_size == 100
+    rewrite(path, dict(config.config, board_size=5))
+    assert not config.reload_if_changed(allow_rule_changes=False)
+    assert config.board_size == 4
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from config.config_manager import GameConfigManager
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'config.json')
+
+
+@pytest.fixture
+def make_config():
+    def make(**overrides) -> GameConfigManager:
+        config = GameConfigManager()
+        config.load_config(CONFIG_PATH)
+        config.update(hot_reload=False, font_metrics_cache='', **overrides)
+        return config
+    return make
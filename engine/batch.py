@@ -0,0 +1,178 @@
+from typing import NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from engine import bitboard
+from engine.bitboard import DIRECTIONS
+
+UP, DOWN, LEFT, RIGHT = range(len(DIRECTIONS))
+
+
+class StepResult(NamedTuple):
+    boards: np.ndarray
+    score_deltas: np.ndarray
+    moved: np.ndarray
+    game_over: np.ndarray
+    won: np.ndarray
+
+
+def direction_codes(directions: Sequence[str]) -> np.ndarray:
+    return np.array([DIRECTIONS.index(direction) for direction in directions], dtype=np.int8)
+
+
+_PERMUTATIONS = {}
+
+
+def _permutations(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    if size not in _PERMUTATIONS:
+        cells = np.arange(size * size).reshape(size, size)
+        oriented = [None] * len(DIRECTIONS)
+        oriented[UP] = cells.T
+        oriented[DOWN] = cells.T[:, ::-1]
+        oriented[LEFT] = cells
+        oriented[RIGHT] = cells[:, ::-1]
+        forward = np.stack([order.ravel() for order in oriented])
+        inverse = np.argsort(forward, axis=1)
+        _PERMUTATIONS[size] = (forward, inverse)
+    return _PERMUTATIONS[size]
+
+
+def _compact(rows: np.ndarray) -> np.ndarray:
+    non_zero = rows != 0
+    r, c = np.nonzero(non_zero)
+    target = np.cumsum(non_zero, axis=1)[r, c] - 1
+    result = np.zeros_like(rows)
+    result[r, target] = rows[r, c]
+    return result
+
+
+_ROW_TABLES: list = []
+_TABLE_LIMIT = 1 << (bitboard.MAX_EXPONENT - 1)
+
+
+def _row_tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if not _ROW_TABLES:
+        bitboard.build_tables()
+        exponents = np.zeros(_TABLE_LIMIT + 1, dtype=np.int64)
+        for exponent in range(1, bitboard.MAX_EXPONENT):
+            exponents[1 << exponent] = exponent
+        values = np.array([0] + [1 << e for e in range(1, bitboard.MAX_EXPONENT + 1)], dtype=np.int64)
+        rows = np.array(bitboard._ROW_LEFT + bitboard._ROW_RIGHT, dtype=np.int64)
+        row_values = values[(rows[:, None] >> np.arange(0, 4 * bitboard.SIZE, 4)) & 0xF]
+        row_score = np.array(bitboard._ROW_SCORE_LEFT + bitboard._ROW_SCORE_RIGHT, dtype=np.int64)
+        _ROW_TABLES.extend([exponents, row_values, row_score])
+    return tuple(_ROW_TABLES)
+
+
+def _line_indices(cells: np.ndarray) -> np.ndarray:
+    return cells[..., 0] | cells[..., 1] << 4 | cells[..., 2] << 8 | cells[..., 3] << 12
+
+
+def _move_packed(boards: np.ndarray, directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    exponents, row_values, row_score = _row_tables()
+    cells = np.take(exponents, boards)
+    horizontal = (directions == LEFT) | (directions == RIGHT)
+    reverse = (directions == RIGHT) | (directions == DOWN)
+    lines = np.where(horizontal[:, None], _line_indices(cells), _line_indices(cells.transpose(0, 2, 1)))
+    lines += reverse[:, None] << 16
+    moved_lines = np.take(row_values, lines, axis=0).astype(boards.dtype, copy=False)
+    result = np.where(horizontal[:, None, None], moved_lines, moved_lines.transpose(0, 2, 1))
+    return result, np.take(row_score, lines).sum(axis=1)
+
+
+def _can_pack(boards: np.ndarray) -> bool:
+    return boards.shape[1] == bitboard.SIZE and boards.size and boards.max() <= _TABLE_LIMIT and boards.min() >= 0
+
+
+def slide_left(boards: np.ndarray, packed: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    n, size, _ = boards.shape
+    if packed and _can_pack(boards):
+        return _move_packed(boards, np.full(n, LEFT))
+    
+    rows = _compact(boards.reshape(n * size, size))
+    scores = np.zeros(n * size, dtype=np.int64)
+    for j in range(size - 1):
+        current = rows[:, j]
+        following = rows[:, j + 1]
+        merge = (current == following) & (current != 0)
+        current[merge] *= 2
+        following[merge] = 0
+        scores[merge] += current[merge]
+    rows = _compact(rows)
+    return rows.reshape(n, size, size), scores.reshape(n, size).sum(axis=1)
+
+
+def has_valid_moves(boards: np.ndarray) -> np.ndarray:
+    n = boards.shape[0]
+    valid = (boards.reshape(n, -1) == 0).any(axis=1)
+    full = np.flatnonzero(~valid)
+    if full.size:
+        full_boards = boards[full]
+        horizontal = (full_boards[:, :, 1:] == full_boards[:, :, :-1]).reshape(full.size, -1).any(axis=1)
+        vertical = (full_boards[:, 1:, :] == full_boards[:, :-1, :]).reshape(full.size, -1).any(axis=1)
+        valid[full] = horizontal | vertical
+    return valid
+
+
+class BatchEngine:
+    def __init__(self, config_manager, seed: Optional[int] = None):
+        self.config = config_manager
+        self.size = config_manager.board_size
+        self.rng = np.random.default_rng(seed)
+        snapshot = config_manager.snapshot
+        self.tile_values = np.array(snapshot.spawn_values, dtype=np.int64)
+        self.cumulative = np.array(snapshot.spawn_cumulative, dtype=np.float64)
+        self.packed = all(bitboard.exponent_of(int(value)) is not None for value in self.tile_values)
+
+    def new_boards(self, count: int) -> np.ndarray:
+        boards = np.zeros((count, self.size, self.size), dtype=np.int32)
+        for _ in range(self.config.initial_tiles):
+            self.spawn(boards)
+        return boards
+
+    def choose_tile_values(self, count: int) -> np.ndarray:
+        rand = self.rng.random(count)
+        index = np.searchsorted(self.cumulative, rand, side='left')
+        values = np.full(count, 2, dtype=np.int64)
+        valid = index < len(self.tile_values)
+        values[valid] = self.tile_values[index[valid]]
+        return values
+
+    def spawn(self, boards: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        n = boards.shape[0]
+        flat = boards.reshape(n, -1)
+        empty = flat == 0
+        counts = empty.sum(axis=1)
+        candidates = counts > 0
+        if mask is not None:
+            candidates &= mask
+        index = np.flatnonzero(candidates)
+        if not index.size:
+            return boards
+
+        empty = empty[index]
+        picks = (self.rng.random(index.size) * counts[index]).astype(np.int32)
+        cells = np.argmax(np.cumsum(empty, axis=1, dtype=np.int32) > picks[:, None], axis=1)
+        flat[index, cells] = self.choose_tile_values(index.size)
+        return boards
+
+    def move(self, boards: np.ndarray, directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = boards.shape[0]
+        directions = np.broadcast_to(np.asarray(directions, dtype=np.intp), (n,))
+        if self.packed and _can_pack(boards):
+            result, scores = _move_packed(boards, directions)
+            moved = (result != boards).reshape(n, -1).any(axis=1)
+            return result, scores, moved
+        
+        forward, inverse = _permutations(boards.shape[1])
+        flat = boards.reshape(n, -1)
+        oriented = np.take_along_axis(flat, forward[directions], axis=1)
+        slid, scores = slide_left(oriented.reshape(boards.shape), self.packed)
+        result = np.take_along_axis(slid.reshape(n, -1), inverse[directions], axis=1)
+        moved = (result != flat).any(axis=1)
+        return result.reshape(boards.shape), scores, moved
+
+    def step(self, boards: np.ndarray, directions: np.ndarray) -> StepResult:
+        result, scores, moved = self.move(boards, directions)
+        self.spawn(result, moved)
+        game_over = ~has_valid_moves(result)
+        won = (result.reshape(result.shape[0], -1) >= self.config.target_score).any(axis=1)
+        return StepResult(result, scores, moved, game_over, won)
@@ -0,0 +1,269 @@
+from typing import List, Optional, Tuple
+
+from engine.rng import load_numpy
+
+DIRECTIONS = ('up', 'down', 'left', 'right')
+SIZE = 4
+MAX_EXPONENT = 15
+
+_ROW_MASK = 0xFFFF
+_NIBBLE_LOW = 0x1111111111111111
+_ROW_LEFT: List[int] = []
+_ROW_RIGHT: List[int] = []
+_COL_UP: List[int] = []
+_COL_DOWN: List[int] = []
+_ROW_SCORE_LEFT: List[int] = []
+_ROW_SCORE_RIGHT: List[int] = []
+_ROW_PLAYABLE: List[bool] = []
+_ROW_MAX: List[int] = []
+
+_EXPONENTS = {1 << e: e for e in range(1, MAX_EXPONENT)}
+_EXPONENTS[0] = 0
+_VALUES = [0] + [1 << e for e in range(1, MAX_EXPONENT + 1)]
+
+
+def slide_line(cells: List[int], limit: Optional[int] = MAX_EXPONENT) -> Tuple[List[int], int]:
+    line = [cell for cell in cells if cell != 0]
+    result = []
+    score = 0
+    i = 0
+    while i < len(line):
+        if i + 1 < len(line) and line[i] == line[i + 1]:
+            merged = line[i] + 1 if limit is None else min(line[i] + 1, limit)
+            score += 1 << merged
+            result.append(merged)
+            i += 2
+        else:
+            result.append(line[i])
+            i += 1
+    result.extend([0] * (len(cells) - len(result)))
+    return result, score
+
+
+def _pack_row(cells: List[int]) -> int:
+    return cells[0] | cells[1] << 4 | cells[2] << 8 | cells[3] << 12
+
+
+def _spread_column(row: int) -> int:
+    return ((row & 0xF) | (row >> 4 & 0xF) << 16 |
+            (row >> 8 & 0xF) << 32 | (row >> 12 & 0xF) << 48)
+
+
+def row_tables_python() -> Tuple[List, ...]:
+    tables = ([], [], [], [], [], [], [], [])
+    row_left, row_right, col_up, col_down, score_left, score_right, playable, row_max = tables
+    for row in range(1 << 16):
+        cells = [row >> 4 * k & 0xF for k in range(SIZE)]
+        left, left_score = slide_line(cells)
+        right, right_score = slide_line(cells[::-1])
+        right.reverse()
+        left_row = _pack_row(left)
+        right_row = _pack_row(right)
+
+        row_left.append(left_row)
+        row_right.append(right_row)
+        col_up.append(_spread_column(left_row))
+        col_down.append(_spread_column(right_row))
+        score_left.append(left_score)
+        score_right.append(right_score)
+        playable.append(0 in cells or any(cells[k] == cells[k + 1] for k in range(SIZE - 1)))
+        row_max.append(max(cells))
+    return tables
+
+
+def slide_lines_numpy(np, cells):
+    rows = cells.shape[0]
+    line = np.take_along_axis(cells, np.argsort(cells == 0, axis=1, kind='stable'), axis=1)
+    result = np.zeros_like(line)
+    score = np.zeros(rows, dtype=np.int64)
+    position = np.zeros(rows, dtype=np.int64)
+    skip = np.zeros(rows, dtype=bool)
+    index = np.arange(rows)
+    for k in range(SIZE):
+        cell = line[:, k]
+        active = (cell != 0) & ~skip
+        merge = active & (cell == line[:, k + 1]) if k + 1 < SIZE else np.zeros(rows, dtype=bool)
+        value = np.where(merge, np.minimum(cell + 1, MAX_EXPONENT), cell)
+        result[index[active], position[active]] = value[active]
+        score += np.where(merge, 1 << value, 0)
+        position += active
+        skip = merge
+    return result, score
+
+
+def row_tables_numpy(np) -> Tuple[List, ...]:
+    shifts = 4 * np.arange(SIZE, dtype=np.int64)
+    column_shifts = 16 * np.arange(SIZE, dtype=np.int64)
+    cells = np.arange(1 << 16, dtype=np.int64)[:, None] >> shifts & 0xF
+    left, left_score = slide_lines_numpy(np, cells)
+    right, right_score = slide_lines_numpy(np, cells[:, ::-1])
+    right = right[:, ::-1]
+    playable = (cells == 0).any(axis=1) | (cells[:, :-1] == cells[:, 1:]).any(axis=1)
+    return ((left << shifts).sum(axis=1).tolist(), (right << shifts).sum(axis=1).tolist(),
+            (left << column_shifts).sum(axis=1).tolist(), (right << column_shifts).sum(axis=1).tolist(),
+            left_score.tolist(), right_score.tolist(), playable.tolist(), cells.max(axis=1).tolist())
+
+
+def build_tables():
+    if _ROW_LEFT:
+        return
+    np = load_numpy()
+    tables = row_tables_numpy(np) if np else row_tables_python()
+    targets = (_ROW_RIGHT, _COL_UP, _COL_DOWN, _ROW_SCORE_LEFT, _ROW_SCORE_RIGHT, _ROW_PLAYABLE, _ROW_MAX)
+    for target, values in zip(targets, tables[1:]):
+        target[:] = values
+    _ROW_LEFT[:] = tables[0]
+
+
+def encode(board: List[List[int]]) -> int:
+    state = 0
+    shift = 0
+    for row in board:
+        for value in row:
+            state |= _EXPONENTS[value] << shift
+            shift += 4
+    return state
+
+
+def try_encode(board: List[List[int]]) -> Optional[int]:
+    if len(board) != SIZE:
+        return None
+    try:
+        return encode(board)
+    except KeyError:
+        return None
+
+
+def exponent_of(value: int) -> Optional[int]:
+    return _EXPONENTS.get(value)
+
+
+def decode(state: int) -> List[List[int]]:
+    return [[_VALUES[state >> (16 * i + 4 * j) & 0xF] for j in range(SIZE)] for i in range(SIZE)]
+
+
+def get_cell(state: int, i: int, j: int) -> int:
+    return _VALUES[state >> (16 * i + 4 * j) & 0xF]
+
+
+def set_exponent(state: int, i: int, j: int, exponent: int) -> int:
+    shift = 16 * i + 4 * j
+    return state & ~(0xF << shift) | exponent << shift
+
+
+def transpose(state: int) -> int:
+    a1 = state & 0xF0F00F0FF0F00F0F
+    a2 = state & 0x0000F0F00000F0F0
+    a3 = state & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def move_left(state: int) -> Tuple[int, int]:
+    if not _ROW_LEFT:
+        build_tables()
+    r0 = state & _ROW_MASK
+    r1 = state >> 16 & _ROW_MASK
+    r2 = state >> 32 & _ROW_MASK
+    r3 = state >> 48
+    new_state = _ROW_LEFT[r0] | _ROW_LEFT[r1] << 16 | _ROW_LEFT[r2] << 32 | _ROW_LEFT[r3] << 48
+    score = _ROW_SCORE_LEFT[r0] + _ROW_SCORE_LEFT[r1] + _ROW_SCORE_LEFT[r2] + _ROW_SCORE_LEFT[r3]
+    return new_state, score
+
+
+def move_right(state: int) -> Tuple[int, int]:
+    if not _ROW_LEFT:
+        build_tables()
+    r0 = state & _ROW_MASK
+    r1 = state >> 16 & _ROW_MASK
+    r2 = state >> 32 & _ROW_MASK
+    r3 = state >> 48
+    new_state = _ROW_RIGHT[r0] | _ROW_RIGHT[r1] << 16 | _ROW_RIGHT[r2] << 32 | _ROW_RIGHT[r3] << 48
+    score = _ROW_SCORE_RIGHT[r0] + _ROW_SCORE_RIGHT[r1] + _ROW_SCORE_RIGHT[r2] + _ROW_SCORE_RIGHT[r3]
+    return new_state, score
+
+
+def move_up(state: int) -> Tuple[int, int]:
+    if not _ROW_LEFT:
+        build_tables()
+    t = transpose(state)
+    c0 = t & _ROW_MASK
+    c1 = t >> 16 & _ROW_MASK
+    c2 = t >> 32 & _ROW_MASK
+    c3 = t >> 48
+    new_state = _COL_UP[c0] | _COL_UP[c1] << 4 | _COL_UP[c2] << 8 | _COL_UP[c3] << 12
+    score = _ROW_SCORE_LEFT[c0] + _ROW_SCORE_LEFT[c1] + _ROW_SCORE_LEFT[c2] + _ROW_SCORE_LEFT[c3]
+    return new_state, score
+
+
+def move_down(state: int) -> Tuple[int, int]:
+    if not _ROW_LEFT:
+        build_tables()
+    t = transpose(state)
+    c0 = t & _ROW_MASK
+    c1 = t >> 16 & _ROW_MASK
+    c2 = t >> 32 & _ROW_MASK
+    c3 = t >> 48
+    new_state = _COL_DOWN[c0] | _COL_DOWN[c1] << 4 | _COL_DOWN[c2] << 8 | _COL_DOWN[c3] << 12
+    score = _ROW_SCORE_RIGHT[c0] + _ROW_SCORE_RIGHT[c1] + _ROW_SCORE_RIGHT[c2] + _ROW_SCORE_RIGHT[c3]
+    return new_state, score
+
+
+_MOVES = {
+    'up': move_up,
+    'down': move_down,
+    'left': move_left,
+    'right': move_right,
+}
+
+
+def move(state: int, direction: str) -> Tuple[int, int]:
+    return _MOVES[direction](state)
+
+
+def empty_cells(state: int) -> List[Tuple[int, int]]:
+    return [(k >> 2, k & 3) for k in range(SIZE * SIZE) if not state >> 4 * k & 0xF]
+
+
+def count_empty(state: int) -> int:
+    return count_mask(empty_mask(state))
+
+
+def empty_mask(state: int) -> int:
+    x = state | state >> 1
+    x |= x >> 2
+    return ~x & _NIBBLE_LOW
+
+
+def count_mask(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def select_cell(mask: int, n: int) -> int:
+    for _ in range(n):
+        mask &= mask - 1
+    return (mask & -mask).bit_length() - 1 >> 2
+
+
+def max_exponent(state: int) -> int:
+    if not _ROW_LEFT:
+        build_tables()
+    return max(_ROW_MAX[state & _ROW_MASK], _ROW_MAX[state >> 16 & _ROW_MASK],
+               _ROW_MAX[state >> 32 & _ROW_MASK], _ROW_MAX[state >> 48])
+
+
+def max_tile(state: int) -> int:
+    return _VALUES[max_exponent(state)]
+
+
+def has_valid_moves(state: int) -> bool:
+    if not _ROW_LEFT:
+        build_tables()
+    t = transpose(state)
+    return (_ROW_PLAYABLE[state & _ROW_MASK] or _ROW_PLAYABLE[state >> 16 & _ROW_MASK] or
+            _ROW_PLAYABLE[state >> 32 & _ROW_MASK] or _ROW_PLAYABLE[state >> 48] or
+            _ROW_PLAYABLE[t & _ROW_MASK] or _ROW_PLAYABLE[t >> 16 & _ROW_MASK] or
+            _ROW_PLAYABLE[t >> 32 & _ROW_MASK] or _ROW_PLAYABLE[t >> 48])
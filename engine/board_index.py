@@ -0,0 +1,87 @@
+from typing import List, Tuple
+
+
+class BoardIndex:
+    def __init__(self, size: int):
+        self.size = size
+        self.cells = size * size
+        self.top_bit = 1 << (self.cells.bit_length() - 1)
+        self.tree = [0] * (self.cells + 1)
+        self.empty_count = 0
+        self.pairs = 0
+        self.max_value = 0
+
+    def rebuild(self, board: List[List[int]]):
+        size = self.size
+        tree = [0] * (self.cells + 1)
+        pairs = 0
+        for i, row in enumerate(board):
+            for j, value in enumerate(row):
+                if value == 0:
+                    tree[i * size + j + 1] = 1
+                    continue
+                if j + 1 < size and row[j + 1] == value:
+                    pairs += 1
+                if i + 1 < size and board[i + 1][j] == value:
+                    pairs += 1
+        for k in range(1, self.cells + 1):
+            parent = k + (k & -k)
+            if parent <= self.cells:
+                tree[parent] += tree[k]
+
+        self.tree = tree
+        self.empty_count = sum(row.count(0) for row in board)
+        self.pairs = pairs
+        self.max_value = max(max(row) for row in board)
+
+    def update_empty(self, k: int, delta: int):
+        self.empty_count += delta
+        tree = self.tree
+        k += 1
+        while k <= self.cells:
+            tree[k] += delta
+            k += k & -k
+
+    def count_neighbours(self, board: List[List[int]], i: int, j: int, value: int) -> int:
+        row = board[i]
+        count = 0
+        if j > 0 and row[j - 1] == value:
+            count += 1
+        if j + 1 < self.size and row[j + 1] == value:
+            count += 1
+        if i > 0 and board[i - 1][j] == value:
+            count += 1
+        if i + 1 < self.size and board[i + 1][j] == value:
+            count += 1
+        return count
+
+    def assign(self, board: List[List[int]], i: int, j: int, value: int):
+        old = board[i][j]
+        if old == value:
+            return
+        if old:
+            self.pairs -= self.count_neighbours(board, i, j, old)
+        else:
+            self.update_empty(i * self.size + j, -1)
+        board[i][j] = value
+        if value:
+            self.pairs += self.count_neighbours(board, i, j, value)
+            if value > self.max_value:
+                self.max_value = value
+        else:
+            self.update_empty(i * self.size + j, 1)
+
+    def select_empty(self, n: int) -> Tuple[int, int]:
+        tree = self.tree
+        k = 0
+        bit = self.top_bit
+        while bit:
+            step = k + bit
+            if step <= self.cells and tree[step] <= n:
+                k = step
+                n -= tree[step]
+            bit >>= 1
+        return divmod(k, self.size)
+
+    def has_valid_moves(self) -> bool:
+        return self.empty_count > 0 or self.pairs > 0
@@ -0,0 +1,109 @@
+from collections import deque
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+ROW = 0
+COLUMN = 1
+CELL = 2
+
+ENTRY_OVERHEAD = 152
+CHANGE_OVERHEAD = 144
+BYTES_OVERHEAD = 33
+INT_SIZE = 36
+
+BoardSnapshot = Union[int, bytes, None]
+Change = Tuple[int, int, bytes, bytes]
+
+
+def encode_line(values: Iterable[int]) -> bytes:
+    return bytes(value.bit_length() - 1 if value else 0 for value in values)
+
+
+def decode_line(data: bytes) -> List[int]:
+    return [1 << e if e else 0 for e in data]
+
+
+def encode_cells(board: List[List[int]]) -> bytes:
+    return bytes(value.bit_length() - 1 if value else 0 for row in board for value in row)
+
+
+def decode_cells(data: bytes, size: int) -> List[List[int]]:
+    return [decode_line(data[i * size:(i + 1) * size]) for i in range(size)]
+
+
+class HistoryEntry(NamedTuple):
+    before: BoardSnapshot
+    after: BoardSnapshot
+    changes: Tuple[Change, ...]
+    score_before: int
+    score_after: int
+    rng_before: int
+    rng_after: int
+    won_before: bool
+    won_after: bool
+    game_over_after: bool
+    direction: str
+
+
+def snapshot_size(snapshot: BoardSnapshot) -> int:
+    if snapshot is None:
+        return 0
+    if isinstance(snapshot, int):
+        return INT_SIZE
+    return BYTES_OVERHEAD + len(snapshot)
+
+
+def entry_size(entry: HistoryEntry) -> int:
+    size = ENTRY_OVERHEAD + snapshot_size(entry.before) + snapshot_size(entry.after)
+    for _, _, old, new in entry.changes:
+        size += CHANGE_OVERHEAD + len(old) + len(new)
+    return size
+
+
+class MoveHistory:
+    def __init__(self, memory_limit: int):
+        self.memory_limit = memory_limit
+        self.entries: deque = deque()
+        self.sizes: deque = deque()
+        self.position = 0
+        self.memory = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.position = 0
+        self.memory = 0
+
+    def push(self, entry: HistoryEntry):
+        while len(self.entries) > self.position:
+            self.entries.pop()
+            self.memory -= self.sizes.pop()
+        size = entry_size(entry)
+        self.entries.append(entry)
+        self.sizes.append(size)
+        self.position += 1
+        self.memory += size
+        while self.memory > self.memory_limit and self.entries:
+            self.entries.popleft()
+            self.memory -= self.sizes.popleft()
+            self.position -= 1
+
+    def can_undo(self) -> bool:
+        return self.position > 0
+
+    def can_redo(self) -> bool:
+        return self.position < len(self.entries)
+
+    def undo(self) -> Optional[HistoryEntry]:
+        if not self.position:
+            return None
+        self.position -= 1
+        return self.entries[self.position]
+
+    def redo(self) -> Optional[HistoryEntry]:
+        if self.position >= len(self.entries):
+            return None
+        self.position += 1
+        return self.entries[self.position - 1]
@@ -0,0 +1,80 @@
+from typing import List, Optional, Sequence, TypeVar
+import random
+
+T = TypeVar('T')
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+
+
+_numpy = None
+
+
+def load_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
+
+def new_seed() -> int:
+    return random.getrandbits(63)
+
+
+class GameRandom:
+    def __init__(self, seed: Optional[int] = None, block_size: int = 1):
+        self.seed = (new_seed() if seed is None else seed) & MASK64
+        self.counter = 0
+        self.block_size = block_size
+        self.block: List[int] = []
+        self.block_start = 0
+
+    def next_u64(self) -> int:
+        if self.block_size > 1:
+            offset = self.counter - self.block_start
+            if not 0 <= offset < len(self.block):
+                self.block = self.generate(self.counter, self.block_size)
+                self.block_start = self.counter
+                offset = 0
+            self.counter += 1
+            return self.block[offset]
+        self.counter += 1
+        z = (self.seed + self.counter * GOLDEN_GAMMA) & MASK64
+        z = ((z ^ (z >> 30)) * MIX1) & MASK64
+        z = ((z ^ (z >> 27)) * MIX2) & MASK64
+        return z ^ (z >> 31)
+
+    def generate(self, start: int, count: int) -> List[int]:
+        np = _numpy
+        if not np:
+            saved = self.counter, self.block_size
+            self.counter, self.block_size = start, 1
+            values = [self.next_u64() for _ in range(count)]
+            self.counter, self.block_size = saved
+            return values
+        counters = np.arange(start + 1, start + count + 1, dtype=np.uint64)
+        z = np.uint64(self.seed) + counters * np.uint64(GOLDEN_GAMMA)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(MIX1)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(MIX2)
+        return (z ^ (z >> np.uint64(31))).tolist()
+
+    def random(self) -> float:
+        return (self.next_u64() >> 11) * (1.0 / (1 << 53))
+
+    def randbelow(self, n: int) -> int:
+        return (self.next_u64() * n) >> 64
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[self.randbelow(len(seq))]
+
+    def getstate(self) -> int:
+        return self.counter
+
+    def setstate(self, counter: int):
+        self.counter = counter
@@ -0,0 +1,160 @@
+from typing import Dict, List, Sequence, Tuple
+from engine import bitboard
+from engine.rng import load_numpy
+
+LOST_PENALTY = 200000.0
+EMPTY_WEIGHT = 270.0
+MERGES_WEIGHT = 700.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+
+_HEURISTIC: List[float] = []
+
+
+def row_heuristic(cells: Sequence[int]) -> float:
+    total = 0.0
+    empty = 0
+    merges = 0
+    previous = 0
+    counter = 0
+    for rank in cells:
+        total += rank ** SUM_POWER
+        if rank == 0:
+            empty += 1
+            continue
+        if previous == rank:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = rank
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for k in range(1, len(cells)):
+        if cells[k - 1] > cells[k]:
+            monotonicity_left += cells[k - 1] ** MONOTONICITY_POWER - cells[k] ** MONOTONICITY_POWER
+        else:
+            monotonicity_right += cells[k] ** MONOTONICITY_POWER - cells[k - 1] ** MONOTONICITY_POWER
+
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges -
+            MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right) - SUM_WEIGHT * total)
+
+
+def heuristic_table_python() -> List[float]:
+    return [row_heuristic([row >> 4 * k & 0xF for k in range(bitboard.SIZE)]) for row in range(1 << 16)]
+
+
+def heuristic_table_numpy(np) -> List[float]:
+    cells = np.arange(1 << 16, dtype=np.int64)[:, None] >> 4 * np.arange(bitboard.SIZE, dtype=np.int64) & 0xF
+    sum_powers = np.array([rank ** SUM_POWER for rank in range(16)])
+    monotonicity_powers = np.array([rank ** MONOTONICITY_POWER for rank in range(16)])
+    rows = cells.shape[0]
+    total = np.zeros(rows)
+    merges = np.zeros(rows, dtype=np.int64)
+    previous = np.zeros(rows, dtype=np.int64)
+    counter = np.zeros(rows, dtype=np.int64)
+    for k in range(bitboard.SIZE):
+        rank = cells[:, k]
+        total += sum_powers[rank]
+        nonzero = rank != 0
+        same = nonzero & (previous == rank)
+        ended = nonzero & ~same & (counter > 0)
+        merges += np.where(ended, 1 + counter, 0)
+        counter = np.where(same, counter + 1, np.where(ended, 0, counter))
+        previous = np.where(nonzero, rank, previous)
+    merges += np.where(counter > 0, 1 + counter, 0)
+
+    monotonicity_left = np.zeros(rows)
+    monotonicity_right = np.zeros(rows)
+    for k in range(1, bitboard.SIZE):
+        before = monotonicity_powers[cells[:, k - 1]]
+        after = monotonicity_powers[cells[:, k]]
+        decreasing = cells[:, k - 1] > cells[:, k]
+        monotonicity_left += np.where(decreasing, before - after, 0.0)
+        monotonicity_right += np.where(decreasing, 0.0, after - before)
+
+    empty = (cells == 0).sum(axis=1)
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges -
+            MONOTONICITY_WEIGHT * np.minimum(monotonicity_left, monotonicity_right) - SUM_WEIGHT * total).tolist()
+
+
+def build_tables():
+    bitboard.build_tables()
+    if _HEURISTIC:
+        return
+    np = load_numpy()
+    _HEURISTIC[:] = heuristic_table_numpy(np) if np else heuristic_table_python()
+
+
+class PackedRules:
+    size = bitboard.SIZE
+
+    def __init__(self):
+        build_tables()
+        self.heuristic = _HEURISTIC
+
+    def encode(self, board: List[List[int]]) -> int:
+        return bitboard.encode(board)
+
+    def move(self, state: int, direction: str) -> Tuple[int, int]:
+        return bitboard.move(state, direction)
+
+    def spawns(self, state: int, exponent: int) -> List[int]:
+        return [state | exponent << 4 * k for k in range(bitboard.SIZE * bitboard.SIZE)
+                if not state >> 4 * k & 0xF]
+
+    def evaluate(self, state: int) -> float:
+        heuristic = self.heuristic
+        t = bitboard.transpose(state)
+        return (heuristic[state & 0xFFFF] + heuristic[state >> 16 & 0xFFFF] +
+                heuristic[state >> 32 & 0xFFFF] + heuristic[state >> 48] +
+                heuristic[t & 0xFFFF] + heuristic[t >> 16 & 0xFFFF] +
+                heuristic[t >> 32 & 0xFFFF] + heuristic[t >> 48])
+
+
+class GridRules:
+    def __init__(self, size: int):
+        self.size = size
+        self.heuristic: Dict[Tuple[int, ...], float] = {}
+
+    def encode(self, board: List[List[int]]) -> Tuple[Tuple[int, ...], ...]:
+        return tuple(tuple(value.bit_length() - 1 if value else 0 for value in row) for row in board)
+
+    def move(self, state: Tuple[Tuple[int, ...], ...], direction: str) -> Tuple[Tuple[Tuple[int, ...], ...], int]:
+        lines = state if direction in ['left', 'right'] else tuple(zip(*state))
+        reverse = direction in ['right', 'down']
+        moved = []
+        score = 0
+        for line in lines:
+            cells = list(line[::-1]) if reverse else list(line)
+            new_line, line_score = bitboard.slide_line(cells, None)
+            if reverse:
+                new_line.reverse()
+            moved.append(tuple(new_line))
+            score += line_score
+        if direction in ['up', 'down']:
+            moved = list(zip(*moved))
+        return tuple(moved), score
+
+    def spawns(self, state: Tuple[Tuple[int, ...], ...], exponent: int) -> List[Tuple[Tuple[int, ...], ...]]:
+        result = []
+        for i, row in enumerate(state):
+            for j, cell in enumerate(row):
+                if cell == 0:
+                    new_row = row[:j] + (exponent,) + row[j + 1:]
+                    result.append(state[:i] + (new_row,) + state[i + 1:])
+        return result
+
+    def evaluate(self, state: Tuple[Tuple[int, ...], ...]) -> float:
+        total = 0.0
+        for line in state + tuple(zip(*state)):
+            value = self.heuristic.get(line)
+            if value is None:
+                value = self.heuristic[line] = row_heuristic(line)
+            total += value
+        return total
@@ -0,0 +1,107 @@
+from typing import Dict, Optional, Sequence, Tuple, Type
+
+from engine import bitboard
+from engine.rng import MASK64, GameRandom
+from engine.rules import GridRules, PackedRules
+
+Spawn = Tuple[int, int, int]
+
+FULL_THRESHOLD = 1 << 64
+
+
+class AliasTable:
+    __slots__ = ('values', 'aliases', 'thresholds', 'size')
+
+    def __init__(self, values: Sequence[int], weights: Sequence[float]):
+        size = len(values)
+        total = sum(weights)
+        scaled = [weight * size / total for weight in weights]
+        thresholds = [FULL_THRESHOLD] * size
+        aliases = list(range(size))
+        small = [k for k, p in enumerate(scaled) if p < 1.0]
+        large = [k for k, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            lo = small.pop()
+            hi = large.pop()
+            thresholds[lo] = min(FULL_THRESHOLD, int(scaled[lo] * FULL_THRESHOLD))
+            aliases[lo] = hi
+            scaled[hi] -= 1.0 - scaled[lo]
+            (small if scaled[hi] < 1.0 else large).append(hi)
+
+        self.values = tuple(values)
+        self.aliases = tuple(values[k] for k in aliases)
+        self.thresholds = tuple(thresholds)
+        self.size = size
+
+    def sample_u64(self, u: int) -> int:
+        x = u * self.size
+        column = x >> 64
+        return self.values[column] if x & MASK64 < self.thresholds[column] else self.aliases[column]
+
+    def sample(self, rng: GameRandom) -> int:
+        return self.sample_u64(rng.next_u64())
+
+
+class WeightedSpawn:
+    def __init__(self, config_manager):
+        self.config = config_manager
+
+    def choose(self, board_manager) -> Optional[Spawn]:
+        cell = board_manager.random_empty_cell()
+        if cell is None:
+            return None
+        return cell + (self.config.snapshot.spawn_sampler.sample(board_manager.rng),)
+
+
+class UniformSpawn(WeightedSpawn):
+    def choose(self, board_manager) -> Optional[Spawn]:
+        cell = board_manager.random_empty_cell()
+        if cell is None:
+            return None
+        return cell + (board_manager.rng.choice(self.config.snapshot.spawn_values),)
+
+
+class AdversarialSpawn(WeightedSpawn):
+    def __init__(self, config_manager):
+        super().__init__(config_manager)
+        self.packed: Optional[PackedRules] = None
+        self.grid: Optional[GridRules] = None
+
+    def get_rules(self, board):
+        size = len(board)
+        if size == bitboard.SIZE and bitboard.try_encode(board) is not None:
+            if self.packed is None:
+                self.packed = PackedRules()
+            return self.packed
+        if self.grid is None or self.grid.size != size:
+            self.grid = GridRules(size)
+        return self.grid
+
+    def choose(self, board_manager) -> Optional[Spawn]:
+        board = board_manager.board
+        rules = self.get_rules(board)
+        state = rules.encode(board)
+        cells = [(i, j) for i, row in enumerate(board) for j, cell in enumerate(row) if cell == 0]
+        worst = None
+        worst_score = None
+        for value in self.config.snapshot.spawn_values:
+            for (i, j), spawned in zip(cells, rules.spawns(state, value.bit_length() - 1)):
+                score = rules.evaluate(spawned)
+                if worst_score is None or score < worst_score:
+                    worst, worst_score = (i, j, value), score
+        return worst
+
+
+SPAWN_DISTRIBUTIONS: Dict[str, Type[WeightedSpawn]] = {
+    'weighted': WeightedSpawn,
+    'uniform': UniformSpawn,
+    'adversarial': AdversarialSpawn,
+}
+
+
+def register_spawn_distribution(name: str, distribution: Type[WeightedSpawn]):
+    SPAWN_DISTRIBUTIONS[name] = distribution
+
+
+def make_spawn_distribution(config_manager) -> WeightedSpawn:
+    return SPAWN_DISTRIBUTIONS[config_manager.spawn_distribution](config_manager)
@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from engine.batch import BatchEngine, direction_codes
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+
+
+def random_boards(rng: random.Random, count: int, size: int) -> list:
+    values = [0, 0, 0, 2, 2, 4, 8, 16, 32, 64]
+    return [[[rng.choice(values) for _ in range(size)] for _ in range(size)] for _ in range(count)]
+
+
+@pytest.mark.parametrize('packed', [True, False])
+@pytest.mark.parametrize('size', [4, 5, 9])
+def test_batch_move_matches_board_manager(make_config, size, packed):
+    config = make_config(board_size=size, target_score=1 << 30)
+    engine = BatchEngine(config, seed=1)
+    engine.packed = packed
+    rng = random.Random(size)
+    boards = random_boards(rng, 200, size)
+    directions = [rng.choice(DIRECTIONS) for _ in boards]
+    result, scores, moved = engine.move(np.array(boards, dtype=np.int32), direction_codes(directions))
+
+    board_manager = BoardManager(config, animate=False, seed=1)
+    for k, (board, direction) in enumerate(zip(boards, directions)):
+        board_manager.load_state(board, 0, 0)
+        board_manager.game_over = False
+        assert board_manager.move(direction) == bool(moved[k])
+        assert board_manager.score == scores[k]
+        expected = np.array(board_manager.board)
+        difference = np.flatnonzero(expected != result[k])
+        if moved[k]:
+            assert difference.size == 1
+            assert result[k].flat[difference[0]] == 0
+        else:
+            assert difference.size == 0
+
+
+def test_step_flags_match_board_manager(make_config):
+    config = make_config(target_score=64)
+    engine = BatchEngine(config, seed=2)
+    boards = engine.new_boards(64)
+    rng = np.random.default_rng(2)
+    board_manager = BoardManager(config, animate=False, seed=1)
+    for _ in range(100):
+        step = engine.step(boards, rng.integers(0, len(DIRECTIONS), len(boards)))
+        for board, game_over, won in zip(step.boards, step.game_over, step.won):
+            board_manager.load_state(board.tolist(), 0, 0)
+            assert (board_manager.game_over, board_manager.won) == (bool(game_over), bool(won))
+        boards = step.boards
+        boards[step.game_over | step.won] = 0
+        engine.spawn(boards, step.game_over | step.won)
+
+
+def test_spawn_reaches_every_cell_of_large_boards(make_config):
+    engine = BatchEngine(make_config(board_size=200), seed=3)
+    boards = np.zeros((64, 200, 200), dtype=np.int32)
+    engine.spawn(boards)
+    flat = boards.reshape(64, -1)
+    assert ((flat != 0).sum(axis=1) == 1).all()
+    assert flat.argmax(axis=1).max() >= 1 << 15
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from engine import bitboard
+from engine.bitboard import DIRECTIONS
+from engine.rng import load_numpy
+from render.board_manager import BoardManager
+
+
+def list_engine(board_manager: BoardManager) -> BoardManager:
+    board_manager.board
+    board_manager._state = None
+    return board_manager
+
+
+def pool_state(pool) -> list:
+    return [getattr(pool, name)[:pool.count] for name in ('start_x', 'start_y', 'end_x', 'end_y', 'value',
+                                                          'anim_type', 'duration', 'cell')] + [pool.occupancy]
+
+
+def test_numpy_tables_match_python():
+    np = load_numpy()
+    if not np:
+        pytest.skip('numpy is not installed')
+    assert bitboard.row_tables_numpy(np) == bitboard.row_tables_python()
+
+
+def test_slide_line_limit():
+    assert bitboard.slide_line([15, 15, 0, 0]) == ([15, 0, 0, 0], 1 << 15)
+    assert bitboard.slide_line([15, 15, 0, 0], None) == ([16, 0, 0, 0], 1 << 16)
+    assert bitboard.slide_line([1, 1, 1, 1], None) == ([2, 2, 0, 0], 8)
+
+
+def test_encode_round_trip():
+    board = [[0, 2, 4, 8], [16, 32, 64, 128], [256, 512, 1024, 2048], [4096, 8192, 16384, 0]]
+    state = bitboard.encode(board)
+    assert bitboard.decode(state) == board
+    assert bitboard.max_tile(state) == 16384
+    assert bitboard.try_encode(board + [[0] * 4]) is None
+    assert bitboard.try_encode([[65536, 0, 0, 0]] + board[1:]) is None
+
+
+def test_empty_cell_masks():
+    rng = random.Random(2)
+    for _ in range(500):
+        state = 0
+        for k in range(16):
+            if rng.random() < 0.6:
+                state |= rng.randrange(1, 16) << 4 * k
+        cells = bitboard.empty_cells(state)
+        mask = bitboard.empty_mask(state)
+        assert bitboard.count_mask(mask) == bitboard.count_empty(state) == len(cells)
+        assert [divmod(bitboard.select_cell(mask, n), 4) for n in range(len(cells))] == cells
+    assert bitboard.count_empty(0) == 16
+
+
+@pytest.mark.parametrize('animate', [False, True])
+@pytest.mark.parametrize('target', [64, 1 << 30])
+@pytest.mark.parametrize('seed', range(6))
+def test_packed_and_list_engines_agree(make_config, seed, target, animate):
+    config = make_config(target_score=target)
+    packed = BoardManager(config, animate=animate, seed=seed)
+    grid = list_engine(BoardManager(config, animate=animate, seed=seed))
+    rng = random.Random(seed)
+    while not (packed.game_over or packed.won):
+        direction = rng.choice(DIRECTIONS)
+        assert packed.move(direction) == grid.move(direction)
+        assert pool_state(packed.animations) == pool_state(grid.animations)
+        assert pool_state(packed.new_tile_animations) == pool_state(grid.new_tile_animations)
+        packed.finish_animations()
+        grid.finish_animations()
+        assert grid.packed_state() is None
+        assert (packed.board, packed.score, packed.won, packed.game_over) == \
+               (grid.board, grid.score, grid.won, grid.game_over)
+    assert grid.won if target == 64 else grid.game_over
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+
+
+def snapshot(board_manager: BoardManager) -> tuple:
+    return ([row[:] for row in board_manager.board], board_manager.score, board_manager.rng.getstate(),
+            board_manager.won, board_manager.game_over)
+
+
+def test_history_is_opt_in(make_config):
+    board_manager = BoardManager(make_config(), animate=False, seed=1)
+    assert board_manager.history is None
+    board_manager.move('left')
+    assert not board_manager.undo()
+
+
+@pytest.mark.parametrize('size', [4, 5, 9])
+def test_undo_redo_round_trip(make_config, size):
+    config = make_config(board_size=size, target_score=1 << 30, undo_memory_kb=1024)
+    board_manager = BoardManager(config, animate=False, seed=size, history=True)
+    rng = random.Random(size)
+    states = [snapshot(board_manager)]
+    while len(states) < 80 and not board_manager.game_over:
+        if board_manager.move(rng.choice(DIRECTIONS)):
+            states.append(snapshot(board_manager))
+
+    for expected in reversed(states[:-1]):
+        assert board_manager.undo()
+        assert snapshot(board_manager) == expected
+    assert not board_manager.undo()
+    for expected in states[1:]:
+        assert board_manager.redo()
+        assert snapshot(board_manager) == expected
+    assert not board_manager.redo()
+
+
+def test_history_respects_memory_limit(make_config):
+    board_manager = BoardManager(make_config(undo_memory_kb=2), animate=False, seed=3, history=True)
+    rng = random.Random(3)
+    for _ in range(200):
+        if board_manager.game_over:
+            break
+        board_manager.move(rng.choice(DIRECTIONS))
+    history = board_manager.history
+    assert 0 < history.memory <= 2 * 1024
+    assert len(history) == history.position
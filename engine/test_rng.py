@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from engine import rng
+from engine.bitboard import DIRECTIONS
+from engine.rng import GameRandom
+from render.board_manager import BoardManager
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def block_backend(request, monkeypatch):
+    np = rng.load_numpy() if request.param == 'numpy' else False
+    if request.param == 'numpy' and not np:
+        pytest.skip('numpy is not installed')
+    monkeypatch.setattr(rng, '_numpy', np)
+    return request.param
+
+
+def test_block_draws_match_scalar(block_backend):
+    scalar = GameRandom(12345)
+    block = GameRandom(12345, 64)
+    assert [block.next_u64() for _ in range(1000)] == [scalar.next_u64() for _ in range(1000)]
+
+
+def test_setstate_inside_and_across_blocks(block_backend):
+    block = GameRandom(7, 64)
+    values = [block.next_u64() for _ in range(200)]
+    for counter in (0, 5, 63, 64, 130, 3):
+        block.setstate(counter)
+        assert block.getstate() == counter
+        assert [block.next_u64() for _ in range(20)] == values[counter:counter + 20]
+
+
+@pytest.mark.parametrize('size', [4, 5])
+def test_block_size_does_not_change_games(make_config, block_backend, size):
+    scalar_config = make_config(board_size=size, rng_block_size=1, target_score=1 << 30)
+    block_config = make_config(board_size=size, rng_block_size=64, target_score=1 << 30)
+    scalar = BoardManager(scalar_config, animate=False, seed=99)
+    block = BoardManager(block_config, animate=False, seed=99)
+    moves = random.Random(size)
+    for _ in range(300):
+        if scalar.game_over:
+            break
+        direction = moves.choice(DIRECTIONS)
+        assert scalar.move(direction) == block.move(direction)
+        assert (scalar.board, scalar.score, scalar.rng.getstate()) == (block.board, block.score, block.rng.getstate())
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from engine import bitboard, rules
+from engine.bitboard import DIRECTIONS
+from engine.rng import load_numpy
+from engine.rules import GridRules, PackedRules
+
+
+def random_board(rng: random.Random) -> list:
+    return [[rng.choice([0, 0, 2, 4, 8, 16, 32, 64, 128]) for _ in range(bitboard.SIZE)] for _ in range(bitboard.SIZE)]
+
+
+def test_numpy_heuristic_matches_python():
+    np = load_numpy()
+    if not np:
+        pytest.skip('numpy is not installed')
+    assert rules.heuristic_table_numpy(np) == rules.heuristic_table_python()
+
+
+def test_packed_and_grid_rules_agree():
+    packed = PackedRules()
+    grid = GridRules(bitboard.SIZE)
+    rng = random.Random(4)
+    for _ in range(200):
+        board = random_board(rng)
+        packed_state = packed.encode(board)
+        grid_state = grid.encode(board)
+        assert packed.evaluate(packed_state) == grid.evaluate(grid_state)
+        for direction in DIRECTIONS:
+            packed_moved, packed_score = packed.move(packed_state, direction)
+            grid_moved, grid_score = grid.move(grid_state, direction)
+            assert packed_score == grid_score
+            assert bitboard.decode(packed_moved) == [[1 << e if e else 0 for e in row] for row in grid_moved]
+
+
+def test_grid_rules_merge_past_packed_limit():
+    grid = GridRules(5)
+    state = ((16, 16, 0, 0, 0),) + ((0,) * 5,) * 4
+    moved, score = grid.move(state, 'left')
+    assert moved[0] == (17, 0, 0, 0, 0)
+    assert score == 1 << 17
@@ -0,0 +1,53 @@
+from collections import Counter
+
+import pytest
+
+from engine.rng import GameRandom
+from engine.spawn import SPAWN_DISTRIBUTIONS, AliasTable
+from render.board_manager import BoardManager
+
+STEPS = 1 << 16
+
+
+def sweep(table: AliasTable) -> Counter:
+    return Counter(table.sample_u64(k << 48) for k in range(STEPS))
+
+
+@pytest.mark.parametrize('probabilities', [
+    {2: 0.9, 4: 0.1},
+    {2: 0.5, 4: 0.5},
+    {2: 0.6, 4: 0.3, 8: 0.1},
+    {2: 1, 4: 2, 8: 3, 16: 4, 32: 10},
+    {2: 0.999, 4: 0.001},
+])
+def test_alias_table_matches_weights(probabilities):
+    table = AliasTable(list(probabilities), list(probabilities.values()))
+    counts = sweep(table)
+    total = sum(probabilities.values())
+    assert set(counts) == set(probabilities)
+    for value, weight in probabilities.items():
+        assert counts[value] / STEPS == pytest.approx(weight / total, abs=2 / STEPS)
+
+
+def test_alias_table_edge_cases():
+    assert set(sweep(AliasTable([2], [1.0]))) == {2}
+    assert set(sweep(AliasTable([2, 4, 8], [0.5, 0.0, 0.5]))) == {2, 8}
+
+
+def test_alias_table_sampling_with_game_random():
+    table = AliasTable([2, 4], [0.9, 0.1])
+    rng = GameRandom(5)
+    counts = Counter(table.sample(rng) for _ in range(20000))
+    assert counts[4] / 20000 == pytest.approx(0.1, abs=0.01)
+
+
+@pytest.mark.parametrize('distribution', sorted(SPAWN_DISTRIBUTIONS))
+def test_spawn_distributions_fill_empty_cells(make_config, distribution):
+    config = make_config(spawn_distribution=distribution)
+    board_manager = BoardManager(config, animate=False, seed=4)
+    spawn = SPAWN_DISTRIBUTIONS[distribution](config)
+    board_manager.board = [[2, 4, 8, 16], [32, 64, 128, 256], [512, 1024, 2, 4], [8, 16, 0, 32]]
+    assert spawn.choose(board_manager)[:2] == (3, 2)
+    assert spawn.choose(board_manager)[2] in config.snapshot.spawn_values
+    board_manager.board = [[2, 4, 8, 16], [32, 64, 128, 256], [512, 1024, 2, 4], [8, 16, 64, 32]]
+    assert spawn.choose(board_manager) is None
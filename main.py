@@ -1,17 +1,71 @@
+import time
+STARTED = time.perf_counter()
+
 from config.config_manager import GameConfigManager
 from render.board_manager import BoardManager
-from render.renderer import Renderer
+from render.profiler import FrameProfiler, StartupTimer
+from replay.replay_log import ReplayReader, ReplayRecorder
+from typing import Optional
+import argparse
 
 class Game2048:
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", seed: Optional[int] = None,
+                 record_dir: Optional[str] = None, replay_path: Optional[str] = None,
+                 profiler: Optional[FrameProfiler] = None, startup: Optional[StartupTimer] = None):
         self.config_manager = GameConfigManager()
         self.config_manager.load_config(config_path)
-        self.board_manager = BoardManager(self.config_manager)
-        self.renderer = Renderer(self.config_manager, self.board_manager)
+        if startup is not None:
+            startup.mark('config')
+        self.recorder = None
+        self.replay = None
+        if replay_path:
+            self.replay = ReplayReader(replay_path)
+            self.replay.verify_config(self.config_manager)
+            self.board_manager = self.replay.seek(self.config_manager, 0, BoardManager(self.config_manager))
+        else:
+            self.board_manager = BoardManager(self.config_manager, seed=seed, history=True)
+            if record_dir:
+                self.recorder = ReplayRecorder(record_dir, self.config_manager)
+                self.recorder.attach(self.board_manager)
+        if startup is not None:
+            startup.mark('board')
+        from render.renderer import Renderer
+        if startup is not None:
+            startup.mark('pygame import')
+        self.renderer = Renderer(self.config_manager, self.board_manager, self.replay, profiler, startup)
     
-    def run(self):
-        self.renderer.run()
+    def run(self, max_frames: int = 0):
+        try:
+            self.renderer.run(max_frames)
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.replay is not None:
+                self.replay.close()
 
 if __name__ == "__main__":
-    game = Game2048('config/config.json')
-    game.run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--record', metavar='DIR', default=None)
+    parser.add_argument('--replay', metavar='FILE', default=None)
+    parser.add_argument('--profile', action='store_true', help='collect frame timings and show the overlay (F3)')
+    parser.add_argument('--profile-log', metavar='FILE', default=None, help='stream per-frame samples to .csv or .jsonl')
+    parser.add_argument('--profile-frames', metavar='N', type=int, default=0, help='run cProfile for the first N frames')
+    parser.add_argument('--startup-time', action='store_true', help='print startup phase timings after the first frame')
+    parser.add_argument('--exit-after', metavar='N', type=int, default=0, help='quit after N frames')
+    args = parser.parse_args()
+    startup = None
+    if args.startup_time:
+        startup = StartupTimer(STARTED)
+        startup.mark('imports')
+    profiler = FrameProfiler()
+    if args.profile or args.profile_log:
+        profiler.enable()
+    if args.profile_log:
+        profiler.open_log(args.profile_log)
+    if args.profile_frames:
+        profiler.profile_frames(args.profile_frames, 'profile.prof')
+    game = Game2048('config/config.json', seed=args.seed, record_dir=args.record, replay_path=args.replay,
+                    profiler=profiler, startup=startup)
+    game.renderer.show_profiler = args.profile
+    game.run(args.exit_after)
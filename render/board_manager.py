@@ -1,70 +1,124 @@
-import random
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
-from anim.animation import AnimationType, TileAnimation
+from anim.animation import AnimationPool, AnimationType, TileAnimation
+from engine import bitboard
+from engine.board_index import BoardIndex
+from engine.history import (CELL, COLUMN, ROW, BoardSnapshot, HistoryEntry, MoveHistory, decode_cells,
+                            decode_line, encode_cells, encode_line)
+from engine.rng import GameRandom
+from engine.spawn import SPAWN_DISTRIBUTIONS, WeightedSpawn, make_spawn_distribution
+
+ANIMATION_POOL_CAPACITY = 32
+ANIMATION_FRAME_MS = 1000 / 60
+LINE_ANIMATION_CACHE_SIZE = 1 << 16
 
 class BoardManager:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, animate: bool = True, seed: Optional[int] = None, history: bool = False):
         self.config = config_manager
-        self.board = []
+        self.animate = animate
+        self.rng: Optional[GameRandom] = None
+        self.seed = seed
+        self.recorders: List = []
+        self.spawner = None
+        self.history = None
+        if history and config_manager.undo_memory_kb:
+            self.history = MoveHistory(config_manager.undo_memory_kb * 1024)
+        self.journal: Optional[list] = None
+        self._board: Optional[List[List[int]]] = []
+        self._state: Optional[int] = None
+        self.index: Optional[BoardIndex] = None
+        self.line_animations: Dict[Tuple[str, int, int], Tuple[tuple, ...]] = {}
+        self.line_snapshot = None
         self.score = 0
         self.game_over = False
         self.won = False
-        self.animations: List[TileAnimation] = []
-        self.new_tile_animations: List[TileAnimation] = []
-        self.reset_game()
+        self.animations = self.new_animation_pool()
+        self.new_tile_animations = self.new_animation_pool()
+        self.reset_game(seed)
     
-    def reset_game(self):
+    def reset_game(self, seed: Optional[int] = None):
+        self.rng = GameRandom(seed, self.config.rng_block_size)
+        if type(self.spawner) is not SPAWN_DISTRIBUTIONS[self.config.spawn_distribution]:
+            self.spawner = make_spawn_distribution(self.config)
+        self.seed = self.rng.seed
         self.board = [[0 for _ in range(self.config.board_size)] for _ in range(self.config.board_size)]
         self.score = 0
         self.game_over = False
         self.won = False
-        self.animations = []
-        self.new_tile_animations = []
+        self.animations = self.new_animation_pool()
+        self.new_tile_animations = self.new_animation_pool()
+        if self.history is not None:
+            self.history.clear()
         self.initialize_game()
+        for recorder in self.recorders:
+            recorder.start(self)
+    
+    def new_animation_pool(self) -> AnimationPool:
+        return AnimationPool(self.config.board_size, ANIMATION_POOL_CAPACITY if self.animate else 0)
     
     def initialize_game(self):
         for _ in range(self.config.initial_tiles):
             self.add_new_tile_with_animation()
     
-    def add_new_tile_with_animation(self):
+    def random_empty_cell(self) -> Optional[Tuple[int, int]]:
+        index = self.index
+        if index is not None:
+            if not index.empty_count:
+                return None
+            return index.select_empty(self.rng.randbelow(index.empty_count))
+        state = self._state
+        if state is not None:
+            empty = bitboard.empty_mask(state)
+            count = bitboard.count_mask(empty)
+            if not count:
+                return None
+            k = bitboard.select_cell(empty, self.rng.randbelow(count))
+            return k >> 2, k & 3
         empty_cells = [(i, j) for i in range(self.config.board_size) 
                       for j in range(self.config.board_size) if self.board[i][j] == 0]
-        
-        if empty_cells:
-            i, j = random.choice(empty_cells)
-            value = self.choose_tile_value()
-            self.board[i][j] = value
+        if not empty_cells:
+            return None
+        return self.rng.choice(empty_cells)
+    
+    def add_new_tile_with_animation(self):
+        spawn = self.spawner.choose(self)
+        if spawn is None:
+            return
+        self.place_tile(*spawn)
+
+    def place_tile(self, i: int, j: int, value: int):
+        self.set_cell(i, j, value)
 
-            board_start_x, board_start_y = self.get_board_position()
-            start_x = board_start_x + j * (self.config.tile_size + self.config.padding)
-            start_y = board_start_y + i * (self.config.tile_size + self.config.padding)
-        
-            anim = TileAnimation(
-                (start_x + self.config.tile_size // 2, start_y + self.config.tile_size // 2),
-                (start_x, start_y),
-                value,
-                AnimationType.APPEAR,
-                self.config.animation_duration
-            )
-            self.new_tile_animations.append(anim)
+        if not self.animate:
+            return
+
+        snapshot = self.config.snapshot
+        start_x, start_y = snapshot.tile_positions[i][j]
+    
+        self.new_tile_animations.add(
+            (start_x + snapshot.tile_size // 2, start_y + snapshot.tile_size // 2),
+            (start_x, start_y),
+            value,
+            AnimationType.APPEAR,
+            snapshot.animation_duration,
+            (i, j)
+        )
     
     def choose_tile_value(self) -> int:
-        rand = random.random()
-        cumulative = 0
-        
-        for value_str, prob in self.config.probabilities.items():
-            cumulative += prob
-            if rand <= cumulative:
-                return int(value_str)
-        
-        return 2
+        return self.config.snapshot.spawn_sampler.sample(self.rng)
     
     def move(self, direction: str) -> bool:
         if self.game_over or self.animations:
             return False
         
-        old_board = [row[:] for row in self.board]
+        score_before = self.score
+        history = self.history
+        if history is not None:
+            before = self._state
+            rng_before = self.rng.getstate()
+            won_before = self.won
+            self.journal = [] if before is None else None
+        
         moved = False
         
         if direction == 'up':
@@ -79,35 +133,142 @@ class BoardManager:
             return False
         
         if moved:
-            self.add_new_tile_with_animation()
-            self.check_game_state()
+            if self._state is not None and type(self.spawner) is WeightedSpawn:
+                self.spawn_packed(self.score - score_before)
+            else:
+                self.add_new_tile_with_animation()
+                self.check_game_state()
+            for recorder in self.recorders:
+                recorder.record(self, direction)
+            if history is not None:
+                after = None if before is None else self.board_snapshot()
+                history.push(HistoryEntry(before, after, tuple(self.journal or ()), score_before, self.score,
+                                          rng_before, self.rng.getstate(), won_before, self.won, self.game_over,
+                                          direction))
+                self.journal = None
             return True
         
+        self.journal = None
         return False
     
+    def spawn_packed(self, merged: int):
+        state = self._state
+        empty = bitboard.empty_mask(state)
+        count = bitboard.count_mask(empty)
+        k = bitboard.select_cell(empty, self.rng.randbelow(count))
+        snapshot = self.config.snapshot
+        value = snapshot.spawn_sampler.sample(self.rng)
+        exponent = bitboard.exponent_of(value)
+        if self.animate or exponent is None:
+            self.place_tile(k >> 2, k & 3, value)
+            state = self._state
+            if state is None:
+                self.check_game_state()
+                return
+        else:
+            state |= exponent << 4 * k
+            self._state = state
+        target = snapshot.target_score
+        if (merged >= target or value >= target) and bitboard.max_tile(state) >= target:
+            self.won = True
+        if count == 1 and not bitboard.has_valid_moves(state):
+            self.game_over = True
+    
+    def board_snapshot(self) -> BoardSnapshot:
+        return self._state if self._state is not None else encode_cells(self.board)
+    
+    def restore_snapshot(self, snapshot: BoardSnapshot):
+        if isinstance(snapshot, int):
+            self._state = snapshot
+            self._board = None
+            self.index = None
+        else:
+            self.board = decode_cells(snapshot, self.config.board_size)
+    
+    def apply_changes(self, entry: HistoryEntry, forward: bool):
+        changes = entry.changes if forward else reversed(entry.changes)
+        size = self.config.board_size
+        for kind, k, old, new in changes:
+            values = decode_line(new if forward else old)
+            if kind == ROW:
+                self.write_row(k, values)
+            elif kind == COLUMN:
+                self.write_column(k, values)
+            else:
+                self.set_cell(k // size, k % size, values[0])
+        index = self.index
+        if not forward and index is not None:
+            top = index.max_value.bit_length() - 1
+            if any(top in new for _, _, _, new in entry.changes):
+                index.max_value = max(max(row) for row in self.board)
+    
+    def undo(self) -> bool:
+        if self.history is None:
+            return False
+        entry = self.history.undo()
+        if entry is None:
+            return False
+        if entry.before is not None:
+            self.restore_snapshot(entry.before)
+        else:
+            self.apply_changes(entry, False)
+        self.restore_entry(entry.score_before, entry.rng_before, entry.won_before, False)
+        for recorder in self.recorders:
+            recorder.rewind(self)
+        return True
+    
+    def redo(self) -> bool:
+        if self.history is None:
+            return False
+        entry = self.history.redo()
+        if entry is None:
+            return False
+        if entry.after is not None:
+            self.restore_snapshot(entry.after)
+        else:
+            self.apply_changes(entry, True)
+        self.restore_entry(entry.score_after, entry.rng_after, entry.won_after, entry.game_over_after)
+        for recorder in self.recorders:
+            recorder.record(self, entry.direction)
+        return True
+    
+    def restore_entry(self, score: int, rng_state: int, won: bool, game_over: bool):
+        self.score = score
+        self.rng.setstate(rng_state)
+        self.won = won
+        self.game_over = game_over
+        self.animations.clear()
+        self.new_tile_animations.clear()
+    
     def move_left(self) -> bool:
+        if self._state is not None:
+            return self.move_packed('left')
+        
         moved = False
         for i in range(self.config.board_size):
             original_row = self.board[i][:]
             non_zero = [cell for cell in original_row if cell != 0]
-            new_row, score_add, animations = self.compress_with_animation(non_zero, i, 'left')
+            new_row, score_add, animations = self.compress_line(non_zero, i, 'left')
             self.score += score_add
             new_row.extend([0] * (self.config.board_size - len(new_row)))
             
             if original_row != new_row:
                 moved = True
-                self.board[i] = new_row
+                self.write_row(i, new_row)
                 self.animations.extend(animations)
         
         return moved
     
     def move_right(self) -> bool:
+        if self._state is not None:
+            return self.move_packed('right')
+        
         moved = False
         for i in range(self.config.board_size):
             original_row = self.board[i][:]
             non_zero = [cell for cell in original_row if cell != 0][::-1]
             
-            new_row, score_add, animations = self.compress_with_animation(non_zero, i, 'right')
+            new_row, score_add, animations = self.compress_line(non_zero, i, 'right')
             self.score += score_add
             
             new_row.extend([0] * (self.config.board_size - len(new_row)))
@@ -115,37 +276,42 @@ class BoardManager:
             
             if original_row != new_row:
                 moved = True
-                self.board[i] = new_row
+                self.write_row(i, new_row)
                 self.animations.extend(animations)
         
         return moved
     
     def move_up(self) -> bool:
+        if self._state is not None:
+            return self.move_packed('up')
+        
         moved = False
         for j in range(self.config.board_size):
             original_col = [self.board[i][j] for i in range(self.config.board_size)]
             non_zero = [cell for cell in original_col if cell != 0]
             
-            new_col, score_add, animations = self.compress_with_animation(non_zero, j, 'up')
+            new_col, score_add, animations = self.compress_line(non_zero, j, 'up')
             self.score += score_add
             
             new_col.extend([0] * (self.config.board_size - len(new_col)))
             
             if original_col != new_col:
                 moved = True
-                for i in range(self.config.board_size):
-                    self.board[i][j] = new_col[i]
+                self.write_column(j, new_col)
                 self.animations.extend(animations)
         
         return moved
     
     def move_down(self) -> bool:
+        if self._state is not None:
+            return self.move_packed('down')
+        
         moved = False
         for j in range(self.config.board_size):
             original_col = [self.board[i][j] for i in range(self.config.board_size)]
             non_zero = [cell for cell in original_col if cell != 0][::-1]
             
-            new_col, score_add, animations = self.compress_with_animation(non_zero, j, 'down')
+            new_col, score_add, animations = self.compress_line(non_zero, j, 'down')
             self.score += score_add
             
             new_col.extend([0] * (self.config.board_size - len(new_col)))
@@ -153,12 +319,167 @@ class BoardManager:
             
             if original_col != new_col:
                 moved = True
-                for i in range(self.config.board_size):
-                    self.board[i][j] = new_col[i]
+                self.write_column(j, new_col)
                 self.animations.extend(animations)
         
         return moved
     
+    def write_row(self, i: int, row: List[int]):
+        if self.journal is not None:
+            self.journal.append((ROW, i, encode_line(self.board[i]), encode_line(row)))
+        if self.index is None:
+            self.board[i] = row
+            return
+        for j, value in enumerate(row):
+            self.index.assign(self.board, i, j, value)
+    
+    def write_column(self, j: int, column: List[int]):
+        if self.journal is not None:
+            self.journal.append((COLUMN, j, encode_line(row[j] for row in self.board), encode_line(column)))
+        if self.index is None:
+            for i, value in enumerate(column):
+                self.board[i][j] = value
+            return
+        for i, value in enumerate(column):
+            self.index.assign(self.board, i, j, value)
+    
+    @property
+    def board(self) -> List[List[int]]:
+        if self._board is None:
+            self._board = bitboard.decode(self._state)
+        return self._board
+    
+    @board.setter
+    def board(self, board: List[List[int]]):
+        self._board = board
+        self._state = None
+        self.index = None
+        size = self.config.board_size
+        if size == bitboard.SIZE:
+            self._state = bitboard.try_encode(board)
+        if self._state is None and size >= self.config.large_board_threshold:
+            self.index = BoardIndex(size)
+            self.index.rebuild(board)
+    
+    def load_state(self, board: List[List[int]], score: int, rng_state: int, seed: Optional[int] = None):
+        if seed is not None:
+            self.rng = GameRandom(seed, self.config.rng_block_size)
+            self.seed = seed
+        self.board = [row[:] for row in board]
+        self.score = score
+        self.rng.setstate(rng_state)
+        if self.history is not None:
+            self.history.clear()
+        self.game_over = False
+        self.won = False
+        self.animations.clear()
+        self.new_tile_animations.clear()
+        self.check_game_state()
+    
+    def packed_state(self) -> Optional[int]:
+        return self._state
+    
+    def set_cell(self, i: int, j: int, value: int):
+        exponent = bitboard.exponent_of(value)
+        if self._state is not None and exponent is not None:
+            self._state = bitboard.set_exponent(self._state, i, j, exponent)
+            if self._board is not None:
+                self._board[i][j] = value
+            return
+        
+        if self.journal is not None:
+            self.journal.append((CELL, i * self.config.board_size + j, encode_line((self.board[i][j],)),
+                                 encode_line((value,))))
+        if self.index is not None:
+            self.index.assign(self.board, i, j, value)
+        else:
+            self.board[i][j] = value
+        self._state = None
+    
+    def move_packed(self, direction: str) -> bool:
+        state = self._state
+        new_state, score_add = bitboard.move(state, direction)
+        if new_state == state:
+            return False
+        
+        self.score += score_add
+        if self.animate:
+            self.derive_packed_animations(state, new_state, direction)
+        self._state = new_state
+        self._board = None
+        if score_add >> bitboard.MAX_EXPONENT and bitboard.max_exponent(new_state) == bitboard.MAX_EXPONENT:
+            self.board = self.board
+        return True
+    
+    def derive_packed_animations(self, state: int, new_state: int, direction: str):
+        snapshot = self.config.snapshot
+        if self.line_snapshot is not snapshot:
+            self.line_animations = {}
+            self.line_snapshot = snapshot
+        if direction in ['up', 'down']:
+            state = bitboard.transpose(state)
+            new_state = bitboard.transpose(new_state)
+        cache = self.line_animations
+        add = self.animations.add
+        for k in range(bitboard.SIZE):
+            line = state >> 16 * k & 0xFFFF
+            if line == new_state >> 16 * k & 0xFFFF:
+                continue
+            key = (direction, k, line)
+            animations = cache.get(key)
+            if animations is None:
+                if len(cache) >= LINE_ANIMATION_CACHE_SIZE:
+                    cache.clear()
+                animations = cache[key] = self.line_animation_args(line, k, direction)
+            for args in animations:
+                add(*args)
+    
+    def line_animation_args(self, line: int, index: int, direction: str) -> Tuple[tuple, ...]:
+        non_zero = [1 << (line >> 4 * j & 0xF) for j in range(bitboard.SIZE) if line >> 4 * j & 0xF]
+        if direction in ['right', 'down']:
+            non_zero.reverse()
+        _, _, animations = self.compress_with_animation(non_zero, index, direction)
+        return tuple((anim.start_pos, anim.end_pos, anim.value, anim.anim_type, anim.duration, anim.end_cell)
+                     for anim in animations)
+    
+    def derive_animations(self, old_board: List[List[int]], new_board: List[List[int]], direction: str):
+        size = self.config.board_size
+        for k in range(size):
+            if direction in ['left', 'right']:
+                old_line = old_board[k]
+                new_line = new_board[k]
+            else:
+                old_line = [old_board[i][k] for i in range(size)]
+                new_line = [new_board[i][k] for i in range(size)]
+            
+            if old_line == new_line:
+                continue
+            
+            non_zero = [cell for cell in old_line if cell != 0]
+            if direction in ['right', 'down']:
+                non_zero.reverse()
+            _, _, animations = self.compress_with_animation(non_zero, k, direction)
+            self.animations.extend(animations)
+    
+    def compress_line(self, line: List[int], index: int, direction: str) -> Tuple[List[int], int, List[TileAnimation]]:
+        if self.animate:
+            return self.compress_with_animation(line, index, direction)
+        
+        result = []
+        score_add = 0
+        i = 0
+        while i < len(line):
+            if i + 1 < len(line) and line[i] == line[i + 1]:
+                merged_value = line[i] * 2
+                score_add += merged_value
+                result.append(merged_value)
+                i += 2
+            else:
+                result.append(line[i])
+                i += 1
+        
+        return result, score_add, []
+    
     def compress_with_animation(self, line: List[int], index: int, direction: str) -> Tuple[List[int], int, List[TileAnimation]]:
         if not line:
             return [], 0, []
@@ -175,16 +496,16 @@ class BoardManager:
                 score_add += merged_value
                 
                 if direction in ['left', 'right']:
-                    start_pos1 = self.get_tile_position(index, len(result) if direction == 'left' else self.config.board_size - len(result) - 1)
-                    start_pos2 = self.get_tile_position(index, len(result) + 1 if direction == 'left' else self.config.board_size - len(result) - 2)
-                    end_pos = self.get_tile_position(index, len(result) if direction == 'left' else self.config.board_size - len(result) - 1)
+                    end_cell = (index, len(result) if direction == 'left' else self.config.board_size - len(result) - 1)
+                    start_cell2 = (index, len(result) + 1 if direction == 'left' else self.config.board_size - len(result) - 2)
                 else:
-                    start_pos1 = self.get_tile_position(len(result), index if direction == 'up' else self.config.board_size - index - 1)
-                    start_pos2 = self.get_tile_position(len(result) + 1, index if direction == 'up' else self.config.board_size - index - 1)
-                    end_pos = self.get_tile_position(len(result), index if direction == 'up' else self.config.board_size - index - 1)
+                    end_cell = (len(result), index if direction == 'up' else self.config.board_size - index - 1)
+                    start_cell2 = (len(result) + 1, index if direction == 'up' else self.config.board_size - index - 1)
+                end_pos = self.get_tile_position(*end_cell)
+                start_pos2 = self.get_tile_position(*start_cell2)
                 
-                anim1 = TileAnimation(start_pos1, end_pos, line[i], AnimationType.MERGE, self.config.animation_duration)
-                anim2 = TileAnimation(start_pos2, end_pos, line[i + 1], AnimationType.MERGE, self.config.animation_duration)
+                anim1 = TileAnimation(end_pos, end_pos, line[i], AnimationType.MERGE, self.config.animation_duration, end_cell)
+                anim2 = TileAnimation(start_pos2, end_pos, line[i + 1], AnimationType.MERGE, self.config.animation_duration, end_cell)
                 animations.extend([anim1, anim2])
                 
                 result.append(merged_value)
@@ -192,13 +513,14 @@ class BoardManager:
             else:
                 if direction in ['left', 'right']:
                     start_pos = self.get_tile_position(index, i if direction == 'left' else self.config.board_size - i - 1)
-                    end_pos = self.get_tile_position(index, len(result) if direction == 'left' else self.config.board_size - len(result) - 1)
+                    end_cell = (index, len(result) if direction == 'left' else self.config.board_size - len(result) - 1)
                 else:
                     start_pos = self.get_tile_position(i, index if direction == 'up' else self.config.board_size - index - 1)
-                    end_pos = self.get_tile_position(len(result), index if direction == 'up' else self.config.board_size - index - 1)
+                    end_cell = (len(result), index if direction == 'up' else self.config.board_size - index - 1)
+                end_pos = self.get_tile_position(*end_cell)
                 
                 if start_pos != end_pos:
-                    anim = TileAnimation(start_pos, end_pos, line[i], AnimationType.MOVE, self.config.animation_duration)
+                    anim = TileAnimation(start_pos, end_pos, line[i], AnimationType.MOVE, self.config.animation_duration, end_cell)
                     animations.append(anim)
                 
                 result.append(line[i])
@@ -207,24 +529,36 @@ class BoardManager:
         return result, score_add, animations
     
     def get_board_position(self) -> Tuple[int, int]:
-        board_width = self.config.board_size * (self.config.tile_size + self.config.padding) + self.config.padding
-        board_start_x = (self.config.window_size[0] - board_width) // 2
-        board_start_y = 100
-        return board_start_x, board_start_y
+        return self.config.snapshot.board_origin
     
     def get_tile_position(self, row: int, col: int) -> Tuple[int, int]:
-        board_start_x, board_start_y = self.get_board_position()
-        x = board_start_x + col * (self.config.tile_size + self.config.padding)
-        y = board_start_y + row * (self.config.tile_size + self.config.padding)
-        return (x, y)
+        return self.config.snapshot.tile_positions[row][col]
     
     def check_game_state(self):
+        state = self._state
+        if state is not None:
+            if bitboard.max_tile(state) >= self.config.target_score:
+                self.won = True
+            if not bitboard.has_valid_moves(state):
+                self.game_over = True
+            return
+        
+        index = self.index
+        if index is not None:
+            if index.max_value >= self.config.target_score:
+                self.won = True
+            if not index.has_valid_moves():
+                self.game_over = True
+            return
+        
         if any(any(cell >= self.config.target_score for cell in row) for row in self.board):
             self.won = True
         if not self.has_valid_moves():
             self.game_over = True
     
     def has_valid_moves(self) -> bool:
+        if self.index is not None:
+            return self.index.has_valid_moves()
         if any(any(cell == 0 for cell in row) for row in self.board):
             return True
         for i in range(self.config.board_size):
@@ -236,6 +570,11 @@ class BoardManager:
         
         return False
     
-    def update_animations(self):
-        self.animations = [anim for anim in self.animations if not anim.update()]
-        self.new_tile_animations = [anim for anim in self.new_tile_animations if not anim.update()]
\ No newline at end of file
+    def update_animations(self, elapsed_ms: Optional[float] = None):
+        steps = 1.0 if elapsed_ms is None else elapsed_ms / ANIMATION_FRAME_MS
+        self.animations.update(steps)
+        self.new_tile_animations.update(steps)
+    
+    def finish_animations(self):
+        self.animations.clear()
+        self.new_tile_animations.clear()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, Iterator, NamedTuple, Optional
+
+import pygame
+
+METRIC_GLYPHS = '0123456789'
+
+
+class FontMetrics(NamedTuple):
+    height: int
+    ascent: int
+    descent: int
+    linesize: int
+    digit_width: int
+
+
+def open_font(size: int) -> pygame.font.Font:
+    try:
+        return pygame.font.Font(None, size)
+    except (pygame.error, OSError):
+        return pygame.font.SysFont('Arial', size)
+
+
+class FontCache(Mapping):
+    def __init__(self, sizes: Dict[str, int], metrics_path: Optional[str] = None):
+        self.sizes = dict(sizes)
+        self.fonts: Dict[str, pygame.font.Font] = {}
+        self.metrics_path = os.path.expanduser(metrics_path) if metrics_path else None
+        self.metrics_table: Dict[str, list] = self.read_metrics()
+
+    def __getitem__(self, name: str) -> pygame.font.Font:
+        font = self.fonts.get(name)
+        if font is None:
+            font = self.fonts[name] = open_font(self.sizes[name])
+            self.record_metrics(self.sizes[name], font)
+        return font
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sizes)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def metrics_key(self, size: int) -> str:
+        return f'{size}:{pygame.version.ver}'
+
+    def metrics(self, name: str) -> FontMetrics:
+        key = self.metrics_key(self.sizes[name])
+        if len(self.metrics_table.get(key, ())) != len(FontMetrics._fields):
+            self.record_metrics(self.sizes[name], self[name])
+        return FontMetrics(*self.metrics_table[key])
+
+    def measure(self, font: pygame.font.Font) -> list:
+        return [font.get_height(), font.get_ascent(), font.get_descent(), font.get_linesize(),
+                max(font.size(glyph)[0] for glyph in METRIC_GLYPHS)]
+
+    def record_metrics(self, size: int, font: pygame.font.Font):
+        key = self.metrics_key(size)
+        if len(self.metrics_table.get(key, ())) == len(FontMetrics._fields):
+            return
+        self.metrics_table[key] = self.measure(font)
+        self.write_metrics()
+
+    def read_metrics(self) -> Dict[str, list]:
+        if not self.metrics_path:
+            return {}
+        try:
+            with open(self.metrics_path, 'r') as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return table if isinstance(table, dict) else {}
+
+    def write_metrics(self):
+        if not self.metrics_path:
+            return
+        temp_path = f'{self.metrics_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.metrics_path) or '.', exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump(self.metrics_table, f)
+            os.replace(temp_path, self.metrics_path)
+        except OSError:
+            pass
@@ -0,0 +1,59 @@
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+LATENCY_WINDOW = 240
+
+
+class InputQueue:
+    def __init__(self, capacity: int = 4):
+        self.capacity = capacity
+        self.pending: deque = deque()
+        self.applied: List[int] = []
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.received = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def push(self, direction: str, timestamp: Optional[int] = None):
+        self.received += 1
+        if len(self.pending) >= max(1, self.capacity):
+            self.pending.popleft()
+            self.dropped += 1
+        self.pending.append((direction, time.perf_counter_ns() if timestamp is None else timestamp))
+
+    def peek(self) -> Tuple[str, int]:
+        return self.pending[0]
+
+    def pop(self) -> Tuple[str, int]:
+        return self.pending.popleft()
+
+    def drop_pending(self):
+        self.dropped += len(self.pending)
+        self.pending.clear()
+
+    def mark_applied(self, timestamp: int):
+        self.applied.append(timestamp)
+
+    def mark_displayed(self):
+        if not self.applied:
+            return
+        now = time.perf_counter_ns()
+        for timestamp in self.applied:
+            self.latencies.append((now - timestamp) / 1e6)
+        self.applied.clear()
+
+    def latency(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def mean_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def summary(self) -> str:
+        return (f'input latency {self.mean_latency():.1f} ms  p95 {self.latency(0.95):.1f}  '
+                f'dropped {self.dropped}/{self.received}  queued {len(self.pending)}')
@@ -0,0 +1,217 @@
+import cProfile
+import json
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+PHASES = ('wait', 'events', 'update', 'animations', 'draw', 'present', 'tick')
+WORK_PHASES = ('events', 'update', 'animations', 'draw', 'present')
+HISTOGRAM_EDGES_MS = (1, 2, 4, 8, 16, 33, 66)
+DEFAULT_WINDOW = 600
+
+_PHASE_INDEX = {phase: k for k, phase in enumerate(PHASES)}
+_WORK_INDICES = tuple(_PHASE_INDEX[phase] for phase in WORK_PHASES)
+
+
+def histogram_bucket(ms: float) -> int:
+    for k, edge in enumerate(HISTOGRAM_EDGES_MS):
+        if ms < edge:
+            return k
+    return len(HISTOGRAM_EDGES_MS)
+
+
+class FrameProfiler:
+    def __init__(self, target_fps: int = 60, window: int = DEFAULT_WINDOW):
+        self.enabled = False
+        self.resume_enabled = False
+        self.budget_ms = 1000 / target_fps
+        self.samples: deque = deque(maxlen=window)
+        self.sums = [0.0] * (len(PHASES) + 2)
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        self.frames = 0
+        self.dropped = 0
+        self.current = [0] * len(PHASES)
+        self.move_ns = 0
+        self.moves = 0
+        self.last = 0
+        self.frame_started = 0
+        self.log_file = None
+        self.log_writer = None
+        self.log_format = None
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.cprofile_frames = 0
+        self.cprofile_path: Optional[str] = None
+        self.instrumented: List[tuple] = []
+
+    def set_target_fps(self, target_fps: int):
+        self.budget_ms = 1000 / target_fps
+
+    def enable(self):
+        self.enabled = True
+        self.resume_enabled = True
+
+    def disable(self):
+        self.resume_enabled = False
+        if not self.cprofile_frames:
+            self.enabled = False
+
+    def instrument(self, owner, name: str):
+        method = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return method(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.move_ns += time.perf_counter_ns() - started
+                self.moves += 1
+
+        setattr(owner, name, timed)
+        self.instrumented.append((owner, name))
+
+    def uninstrument(self):
+        for owner, name in self.instrumented:
+            delattr(owner, name)
+        self.instrumented = []
+
+    def open_log(self, path: str):
+        self.close_log()
+        self.log_file = open(path, 'w', newline='')
+        self.log_format = 'jsonl' if path.endswith('.jsonl') else 'csv'
+        if self.log_format == 'csv':
+            import csv
+            self.log_writer = csv.writer(self.log_file)
+            self.log_writer.writerow(('frame', 'time') + PHASES + ('work', 'move', 'moves', 'dropped'))
+
+    def close_log(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+            self.log_writer = None
+
+    def profile_frames(self, frames: int, path: str):
+        if not self.cprofile_frames:
+            self.resume_enabled = self.enabled
+        self.cprofile_frames = frames
+        self.cprofile_path = path
+        self.enabled = True
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        if self.cprofile_frames and self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.current = [0] * len(PHASES)
+        self.move_ns = 0
+        self.moves = 0
+        self.frame_started = self.last = time.perf_counter_ns()
+
+    def lap(self, phase: str):
+        if not self.enabled or not self.frame_started:
+            return
+        now = time.perf_counter_ns()
+        self.current[_PHASE_INDEX[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled or not self.frame_started:
+            return
+        phases = [ns / 1e6 for ns in self.current]
+        work = sum(phases[k] for k in _WORK_INDICES)
+        move = self.move_ns / 1e6
+        sample = phases + [work, move]
+        if len(self.samples) == self.samples.maxlen:
+            evicted = self.samples[0]
+            for k, value in enumerate(evicted):
+                self.sums[k] -= value
+            self.histogram[histogram_bucket(evicted[-2])] -= 1
+        self.samples.append(sample)
+        for k, value in enumerate(sample):
+            self.sums[k] += value
+        self.histogram[histogram_bucket(work)] += 1
+
+        dropped = work > self.budget_ms
+        self.dropped += dropped
+        self.frames += 1
+        if self.log_file is not None:
+            self.write_sample(sample, dropped)
+        self.frame_started = 0
+
+        if self.cprofile is not None:
+            self.cprofile_frames -= 1
+            if self.cprofile_frames <= 0:
+                self.finish_cprofile()
+
+    def write_sample(self, sample: List[float], dropped: bool):
+        timestamp = time.time()
+        if self.log_format == 'csv':
+            self.log_writer.writerow([self.frames, f'{timestamp:.6f}'] + [f'{value:.4f}' for value in sample] +
+                                     [self.moves, int(dropped)])
+            return
+        record = {'frame': self.frames, 'time': timestamp}
+        record.update(zip(PHASES + ('work', 'move'), (round(value, 4) for value in sample)))
+        record.update(moves=self.moves, dropped=dropped)
+        self.log_file.write(json.dumps(record) + '\n')
+
+    def finish_cprofile(self):
+        import pstats
+        self.cprofile.disable()
+        self.cprofile.dump_stats(self.cprofile_path)
+        pstats.Stats(self.cprofile).sort_stats('cumulative').print_stats(20)
+        print(f'cProfile stats written to {self.cprofile_path}')
+        self.cprofile = None
+        self.cprofile_frames = 0
+        self.enabled = self.resume_enabled
+        if not self.enabled:
+            self.uninstrument()
+
+    def mean(self, name: str) -> float:
+        index = len(PHASES) if name == 'work' else len(PHASES) + 1 if name == 'move' else _PHASE_INDEX[name]
+        return self.sums[index] / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(sample[-2] for sample in self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def fps(self) -> float:
+        frame_ms = self.mean('work') + self.mean('wait') + self.mean('tick')
+        return 1000 / frame_ms if frame_ms else 0.0
+
+    def overlay_lines(self) -> List[str]:
+        phases = '  '.join(f'{phase} {self.mean(phase):.2f}' for phase in WORK_PHASES)
+        histogram = ' '.join(str(count) for count in self.histogram)
+        return [
+            f'FPS {self.fps():.1f}  work {self.mean("work"):.2f} ms  p95 {self.percentile(0.95):.2f}  '
+            f'dropped {self.dropped}/{self.frames}',
+            f'{phases}  move {self.mean("move"):.3f}',
+            f'hist <1/2/4/8/16/33/66/+ ms: {histogram}',
+        ]
+
+    def close(self):
+        if self.cprofile is not None:
+            self.finish_cprofile()
+        self.close_log()
+        self.uninstrument()
+
+
+class StartupTimer:
+    def __init__(self, started: Optional[float] = None):
+        self.started = self.last = time.perf_counter() if started is None else started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def total(self) -> float:
+        return (self.last - self.started) * 1000
+
+    def summary(self) -> str:
+        phases = '  '.join(f'{phase} {ms:.1f}' for phase, ms in self.phases)
+        return f'startup {self.total():.1f} ms  {phases}'
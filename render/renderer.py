@@ -1,112 +1,388 @@
 from anim.animation import AnimationType
+from ai.expectimax import ExpectimaxPlayer
+from config.config_snapshot import hex_to_rgb
+from engine import bitboard, rules
+from render.fonts import FontCache
+from render.input_queue import InputQueue
+from render.profiler import FrameProfiler, StartupTimer
+from render.tile_cache import TileCache
 import pygame
-from typing import Tuple
+import sys
+import time
+from typing import List, Optional, Tuple
+
+BACKGROUND_COLOR = '#FAF8EF'
+BOARD_COLOR = '#BBADA0'
+TEXT_COLOR = '#776E65'
+OVERLAY_FONT_SIZE = 20
+OVERLAY_LINES = 4
+PROFILE_FRAMES = 300
+MAX_FRAME_MS = 100
+ARROW_KEYS = {
+    pygame.K_LEFT: 'left',
+    pygame.K_RIGHT: 'right',
+    pygame.K_UP: 'up',
+    pygame.K_DOWN: 'down',
+}
 
 class Renderer:
-    def __init__(self, config_manager, board_manager):
+    def __init__(self, config_manager, board_manager, replay=None, profiler: Optional[FrameProfiler] = None,
+                 startup: Optional[StartupTimer] = None, offscreen: bool = False):
         self.config = config_manager
+        self.offscreen = offscreen
         self.board = board_manager
+        self.replay = replay
+        self.profiler = profiler or FrameProfiler()
+        self.profiler.set_target_fps(config_manager.target_fps)
+        self.startup = startup
+        self.input_queue = InputQueue(config_manager.input_buffer_size)
+        self.last_update = time.perf_counter()
+        self.last_poll = time.perf_counter_ns()
+        self.show_profiler = False
+        self.replay_position = 0
+        self.replay_playing = False
         self.screen = None
         self.clock = None
-        self.fonts = {}
+        self.fonts: Optional[FontCache] = None
+        self.tile_cache = None
+        self.player = ExpectimaxPlayer(config_manager, time_budget=config_manager.ai_time_budget_ms / 1000)
+        self.autoplay = False
+        self.show_hint = False
+        self.hint = None
+        self.full_redraw = True
+        self.tables_pending = config_manager.board_size == bitboard.SIZE
+        self.last_board = None
+        self.last_header = None
+        self.last_overlay = None
+        self.last_animation_rects: List[pygame.Rect] = []
+        if self.profiler.enabled:
+            self.profiler.instrument(self.board, 'move')
         self.init_pygame()
     
     def init_pygame(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode(self.config.window_size)
-        pygame.display.set_caption("2048")
-        self.clock = pygame.time.Clock()
-        try:
-            self.fonts = {
-                'small': pygame.font.Font(None, self.config.font_sizes['small']),
-                'medium': pygame.font.Font(None, self.config.font_sizes['medium']),
-                'large': pygame.font.Font(None, self.config.font_sizes['large'])
-            }
-        except:
-            self.fonts = {
-                'small': pygame.font.SysFont('Arial', self.config.font_sizes['small']),
-                'medium': pygame.font.SysFont('Arial', self.config.font_sizes['medium']),
-                'large': pygame.font.SysFont('Arial', self.config.font_sizes['large'])
-            }
+        pygame.font.init()
+        if not self.offscreen:
+            pygame.display.init()
+            pygame.display.set_caption("2048")
+            self.clock = pygame.time.Clock()
+        self.screen = self.create_screen(self.config.window_size)
+        if self.startup is not None:
+            self.startup.mark('display')
+        self.load_fonts()
+        self.tile_cache = TileCache(self.config, self.fonts, self.config.tile_cache_size)
+        if self.config.prewarm_tile_cache:
+            self.tile_cache.prewarm(self.config.target_score)
+    
+    def create_screen(self, size: Tuple[int, int]) -> pygame.Surface:
+        if self.offscreen:
+            return pygame.Surface(size, 0, 32)
+        return pygame.display.set_mode(size)
+    
+    def load_fonts(self):
+        sizes = dict(self.config.font_sizes, overlay=OVERLAY_FONT_SIZE)
+        self.fonts = FontCache(sizes, self.config.font_metrics_cache)
+    
+    def sync_tile_cache(self):
+        if not self.tile_cache.is_stale():
+            return
+        if dict(self.tile_cache.signature[3]) != self.config.font_sizes:
+            self.load_fonts()
+        self.tile_cache.rebuild(self.fonts)
+        self.full_redraw = True
     
     def hex_to_rgb(self, hex_color: str) -> Tuple[int, int, int]:
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        return hex_to_rgb(hex_color)
     
     def get_color(self, value: int) -> Tuple[int, int, int]:
-        return self.hex_to_rgb(self.config.colors.get(str(value), self.config.colors["0"]))
+        snapshot = self.config.snapshot
+        return snapshot.color_rgb.get(value, snapshot.empty_rgb)
     
     def get_font_color(self, value: int) -> Tuple[int, int, int]:
         color_name = 'light' if value > 4 else 'dark'
-        return self.hex_to_rgb(self.config.font_colors[color_name])
+        return self.config.snapshot.font_rgb[color_name]
     
     def draw_tile(self, value: int, x: int, y: int, scale: float = 1.0):
-        color = self.get_color(value)
-        font_color = self.get_font_color(value)
-        width = int(self.config.tile_size * scale)
-        height = int(self.config.tile_size * scale)
-        offset_x = (self.config.tile_size - width) // 2
-        offset_y = (self.config.tile_size - height) // 2
-        
-        pygame.draw.rect(self.screen, color, 
-                        (x + offset_x, y + offset_y, width, height), 
-                        border_radius=max(5, int(10 * scale)))
-        
-        if value != 0 and scale > 0.5:
-            if value < 100:
-                font = self.fonts['large']
-            elif value < 1000:
-                font = self.fonts['medium']
-            else:
-                font = self.fonts['small']
-            
-            text = font.render(str(value), True, font_color)
-            text_rect = text.get_rect(center=(x + self.config.tile_size // 2, y + self.config.tile_size // 2))
-            self.screen.blit(text, text_rect)
+        sprite = self.tile_cache.get(value, scale)
+        offset = (self.config.tile_size - sprite.get_width()) // 2
+        self.screen.blit(sprite, (x + offset, y + offset))
     
     def draw_animated_tiles(self):
-        for anim in self.board.animations:
-            if anim.anim_type == AnimationType.MERGE:
-                scale = 1.0 + 0.2 * (1 - abs(anim.progress / anim.duration - 0.5) * 2)
-                self.draw_tile(anim.value, anim.current_pos[0], anim.current_pos[1], scale)
+        pool = self.board.animations
+        for k in range(pool.count):
+            if pool.anim_type[k] == AnimationType.MERGE:
+                scale = 1.0 + 0.2 * (1 - abs(pool.progress[k] / pool.duration[k] - 0.5) * 2)
+                self.draw_tile(pool.value[k], pool.current_x[k], pool.current_y[k], scale)
             else:
-                self.draw_tile(anim.value, anim.current_pos[0], anim.current_pos[1])
-        for anim in self.board.new_tile_animations:
-            if anim.anim_type == AnimationType.APPEAR:
-                scale = anim.progress / anim.duration
-                self.draw_tile(anim.value, anim.current_pos[0], anim.current_pos[1], scale)
+                self.draw_tile(pool.value[k], pool.current_x[k], pool.current_y[k])
+        pool = self.board.new_tile_animations
+        for k in range(pool.count):
+            if pool.anim_type[k] == AnimationType.APPEAR:
+                scale = pool.progress[k] / pool.duration[k]
+                self.draw_tile(pool.value[k], pool.current_x[k], pool.current_y[k], scale)
+    
+    def is_cell_animating(self, i: int, j: int) -> bool:
+        return self.board.animations.is_animating(i, j) or self.board.new_tile_animations.is_animating(i, j)
+    
+    def draw_static_tile(self, i: int, j: int):
+        if not self.is_cell_animating(i, j) and self.board.board[i][j] != 0:
+            x, y = self.board.get_tile_position(i, j)
+            self.draw_tile(self.board.board[i][j], x, y)
+    
+    def get_board_rect(self) -> pygame.Rect:
+        return pygame.Rect(self.config.snapshot.board_rect)
+    
+    def get_header_rect(self) -> pygame.Rect:
+        return pygame.Rect(0, 0, self.config.window_size[0], self.get_board_rect().top)
+    
+    def draw_background(self):
+        self.screen.fill(self.hex_to_rgb(BACKGROUND_COLOR))
+        pygame.draw.rect(self.screen, self.hex_to_rgb(BOARD_COLOR), self.get_board_rect(), border_radius=10)
+    
+    def draw_header(self):
+        score_text = self.fonts['medium'].render(f'Score: {self.board.score}', True, self.hex_to_rgb(TEXT_COLOR))
+        self.screen.blit(score_text, (20, 20))
+        self.draw_status()
     
     def draw_board(self):
-        self.screen.fill(self.hex_to_rgb('#FAF8EF'))
+        self.screen.fill(self.hex_to_rgb(BACKGROUND_COLOR))
         
-        score_text = self.fonts['medium'].render(f'Score: {self.board.score}', True, self.hex_to_rgb('#776E65'))
+        score_text = self.fonts['medium'].render(f'Score: {self.board.score}', True, self.hex_to_rgb(TEXT_COLOR))
         self.screen.blit(score_text, (20, 20))
 
-        board_start_x, board_start_y = self.board.get_board_position()
-        board_width = self.config.board_size * (self.config.tile_size + self.config.padding) + self.config.padding
-        
-        pygame.draw.rect(self.screen, self.hex_to_rgb('#BBADA0'), 
-                        (board_start_x - self.config.padding, board_start_y - self.config.padding,
-                         board_width, board_width), border_radius=10)
+        pygame.draw.rect(self.screen, self.hex_to_rgb(BOARD_COLOR), self.get_board_rect(), border_radius=10)
 
         for i in range(self.config.board_size):
             for j in range(self.config.board_size):
-                is_animating = any(
-                    anim.end_pos == self.board.get_tile_position(i, j) and 
-                    anim.anim_type != AnimationType.MOVE
-                    for anim in self.board.animations + self.board.new_tile_animations
-                )
-                
-                if not is_animating and self.board.board[i][j] != 0:
-                    x, y = self.board.get_tile_position(i, j)
-                    self.draw_tile(self.board.board[i][j], x, y)
+                self.draw_static_tile(i, j)
 
         self.draw_animated_tiles()
+        self.draw_status()
         if self.board.won:
             self.draw_message("You Win!", '#00F93A')
         elif self.board.game_over:
             self.draw_message("Game Over!", '#FF0000')
     
+    def get_status_text(self) -> Optional[str]:
+        if self.replay is not None:
+            mode = 'Playing' if self.replay_playing else 'Paused'
+            return f'Replay {self.replay_position}/{len(self.replay)}  {mode}'
+        if not (self.autoplay or self.show_hint):
+            return None
+        stats = self.player.stats
+        mode = 'Auto' if self.autoplay else 'Hint'
+        return f'{mode}: {self.hint or "-"}  {stats.nodes_per_second / 1000:.0f}k n/s  {stats.cache_hit_rate:.0%}'
+    
+    def draw_status(self):
+        status = self.get_status_text()
+        if status is None:
+            return
+        status_text = self.fonts['small'].render(status, True, self.hex_to_rgb(TEXT_COLOR))
+        status_rect = status_text.get_rect(topright=(self.config.window_size[0] - 20, 28))
+        self.screen.blit(status_text, status_rect)
+    
+    def get_animation_rects(self) -> List[pygame.Rect]:
+        tile_size = self.config.tile_size
+        grow = tile_size // 5 + 2
+        rects = []
+        for pool in (self.board.animations, self.board.new_tile_animations):
+            for k in range(pool.count):
+                rect = pygame.Rect(pool.current_x[k], pool.current_y[k], tile_size, tile_size)
+                if pool.anim_type[k] == AnimationType.MERGE:
+                    rect.inflate_ip(grow, grow)
+                rects.append(rect)
+                if pool.anim_type[k] != AnimationType.MOVE:
+                    rects.append(pygame.Rect(pool.end_x[k], pool.end_y[k], tile_size, tile_size))
+        return rects
+    
+    def get_cells_in_rect(self, rect: pygame.Rect) -> List[Tuple[int, int]]:
+        snapshot = self.config.snapshot
+        board_start_x, board_start_y = snapshot.board_origin
+        step = snapshot.tile_step
+        size = snapshot.board_size
+        first_col = max(0, (rect.left - board_start_x) // step)
+        last_col = min(size - 1, (rect.right - 1 - board_start_x) // step)
+        first_row = max(0, (rect.top - board_start_y) // step)
+        last_row = min(size - 1, (rect.bottom - 1 - board_start_y) // step)
+        return [(i, j) for i in range(first_row, last_row + 1) for j in range(first_col, last_col + 1)]
+    
+    def collect_dirty_rects(self) -> Optional[List[pygame.Rect]]:
+        board = self.board.board
+        overlay = (self.board.won, self.board.game_over)
+        header = (self.board.score, self.get_status_text())
+        animation_rects = self.get_animation_rects()
+        
+        full_redraw = self.full_redraw or overlay != self.last_overlay or self.last_board is None
+        if not full_redraw and any(overlay):
+            full_redraw = bool(animation_rects or self.last_animation_rects or
+                               header != self.last_header or board != self.last_board)
+        
+        dirty = []
+        if not full_redraw:
+            if board != self.last_board:
+                size = self.config.board_size
+                tile_size = self.config.tile_size
+                for i in range(size):
+                    if board[i] == self.last_board[i]:
+                        continue
+                    for j in range(size):
+                        if board[i][j] != self.last_board[i][j]:
+                            x, y = self.board.get_tile_position(i, j)
+                            dirty.append(pygame.Rect(x, y, tile_size, tile_size))
+            dirty.extend(animation_rects)
+            dirty.extend(self.last_animation_rects)
+            header_rect = self.get_header_rect()
+            if header != self.last_header or header_rect.collidelist(dirty) != -1:
+                dirty.append(header_rect)
+        
+        if board != self.last_board:
+            self.last_board = [row[:] for row in board]
+        self.last_header = header
+        self.last_overlay = overlay
+        self.last_animation_rects = animation_rects
+        self.full_redraw = False
+        return None if full_redraw else dirty
+    
+    def redraw_regions(self, rects: List[pygame.Rect]):
+        screen_rect = self.screen.get_rect()
+        header_rect = self.get_header_rect()
+        board_rect = self.get_board_rect()
+        background = self.hex_to_rgb(BACKGROUND_COLOR)
+        board_color = self.hex_to_rgb(BOARD_COLOR)
+        cells = set()
+        
+        for rect in rects:
+            rect = rect.clip(screen_rect)
+            self.screen.set_clip(rect)
+            self.screen.fill(background, rect)
+            if rect.colliderect(board_rect):
+                pygame.draw.rect(self.screen, board_color, board_rect, border_radius=10)
+                cells.update(self.get_cells_in_rect(rect))
+        self.screen.set_clip(None)
+        
+        for i, j in cells:
+            self.draw_static_tile(i, j)
+        self.draw_animated_tiles()
+        if header_rect in rects:
+            self.screen.set_clip(header_rect)
+            self.draw_header()
+            self.screen.set_clip(None)
+    
+    def get_profiler_rect(self) -> pygame.Rect:
+        height = OVERLAY_LINES * self.fonts.metrics('overlay').linesize
+        return pygame.Rect(0, self.config.window_size[1] - height, self.config.window_size[0], height)
+    
+    def draw_profiler_overlay(self):
+        rect = self.get_profiler_rect()
+        color = self.hex_to_rgb(TEXT_COLOR)
+        linesize = self.fonts.metrics('overlay').linesize
+        for k, line in enumerate(self.profiler.overlay_lines() + [self.input_queue.summary()]):
+            self.screen.blit(self.fonts['overlay'].render(line, True, color), (10, rect.top + k * linesize))
+    
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        profiler = self.profiler
+        if self.show_profiler:
+            profiler.enable()
+            if not profiler.instrumented:
+                profiler.instrument(self.board, 'move')
+        elif profiler.log_file is None:
+            profiler.disable()
+            if not profiler.enabled:
+                profiler.uninstrument()
+        self.full_redraw = True
+    
+    def render_frame(self):
+        self.sync_tile_cache()
+        rects = self.collect_dirty_rects() if self.config.incremental_rendering else None
+        if rects is not None and self.show_profiler:
+            rects.append(self.get_profiler_rect())
+        
+        if rects is None:
+            self.draw_board()
+        elif rects:
+            self.redraw_regions(rects)
+        if self.show_profiler:
+            self.draw_profiler_overlay()
+        self.profiler.lap('draw')
+        
+        if rects is None and not self.offscreen:
+            pygame.display.flip()
+        elif rects and not self.offscreen:
+            pygame.display.update(rects)
+        if rects is None or rects:
+            self.input_queue.mark_displayed()
+        self.profiler.lap('present')
+    
+    def is_idle(self) -> bool:
+        if (self.board.animations or self.board.new_tile_animations or self.autoplay or self.replay_playing or
+                self.input_queue):
+            return False
+        return not (self.show_hint and self.hint is None and not self.board.game_over and not self.board.won)
+    
+    def update_ai(self):
+        if not (self.autoplay or self.show_hint):
+            return
+        if self.board.animations or self.board.game_over or self.board.won:
+            return
+        if self.hint is None:
+            self.hint = self.player.best_move(self.board.board)
+        if self.autoplay and self.hint is not None:
+            self.board.move(self.hint)
+            self.hint = None
+    
+    def reload_config(self):
+        previous = self.config.snapshot
+        if not self.config.reload_if_changed(allow_rule_changes=self.replay is None):
+            return
+        snapshot = self.config.snapshot
+        if snapshot.window_size != previous.window_size:
+            self.screen = self.create_screen(snapshot.window_size)
+        if snapshot.config_hash != previous.config_hash:
+            self.board.reset_game()
+            self.hint = None
+        elif snapshot.tile_positions != previous.tile_positions:
+            self.board.animations.clear()
+            self.board.new_tile_animations.clear()
+        self.player.time_budget = snapshot.ai_time_budget_ms / 1000
+        self.profiler.set_target_fps(snapshot.target_fps)
+        self.input_queue.capacity = snapshot.input_buffer_size
+        self.full_redraw = True
+    
+    def step_replay(self):
+        if self.replay_position >= len(self.replay):
+            self.replay_playing = False
+            return
+        self.board.move(self.replay.move_at(self.replay_position))
+        self.replay_position += 1
+    
+    def seek_replay(self, position: int):
+        position = max(0, min(position, len(self.replay)))
+        state = self.replay.seek(self.config, position)
+        self.board.load_state(state.board, state.score, state.rng.getstate(), state.seed)
+        self.replay_position = position
+    
+    def update_replay(self):
+        if self.replay_playing and not self.board.animations:
+            self.step_replay()
+    
+    def handle_replay_key(self, key: int):
+        interval = self.replay.header.snapshot_interval
+        if key == pygame.K_SPACE:
+            self.replay_playing = not self.replay_playing
+        elif key == pygame.K_RIGHT:
+            if not self.board.animations:
+                self.step_replay()
+        elif key == pygame.K_LEFT:
+            self.seek_replay(self.replay_position - 1)
+        elif key == pygame.K_PAGEUP:
+            self.seek_replay(self.replay_position - interval)
+        elif key == pygame.K_PAGEDOWN:
+            self.seek_replay(self.replay_position + interval)
+        elif key in (pygame.K_HOME, pygame.K_r):
+            self.seek_replay(0)
+        elif key == pygame.K_END:
+            self.seek_replay(len(self.replay))
+    
     def draw_message(self, text: str, color_hex: str):
         overlay = pygame.Surface(self.config.window_size, pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 128))
@@ -123,31 +399,119 @@ class Renderer:
         restart_rect = restart_text.get_rect(center=(self.config.window_size[0] // 2, self.config.window_size[1] // 2 + 60))
         self.screen.blit(restart_text, restart_rect)
     
-    def run(self):
+    def queue_move(self, direction: str, timestamp: Optional[int] = None):
+        self.input_queue.push(direction, timestamp)
+        self.hint = None
+    
+    def step_history(self, forward: bool):
+        self.input_queue.drop_pending()
+        if self.board.redo() if forward else self.board.undo():
+            self.hint = None
+    
+    def apply_inputs(self):
+        queue = self.input_queue
+        while queue:
+            if self.board.game_over or self.board.won:
+                queue.drop_pending()
+                return
+            if self.board.animations:
+                if not self.config.fast_forward_animations:
+                    if not queue.capacity:
+                        queue.drop_pending()
+                        return
+                    waited_ms = (time.perf_counter_ns() - queue.peek()[1]) / 1e6
+                    if waited_ms < self.config.input_max_wait_ms:
+                        return
+                self.board.finish_animations()
+            direction, timestamp = queue.pop()
+            if self.board.move(direction):
+                queue.mark_applied(timestamp)
+    
+    def update_board_animations(self, animating: bool):
+        now = time.perf_counter()
+        elapsed_ms = min((now - self.last_update) * 1000, MAX_FRAME_MS)
+        self.last_update = now
+        if not animating:
+            elapsed_ms = min(elapsed_ms, 1000 / self.config.target_fps)
+        self.board.update_animations(elapsed_ms)
+    
+    def run_frame(self) -> bool:
         running = True
+        profiler = self.profiler
+        profiler.begin_frame()
+        polled = time.perf_counter_ns()
+        received = self.last_poll
+        events = [] if self.offscreen else pygame.event.get()
+        if not events and not self.offscreen and self.config.incremental_rendering and self.is_idle():
+            events = [pygame.event.wait(250)]
+            received = polled = time.perf_counter_ns()
+        self.last_poll = polled
+        profiler.lap('wait')
+        animating = bool(self.board.animations or self.board.new_tile_animations)
         
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.full_redraw = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
                     running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    elif event.key == pygame.K_r:
-                        self.board.reset_game()
-                    elif not self.board.game_over and not self.board.won and not self.board.animations:
-                        if event.key == pygame.K_LEFT:
-                            self.board.move('left')
-                        elif event.key == pygame.K_RIGHT:
-                            self.board.move('right')
-                        elif event.key == pygame.K_UP:
-                            self.board.move('up')
-                        elif event.key == pygame.K_DOWN:
-                            self.board.move('down')
-            
-            self.board.update_animations()
-            self.draw_board()
-            pygame.display.flip()
-            self.clock.tick(60)
+                elif event.key == pygame.K_F3:
+                    self.toggle_profiler()
+                elif event.key == pygame.K_F4:
+                    profiler.profile_frames(PROFILE_FRAMES, time.strftime('profile-%Y%m%d-%H%M%S.prof'))
+                    if not profiler.instrumented:
+                        profiler.instrument(self.board, 'move')
+                elif self.replay is not None:
+                    self.handle_replay_key(event.key)
+                elif event.key == pygame.K_r:
+                    self.board.reset_game()
+                    self.input_queue.drop_pending()
+                    self.hint = None
+                elif event.key in (pygame.K_u, pygame.K_y):
+                    self.step_history(event.key == pygame.K_y)
+                elif event.key == pygame.K_a:
+                    self.autoplay = not self.autoplay
+                elif event.key == pygame.K_h:
+                    self.show_hint = not self.show_hint
+                elif event.key in ARROW_KEYS:
+                    self.queue_move(ARROW_KEYS[event.key], received)
+        
+        self.apply_inputs()
+        profiler.lap('events')
+        
+        self.reload_config()
+        if self.replay is not None:
+            self.update_replay()
+        else:
+            self.update_ai()
+        profiler.lap('update')
+        self.update_board_animations(animating)
+        profiler.lap('animations')
+        self.render_frame()
+        if self.startup is not None:
+            self.startup.mark('first frame')
+        if self.tables_pending:
+            self.tables_pending = False
+            rules.build_tables()
+            if self.startup is not None:
+                self.startup.mark('tables')
+        if self.startup is not None:
+            print(self.startup.summary(), file=sys.stderr)
+            self.startup = None
+        if self.clock is not None:
+            self.clock.tick(self.config.target_fps)
+        profiler.lap('tick')
+        profiler.end_frame()
+        return running
+    
+    def run(self, max_frames: int = 0):
+        frames = 0
+        while self.run_frame():
+            frames += 1
+            if max_frames and frames >= max_frames:
+                break
         
+        self.profiler.close()
         pygame.quit()
@@ -0,0 +1,102 @@
+import os
+import time
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from render.board_manager import BoardManager
+from render.input_queue import InputQueue
+from render.renderer import Renderer
+
+
+def test_queue_keeps_order_and_drops_oldest():
+    queue = InputQueue(3)
+    for k, direction in enumerate(['left', 'up', 'right', 'down']):
+        queue.push(direction, k)
+    assert [queue.pop() for _ in range(len(queue))] == [('up', 1), ('right', 2), ('down', 3)]
+    assert (queue.received, queue.dropped) == (4, 1)
+
+
+def test_zero_capacity_keeps_latest_press():
+    queue = InputQueue(0)
+    queue.push('left', 1)
+    queue.push('up', 2)
+    assert list(queue.pending) == [('up', 2)]
+    queue.drop_pending()
+    assert not queue and queue.dropped == 2
+
+
+def test_latency_is_measured_at_display():
+    queue = InputQueue()
+    now = time.perf_counter_ns()
+    queue.mark_applied(now - 30_000_000)
+    queue.mark_applied(now - 10_000_000)
+    queue.mark_displayed()
+    queue.mark_displayed()
+    assert len(queue.latencies) == 2
+    assert 30 <= queue.latency(1.0) < 1000
+    assert 20 <= queue.mean_latency() < 1000
+    assert 'dropped 0/0' in queue.summary()
+
+
+def make_renderer(make_config, **overrides) -> Renderer:
+    config = make_config(target_score=1 << 30, **overrides)
+    return Renderer(config, BoardManager(config, seed=21), offscreen=True)
+
+
+def expected_board(config, directions) -> list:
+    board_manager = BoardManager(config, seed=21)
+    for direction in directions:
+        board_manager.finish_animations()
+        board_manager.move(direction)
+    return board_manager.board
+
+
+def test_fast_forward_applies_every_press_in_order(make_config):
+    renderer = make_renderer(make_config, fast_forward_animations=True, input_buffer_size=4)
+    directions = ['left', 'up', 'right', 'down']
+    for direction in directions:
+        renderer.queue_move(direction)
+    renderer.apply_inputs()
+    assert not renderer.input_queue
+    assert renderer.board.board == expected_board(renderer.config, directions)
+
+
+def test_drop_mode_discards_presses_during_animation(make_config):
+    renderer = make_renderer(make_config, fast_forward_animations=False, input_buffer_size=0)
+    board = renderer.board
+    assert board.move('left') or board.move('up')
+    assert board.animations
+    before = [row[:] for row in board.board]
+    renderer.queue_move('right')
+    renderer.apply_inputs()
+    assert board.board == before and not renderer.input_queue
+
+
+def test_queue_mode_waits_for_animation_up_to_the_cap(make_config):
+    renderer = make_renderer(make_config, fast_forward_animations=False, input_buffer_size=4, input_max_wait_ms=50)
+    board = renderer.board
+    board.load_state([[2, 2, 0, 0], [2, 2, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]], 0, 0)
+    assert board.move('left') and board.animations
+    before = [row[:] for row in board.board]
+    renderer.queue_move('down')
+    renderer.queue_move('up')
+    renderer.apply_inputs()
+    assert board.board == before and len(renderer.input_queue) == 2
+
+    stale = time.perf_counter_ns() - 60_000_000
+    renderer.input_queue.pending[0] = ('down', stale)
+    renderer.apply_inputs()
+    assert board.board != before and board.animations
+    assert [direction for direction, _ in renderer.input_queue.pending] == ['up']
+
+    renderer.input_queue.pending[0] = ('up', stale)
+    renderer.apply_inputs()
+    assert not renderer.input_queue
+
+
+def test_game_over_drops_pending(make_config):
+    renderer = make_renderer(make_config)
+    renderer.board.game_over = True
+    renderer.queue_move('left')
+    renderer.apply_inputs()
+    assert not renderer.input_queue and renderer.input_queue.dropped == 1
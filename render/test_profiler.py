@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from render.profiler import PHASES, FrameProfiler
+
+
+class Board:
+    def __init__(self):
+        self.moves = 0
+
+    def move(self, direction: str) -> bool:
+        time.sleep(0.0005)
+        self.moves += 1
+        return True
+
+
+def run_frames(profiler: FrameProfiler, board: Board, frames: int):
+    for _ in range(frames):
+        profiler.begin_frame()
+        for phase in PHASES[:3]:
+            board.move('left')
+            profiler.lap(phase)
+        profiler.end_frame()
+
+
+@pytest.fixture
+def window(tmp_path, capsys):
+    def start(profiler: FrameProfiler, board: Board, frames: int = 3):
+        profiler.profile_frames(frames, str(tmp_path / 'window.prof'))
+        if not profiler.instrumented:
+            profiler.instrument(board, 'move')
+    yield start
+    capsys.readouterr()
+
+
+def test_cprofile_window_restores_disabled_profiler(window, tmp_path):
+    profiler = FrameProfiler()
+    board = Board()
+    window(profiler, board)
+    run_frames(profiler, board, 3)
+    assert (tmp_path / 'window.prof').exists()
+    assert not profiler.enabled
+    assert not profiler.instrumented and 'move' not in vars(board)
+    assert profiler.frames == 3
+    assert profiler.mean('move') > 0.5 * 3 * 0.5
+
+    run_frames(profiler, board, 2)
+    assert profiler.frames == 3
+
+
+def test_cprofile_window_keeps_enabled_profiler(window):
+    profiler = FrameProfiler()
+    board = Board()
+    profiler.enable()
+    profiler.instrument(board, 'move')
+    window(profiler, board, 2)
+    run_frames(profiler, board, 2)
+    assert profiler.enabled and profiler.instrumented
+    run_frames(profiler, board, 2)
+    assert profiler.frames == 4
+
+
+def test_disable_during_window_takes_effect_after_it(window):
+    profiler = FrameProfiler()
+    board = Board()
+    profiler.enable()
+    window(profiler, board, 2)
+    profiler.disable()
+    assert profiler.enabled
+    run_frames(profiler, board, 2)
+    assert not profiler.enabled
+
+
+def test_rolling_window_sums_match_samples():
+    profiler = FrameProfiler(window=5)
+    board = Board()
+    profiler.enable()
+    run_frames(profiler, board, 12)
+    assert len(profiler.samples) == 5
+    for k in range(len(PHASES) + 2):
+        assert profiler.sums[k] == pytest.approx(sum(sample[k] for sample in profiler.samples))
+    assert sum(profiler.histogram) == 5
@@ -0,0 +1,62 @@
+import os
+import random
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import pytest
+
+from engine import bitboard, rules
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+from render.renderer import Renderer
+
+FRAME_MS = 1000 / 60
+
+
+def pixels(surface: pygame.Surface) -> bytes:
+    return pygame.image.tobytes(surface, 'RGB')
+
+
+@pytest.mark.parametrize('size', [4, 6])
+def test_dirty_rects_match_full_redraw(make_config, size):
+    overrides = {'board_size': size, 'target_score': 128, 'incremental_rendering': True}
+    if size > 4:
+        overrides['tile_size'] = 480 // size - 15
+    config = make_config(**overrides)
+    board_manager = BoardManager(config, seed=7)
+    renderer = Renderer(config, board_manager, offscreen=True)
+    rng = random.Random(size)
+    partial = 0
+    for step in range(500):
+        if rng.random() < 0.3:
+            board_manager.move(rng.choice(DIRECTIONS))
+        if (board_manager.won or board_manager.game_over) and rng.random() < 0.05:
+            board_manager.reset_game()
+        if step == 250:
+            renderer.show_hint = True
+        board_manager.update_animations(FRAME_MS)
+        rects = renderer.collect_dirty_rects()
+        if rects is None:
+            renderer.draw_board()
+        elif rects:
+            renderer.redraw_regions(rects)
+            partial += 1
+        incremental = pixels(renderer.screen)
+        renderer.draw_board()
+        assert pixels(renderer.screen) == incremental, f'frame {step}'
+    assert partial > 0
+
+
+@pytest.mark.parametrize('size', [4, 5])
+def test_tables_are_built_after_the_first_frame(make_config, monkeypatch, size):
+    built = []
+    monkeypatch.setattr(rules, 'build_tables', lambda: built.append(len(presented)))
+    presented = []
+    config = make_config(board_size=size)
+    renderer = Renderer(config, BoardManager(config, seed=7), offscreen=True)
+    monkeypatch.setattr(renderer, 'render_frame', lambda: presented.append(True))
+    assert not built
+    for _ in range(3):
+        renderer.run_frame()
+    assert built == ([1] if size == bitboard.SIZE else [])
@@ -0,0 +1,55 @@
+import os
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import pytest
+
+from render.fonts import FontCache
+from render.tile_cache import TileCache
+
+
+@pytest.fixture
+def make_cache(make_config):
+    pygame.font.init()
+
+    def make(capacity: int = 256, **overrides) -> TileCache:
+        config = make_config(**overrides)
+        return TileCache(config, FontCache(config.font_sizes), capacity)
+    return make
+
+
+def test_lru_eviction(make_cache):
+    cache = make_cache(capacity=3)
+    two = cache.get(2)
+    cache.get(4)
+    cache.get(8)
+    assert cache.get(2) is two
+    cache.get(16)
+    assert list(cache.sprites) == [(8, 30), (2, 30), (16, 30)]
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_scale_buckets(make_cache):
+    cache = make_cache()
+    tile_size = cache.snapshot.tile_size
+    sprite = cache.get(8, 0.51)
+    assert cache.get(8, 0.5101) is sprite
+    assert cache.get(8, 0.6) is not sprite
+    assert cache.quantize(-0.2) == 0
+    assert sprite.get_size() == (int(tile_size * 15 / 30),) * 2
+    assert cache.get(8).get_size() == (tile_size, tile_size)
+    assert len(cache.sprites) == 3
+
+
+def test_staleness_follows_drawn_settings(make_cache):
+    cache = make_cache()
+    config = cache.config
+    cache.get(2)
+    config.update(animation_duration=config.animation_duration + 1)
+    assert not cache.is_stale()
+    config.update(colors=dict(config.colors, **{'2': '#000000'}))
+    assert cache.is_stale()
+    cache.rebuild()
+    assert not cache.sprites and not cache.is_stale()
+    assert cache.get(2).get_at((cache.snapshot.tile_size // 2, 2))[:3] == (0, 0, 0)
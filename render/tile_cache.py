@@ -0,0 +1,91 @@
+import pygame
+from collections import OrderedDict
+from typing import Mapping, Optional
+
+
+class TileCache:
+    def __init__(self, config_manager, fonts: Mapping[str, pygame.font.Font],
+                 capacity: int = 256, scale_steps: int = 30):
+        self.config = config_manager
+        self.fonts = fonts
+        self.capacity = capacity
+        self.scale_steps = scale_steps
+        self.sprites: OrderedDict = OrderedDict()
+        self.snapshot = config_manager.snapshot
+        self.signature = self.get_signature()
+        self.hits = 0
+        self.misses = 0
+
+    def get_signature(self) -> tuple:
+        snapshot = self.config.snapshot
+        return (snapshot.tile_size,
+                tuple(snapshot.colors.items()),
+                tuple(snapshot.font_colors.items()),
+                tuple(snapshot.font_sizes.items()))
+
+    def is_stale(self) -> bool:
+        snapshot = self.config.snapshot
+        if snapshot is self.snapshot:
+            return False
+        if self.get_signature() != self.signature:
+            return True
+        self.snapshot = snapshot
+        return False
+
+    def rebuild(self, fonts: Optional[Mapping[str, pygame.font.Font]] = None):
+        if fonts is not None:
+            self.fonts = fonts
+        self.sprites.clear()
+        self.snapshot = self.config.snapshot
+        self.signature = self.get_signature()
+
+    def quantize(self, scale: float) -> int:
+        return max(0, round(scale * self.scale_steps))
+
+    def get(self, value: int, scale: float = 1.0) -> pygame.Surface:
+        key = (value, self.quantize(scale))
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = self.build(value, key[1] / self.scale_steps)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def get_font(self, value: int) -> pygame.font.Font:
+        if value < 100:
+            return self.fonts['large']
+        if value < 1000:
+            return self.fonts['medium']
+        return self.fonts['small']
+
+    def build(self, value: int, scale: float) -> pygame.Surface:
+        snapshot = self.snapshot
+        tile_size = snapshot.tile_size
+        color = snapshot.color_rgb.get(value, snapshot.empty_rgb)
+        size = max(1, int(tile_size * scale))
+        offset = (tile_size - size) // 2
+
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.rect(sprite, color, (0, 0, size, size), border_radius=max(5, int(10 * scale)))
+
+        if value != 0 and scale > 0.5:
+            font_color = snapshot.font_rgb['light' if value > 4 else 'dark']
+            text = self.get_font(value).render(str(value), True, font_color, color)
+            center = tile_size // 2 - offset
+            sprite.blit(text, text.get_rect(center=(center, center)))
+
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite
+
+    def prewarm(self, max_value: int):
+        value = 2
+        while value <= max_value:
+            self.get(value)
+            value *= 2
@@ -0,0 +1,272 @@
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from config.config_manager import GameConfigManager
+from render.board_manager import BoardManager
+from render.renderer import Renderer
+from replay.replay_log import ReplayReader
+
+FORMATS = ('png', 'raw', 'thumbnail')
+DEFAULT_FPS = 60
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_THREADS = 2
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_RGBA = 6
+BYTES_PER_PIXEL = 4
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)))
+
+
+def write_png(path: str, pixels: memoryview, width: int, height: int, level: int = 1):
+    stride = width * BYTES_PER_PIXEL
+    compressor = zlib.compressobj(level)
+    parts = []
+    for y in range(height):
+        parts.append(compressor.compress(b'\x00'))
+        parts.append(compressor.compress(pixels[y * stride:(y + 1) * stride]))
+    parts.append(compressor.flush())
+    with open(path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        f.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, PNG_RGBA, 0, 0, 0)))
+        f.write(png_chunk(b'IDAT', b''.join(parts)))
+        f.write(png_chunk(b'IEND', b''))
+
+
+class FrameBuffer:
+    __slots__ = ('pixels', 'surface')
+
+    def __init__(self, size: Tuple[int, int]):
+        self.pixels = bytearray(size[0] * size[1] * BYTES_PER_PIXEL)
+        self.surface = pygame.image.frombuffer(self.pixels, size, 'RGBA')
+
+    def capture(self, source: pygame.Surface):
+        self.surface.blit(source, (0, 0))
+
+
+class FrameBufferPool:
+    def __init__(self, count: int, size: Tuple[int, int]):
+        self.free: queue.Queue = queue.Queue()
+        for _ in range(count):
+            self.free.put(FrameBuffer(size))
+
+    def acquire(self) -> FrameBuffer:
+        return self.free.get()
+
+    def release(self, buffer: FrameBuffer):
+        self.free.put(buffer)
+
+
+class FrameWriter(ABC):
+    def __init__(self, size: Tuple[int, int], threads: int, queue_size: int):
+        self.width, self.height = size
+        self.frames: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.pool = FrameBufferPool(queue_size + threads + 1, size)
+        self.count = 0
+        self.error: Optional[BaseException] = None
+        self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, surface: pygame.Surface):
+        if self.error is not None:
+            raise self.error
+        buffer = self.pool.acquire()
+        buffer.capture(surface)
+        self.frames.put((self.count, buffer))
+        self.count += 1
+
+    def work(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            index, buffer = item
+            try:
+                if self.error is None:
+                    self.write(index, memoryview(buffer.pixels))
+            except Exception as e:
+                self.error = e
+            finally:
+                self.pool.release(buffer)
+
+    @abstractmethod
+    def write(self, index: int, pixels: memoryview):
+        pass
+
+    def close(self):
+        for _ in self.threads:
+            self.frames.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+class PngSequenceWriter(FrameWriter):
+    def __init__(self, directory: str, size: Tuple[int, int], threads: int, queue_size: int, level: int = 1):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.level = level
+        super().__init__(size, threads, queue_size)
+
+    def write(self, index: int, pixels: memoryview):
+        write_png(os.path.join(self.directory, f'frame{index:06d}.png'), pixels, self.width, self.height, self.level)
+
+
+class RawVideoWriter(FrameWriter):
+    def __init__(self, path: str, size: Tuple[int, int], queue_size: int):
+        self.file = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        super().__init__(size, 1, queue_size)
+
+    def write(self, index: int, pixels: memoryview):
+        self.file.write(pixels)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self.file is sys.stdout.buffer:
+                self.file.flush()
+            else:
+                self.file.close()
+
+
+def load_config(config_path: str, replay: ReplayReader) -> GameConfigManager:
+    config = GameConfigManager()
+    config.load_config(config_path)
+    config.update(hot_reload=False, prewarm_tile_cache=True)
+    replay.verify_config(config)
+    return config
+
+
+def export_thumbnail(replay: ReplayReader, config: GameConfigManager, output: str, level: int) -> int:
+    board = replay.seek(config, len(replay))
+    renderer = Renderer(config, board, offscreen=True)
+    renderer.render_frame()
+    buffer = FrameBuffer(config.window_size)
+    buffer.capture(renderer.screen)
+    write_png(output, memoryview(buffer.pixels), *config.window_size, level)
+    return 1
+
+
+def export_frames(replay: ReplayReader, config: GameConfigManager, writer: FrameWriter, fps: int,
+                  hold_frames: int, max_moves: int = 0) -> int:
+    board = replay.seek(config, 0, BoardManager(config, animate=True, seed=replay.seed))
+    renderer = Renderer(config, board, offscreen=True)
+    frame_ms = 1000 / fps
+    renderer.render_frame()
+    writer.submit(renderer.screen)
+    for n, direction in enumerate(replay.iter_moves(), 1):
+        board.move(direction)
+        while board.animations or board.new_tile_animations:
+            board.update_animations(frame_ms)
+            renderer.render_frame()
+            writer.submit(renderer.screen)
+        for _ in range(hold_frames):
+            writer.submit(renderer.screen)
+        if max_moves and n >= max_moves:
+            break
+    return writer.count
+
+
+def output_path(output: str, replay_path: str, fmt: str, batch: bool) -> str:
+    if not batch:
+        return output
+    stem = os.path.splitext(os.path.basename(replay_path))[0]
+    return os.path.join(output, stem + {'png': '', 'raw': '.rgba', 'thumbnail': '.png'}[fmt])
+
+
+def export_replay(replay_path: str, output: str, options: Dict[str, object]) -> Dict[str, object]:
+    started = time.perf_counter()
+    fmt = options['format']
+    with ReplayReader(replay_path) as replay:
+        config = load_config(options['config'], replay)
+        size = config.window_size
+        if fmt == 'thumbnail':
+            frames = export_thumbnail(replay, config, output, options['level'])
+        else:
+            if fmt == 'png':
+                writer = PngSequenceWriter(output, size, options['threads'], options['queue_size'], options['level'])
+            else:
+                writer = RawVideoWriter(output, size, options['queue_size'])
+            try:
+                frames = export_frames(replay, config, writer, options['fps'], options['hold_frames'],
+                                       options['max_moves'])
+            finally:
+                writer.close()
+    elapsed = time.perf_counter() - started
+    return {
+        'replay': replay_path,
+        'output': output,
+        'frames': frames,
+        'size': size,
+        'elapsed': elapsed,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'realtime': frames / options['fps'] / elapsed if elapsed else 0.0,
+    }
+
+
+def export_job(job: Tuple[str, str, Dict[str, object]]) -> Dict[str, object]:
+    return export_replay(*job)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Render replays offscreen, run as: python -m replay.export')
+    parser.add_argument('replays', nargs='+', help='replay files to export')
+    parser.add_argument('--output', required=True,
+                        help='frame directory, .rgba file, - for stdout or .png thumbnail; a directory for batches')
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--config', default='config/config.json')
+    parser.add_argument('--fps', type=int, default=DEFAULT_FPS, help='animation timeline frame rate')
+    parser.add_argument('--hold-frames', type=int, default=0, help='extra still frames after each move')
+    parser.add_argument('--max-moves', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help='PNG encoder threads per export')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='frames buffered ahead of the encoders')
+    parser.add_argument('--level', type=int, default=1, help='PNG zlib compression level')
+    parser.add_argument('--jobs', type=int, default=cpu_count(), help='replays exported in parallel')
+    args = parser.parse_args(argv)
+
+    batch = len(args.replays) > 1
+    if batch:
+        os.makedirs(args.output, exist_ok=True)
+    options = {key: getattr(args, key) for key in ('format', 'config', 'fps', 'hold_frames', 'max_moves',
+                                                   'threads', 'queue_size', 'level')}
+    jobs = [(path, output_path(args.output, path, args.format, batch), options) for path in args.replays]
+    report = sys.stderr if args.output == '-' else sys.stdout
+
+    started = time.perf_counter()
+    total = 0
+    if batch and args.jobs > 1:
+        with Pool(min(args.jobs, len(jobs))) as pool:
+            results = list(pool.imap_unordered(export_job, jobs))
+    else:
+        results = [export_job(job) for job in jobs]
+    for result in results:
+        total += result['frames']
+        width, height = result['size']
+        print(f"{result['replay']} -> {result['output']}  {result['frames']} frames {width}x{height}  "
+              f"{result['fps']:.0f} frames/s  {result['realtime']:.1f}x realtime", file=report)
+    elapsed = time.perf_counter() - started
+    print(f'{len(results)} replays  {total} frames  {elapsed:.2f} s  {total / elapsed:.0f} frames/s', file=report)
+    if args.format == 'raw':
+        print(f'encode with: ffmpeg -f rawvideo -pix_fmt rgba -s {width}x{height} -r {args.fps} -i <file> out.mp4',
+              file=report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import itertools
+import os
+import struct
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+from engine.bitboard import DIRECTIONS
+from engine.history import decode_cells, encode_cells
+from render.board_manager import BoardManager
+
+MAGIC = b'R2048'
+VERSION = 2
+EXTENSION = '.r2048'
+DEFAULT_SNAPSHOT_INTERVAL = 64
+
+HEADER = struct.Struct('<5sBBHQ16s')
+SNAPSHOT = struct.Struct('<IQQ')
+TRAILER = struct.Struct('<4sI')
+TRAILER_MAGIC = b'ENDM'
+
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+
+class ReplayHeader(NamedTuple):
+    board_size: int
+    snapshot_interval: int
+    seed: int
+    config_hash: bytes
+
+
+class Snapshot(NamedTuple):
+    move_index: int
+    score: int
+    rng_state: int
+    board: List[List[int]]
+
+
+class ReplayWriter:
+    def __init__(self, path: str, config_manager, seed: int,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL, exclusive: bool = False):
+        if snapshot_interval <= 0 or snapshot_interval % 4:
+            raise ValueError('snapshot_interval must be a positive multiple of 4')
+        self.path = path
+        self.board_size = config_manager.board_size
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_size = SNAPSHOT.size + self.board_size * self.board_size
+        self.block_size = self.snapshot_size + snapshot_interval // 4
+        self.moves = 0
+        self.pending = 0
+        self.pending_count = 0
+        self.file = open(path, 'x+b' if exclusive else 'w+b')
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.board_size, snapshot_interval,
+                                    seed, config_manager.config_hash()))
+
+    def write_snapshot(self, board_manager: BoardManager):
+        self.file.write(SNAPSHOT.pack(self.moves, board_manager.score, board_manager.rng.getstate()))
+        self.file.write(encode_cells(board_manager.board))
+        self.file.flush()
+
+    def append(self, board_manager: BoardManager, direction: str):
+        self.pending |= DIRECTION_CODES[direction] << (2 * self.pending_count)
+        self.pending_count += 1
+        self.moves += 1
+        if self.pending_count == 4:
+            self.file.write(bytes((self.pending,)))
+            self.pending = 0
+            self.pending_count = 0
+        if self.moves % self.snapshot_interval == 0:
+            self.write_snapshot(board_manager)
+
+    def rewind(self):
+        if not self.moves:
+            return
+        self.moves -= 1
+        if self.pending_count:
+            self.pending_count -= 1
+            self.pending &= (1 << 2 * self.pending_count) - 1
+            return
+        blocks, within = divmod(self.moves, self.snapshot_interval)
+        offset = HEADER.size + blocks * self.block_size + self.snapshot_size + within // 4
+        self.file.flush()
+        self.file.seek(offset)
+        last = self.file.read(1)[0]
+        self.file.truncate(offset)
+        self.file.seek(offset)
+        self.pending_count = within % 4
+        self.pending = last & (1 << 2 * self.pending_count) - 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.pending_count:
+            self.file.write(bytes((self.pending,)))
+        self.file.write(TRAILER.pack(TRAILER_MAGIC, self.moves))
+        self.file.close()
+
+
+class ReplayRecorder:
+    def __init__(self, directory: str, config_manager,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL):
+        self.directory = directory
+        self.config = config_manager
+        self.snapshot_interval = snapshot_interval
+        self.writer: Optional[ReplayWriter] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def attach(self, board_manager: BoardManager):
+        board_manager.recorders.append(self)
+        self.start(board_manager)
+
+    def detach(self, board_manager):
+        board_manager.recorders.remove(self)
+
+    def start(self, board_manager: BoardManager):
+        self.close()
+        stem = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{board_manager.seed:016x}")
+        for attempt in itertools.count():
+            path = f'{stem}-{attempt}{EXTENSION}' if attempt else stem + EXTENSION
+            try:
+                self.writer = ReplayWriter(path, self.config, board_manager.seed, self.snapshot_interval, True)
+                break
+            except FileExistsError:
+                continue
+        self.writer.write_snapshot(board_manager)
+
+    def record(self, board_manager: BoardManager, direction: str):
+        self.writer.append(board_manager, direction)
+
+    def rewind(self, board_manager: BoardManager):
+        self.writer.rewind()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class ReplayReader:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        magic, version, board_size, interval, seed, config_hash = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} replay file')
+        self.header = ReplayHeader(board_size, interval, seed, config_hash)
+        self.snapshot_size = SNAPSHOT.size + board_size * board_size
+        self.block_size = self.snapshot_size + interval // 4
+        self.snapshots = 0
+        self.total_moves = self.count_moves()
+
+    @property
+    def seed(self) -> int:
+        return self.header.seed
+
+    def __len__(self) -> int:
+        return self.total_moves
+
+    def __enter__(self) -> 'ReplayReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def data_length(self, moves: int) -> int:
+        interval = self.header.snapshot_interval
+        blocks, remainder = divmod(moves, interval)
+        return blocks * self.block_size + self.snapshot_size + (remainder + 3) // 4
+
+    def count_moves(self) -> int:
+        length = os.path.getsize(self.path) - HEADER.size
+        if length >= TRAILER.size:
+            self.file.seek(HEADER.size + length - TRAILER.size)
+            magic, moves = TRAILER.unpack(self.file.read(TRAILER.size))
+            if magic == TRAILER_MAGIC and self.data_length(moves) == length - TRAILER.size:
+                self.snapshots = moves // self.header.snapshot_interval + 1
+                return moves
+
+        blocks, rest = divmod(length, self.block_size)
+        if rest < self.snapshot_size:
+            self.snapshots = blocks
+            return blocks * self.header.snapshot_interval
+        self.snapshots = blocks + 1
+        return blocks * self.header.snapshot_interval + (rest - self.snapshot_size) * 4
+
+    def verify_config(self, config_manager):
+        if config_manager.config_hash() != self.header.config_hash:
+            raise ValueError(f'{self.path} was recorded with a different config')
+
+    def read_snapshot(self, block: int) -> Snapshot:
+        self.file.seek(HEADER.size + block * self.block_size)
+        move_index, score, rng_state = SNAPSHOT.unpack(self.file.read(SNAPSHOT.size))
+        cells = self.file.read(self.snapshot_size - SNAPSHOT.size)
+        return Snapshot(move_index, score, rng_state, decode_cells(cells, self.header.board_size))
+
+    def move_at(self, n: int) -> str:
+        if not 0 <= n < self.total_moves:
+            raise IndexError(n)
+        block, within = divmod(n, self.header.snapshot_interval)
+        self.file.seek(HEADER.size + block * self.block_size + self.snapshot_size + within // 4)
+        return DIRECTIONS[self.file.read(1)[0] >> (2 * (within % 4)) & 3]
+
+    def iter_moves(self, start: int = 0) -> Iterator[str]:
+        interval = self.header.snapshot_interval
+        n = start
+        with open(self.path, 'rb') as f:
+            while n < self.total_moves:
+                block, within = divmod(n, interval)
+                f.seek(HEADER.size + block * self.block_size + self.snapshot_size + within // 4)
+                count = min(interval - within, self.total_moves - n)
+                data = f.read((within % 4 + count + 3) // 4)
+                for k in range(within % 4, within % 4 + count):
+                    yield DIRECTIONS[data[k // 4] >> (2 * (k % 4)) & 3]
+                n += count
+
+    def open_board(self, config_manager) -> BoardManager:
+        self.verify_config(config_manager)
+        return BoardManager(config_manager, animate=False, seed=self.seed)
+
+    def seek(self, config_manager, n: int, board_manager: Optional[BoardManager] = None) -> BoardManager:
+        if not self.snapshots:
+            raise ValueError(f'{self.path} has no snapshots')
+        n = max(0, min(n, self.total_moves))
+        board_manager = board_manager or self.open_board(config_manager)
+        snapshot = self.read_snapshot(min(n // self.header.snapshot_interval, self.snapshots - 1))
+        board_manager.load_state(snapshot.board, snapshot.score, snapshot.rng_state, self.seed)
+        position = snapshot.move_index
+        if position < n:
+            for direction in self.iter_moves(position):
+                board_manager.move(direction)
+                position += 1
+                if position == n:
+                    break
+        return board_manager
+
+    def iter_states(self, config_manager) -> Iterator[Tuple[int, List[List[int]], int]]:
+        board_manager = self.seek(config_manager, 0)
+        yield 0, board_manager.board, board_manager.score
+        for n, direction in enumerate(self.iter_moves(), 1):
+            board_manager.move(direction)
+            yield n, board_manager.board, board_manager.score
@@ -0,0 +1,114 @@
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+from replay.export import BYTES_PER_PIXEL, FrameWriter, PngSequenceWriter, RawVideoWriter, main, write_png
+from replay.replay_log import ReplayRecorder
+
+SIZE = (7, 5)
+
+
+def make_surface(index: int) -> pygame.Surface:
+    surface = pygame.Surface(SIZE, pygame.SRCALPHA)
+    for x in range(SIZE[0]):
+        for y in range(SIZE[1]):
+            surface.set_at((x, y), ((index * 37 + x * 11) % 256, (y * 53) % 256, index % 256, 255))
+    return surface
+
+
+def pixels_of(surface: pygame.Surface) -> bytes:
+    return pygame.image.tobytes(surface, 'RGBA')
+
+
+def test_write_png_round_trip(tmp_path):
+    expected = pixels_of(make_surface(3))
+    path = str(tmp_path / 'frame.png')
+    write_png(path, memoryview(expected), *SIZE)
+    assert pixels_of(pygame.image.load(path)) == expected
+
+
+@pytest.mark.parametrize('threads', [1, 3])
+def test_png_sequence_writer_keeps_frame_order(tmp_path, threads):
+    writer = PngSequenceWriter(str(tmp_path), SIZE, threads, 2)
+    for index in range(12):
+        writer.submit(make_surface(index))
+    writer.close()
+    assert writer.count == 12
+    assert sorted(os.listdir(tmp_path)) == [f'frame{index:06d}.png' for index in range(12)]
+    for index in range(12):
+        loaded = pygame.image.load(str(tmp_path / f'frame{index:06d}.png'))
+        assert pixels_of(loaded) == pixels_of(make_surface(index))
+
+
+def test_raw_video_writer_concatenates_frames(tmp_path):
+    path = str(tmp_path / 'out.rgba')
+    writer = RawVideoWriter(path, SIZE, 3)
+    for index in range(10):
+        writer.submit(make_surface(index))
+    writer.close()
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data == b''.join(pixels_of(make_surface(index)) for index in range(10))
+
+
+class FailingWriter(FrameWriter):
+    def __init__(self):
+        self.written = threading.Event()
+        super().__init__(SIZE, 2, 2)
+
+    def write(self, index: int, pixels: memoryview):
+        self.written.set()
+        raise OSError(f'disk full at frame {index}')
+
+
+def test_writer_errors_reach_the_caller():
+    writer = FailingWriter()
+    writer.submit(make_surface(0))
+    writer.written.wait(5)
+    with pytest.raises(OSError, match='disk full'):
+        for index in range(1, 10):
+            writer.submit(make_surface(index))
+        writer.close()
+
+
+def test_frame_writer_requires_write():
+    with pytest.raises(TypeError):
+        FrameWriter(SIZE, 1, 1)
+
+
+def record_replay(directory: str, config, moves: int) -> str:
+    board_manager = BoardManager(config, animate=False, seed=8)
+    recorder = ReplayRecorder(directory, config, 16)
+    recorder.attach(board_manager)
+    made = 0
+    for direction in DIRECTIONS * moves:
+        if made == moves or board_manager.game_over:
+            break
+        made += board_manager.move(direction)
+    path = recorder.writer.path
+    recorder.close()
+    return path
+
+
+def test_export_raw_and_thumbnail(tmp_path, make_config):
+    config = make_config()
+    replay = record_replay(str(tmp_path), config, 6)
+    raw = str(tmp_path / 'out.rgba')
+    thumbnail = str(tmp_path / 'final.png')
+    assert main([replay, '--output', raw, '--format', 'raw', '--fps', '30', '--hold-frames', '2']) == 0
+    assert main([replay, '--output', thumbnail, '--format', 'thumbnail']) == 0
+
+    width, height = config.window_size
+    frame_bytes = width * height * BYTES_PER_PIXEL
+    size = os.path.getsize(raw)
+    assert size % frame_bytes == 0 and size // frame_bytes >= 1 + 6 * 3
+    with open(raw, 'rb') as f:
+        f.seek(size - frame_bytes)
+        last = f.read()
+    assert pixels_of(pygame.image.load(thumbnail)) == last
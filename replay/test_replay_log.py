@@ -0,0 +1,71 @@
+import os
+import random
+
+import pytest
+
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+from replay.replay_log import ReplayReader, ReplayRecorder
+
+
+def record(directory: str, board_manager: BoardManager, snapshot_interval: int) -> ReplayRecorder:
+    recorder = ReplayRecorder(directory, board_manager.config, snapshot_interval)
+    recorder.attach(board_manager)
+    return recorder
+
+
+@pytest.mark.parametrize('size', [4, 5])
+def test_seek_matches_replay_from_start(tmp_path, make_config, size):
+    config = make_config(board_size=size, target_score=1 << 30)
+    board_manager = BoardManager(config, animate=False, seed=11)
+    recorder = record(str(tmp_path), board_manager, 16)
+    rng = random.Random(size)
+    states = [([row[:] for row in board_manager.board], board_manager.score)]
+    while len(states) <= 150 and not board_manager.game_over:
+        if board_manager.move(rng.choice(DIRECTIONS)):
+            states.append(([row[:] for row in board_manager.board], board_manager.score))
+    path = recorder.writer.path
+    recorder.close()
+
+    with ReplayReader(path) as replay:
+        assert len(replay) == len(states) - 1
+        for n, board, score in replay.iter_states(config):
+            assert (board, score) == states[n]
+        for n in range(len(states)):
+            sought = replay.seek(config, n)
+            assert (sought.board, sought.score) == states[n]
+
+
+@pytest.mark.parametrize('size', [4, 5])
+def test_undo_rewinds_recording(tmp_path, make_config, size):
+    config = make_config(board_size=size, target_score=1 << 30)
+    board_manager = BoardManager(config, animate=False, seed=3, history=True)
+    recorder = record(str(tmp_path), board_manager, 8)
+    rng = random.Random(size)
+    for _ in range(400):
+        if board_manager.game_over:
+            break
+        roll = rng.random()
+        if roll < 0.2:
+            board_manager.undo()
+        elif roll < 0.3:
+            board_manager.redo()
+        else:
+            board_manager.move(rng.choice(DIRECTIONS))
+    path = recorder.writer.path
+    recorder.close()
+
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+    with ReplayReader(path) as replay:
+        final = replay.seek(config, len(replay))
+        assert (final.board, final.score) == (board_manager.board, board_manager.score)
+
+
+def test_recorder_never_overwrites(tmp_path, make_config):
+    board_manager = BoardManager(make_config(), animate=False, seed=5)
+    recorder = record(str(tmp_path), board_manager, 16)
+    for _ in range(3):
+        board_manager.move('left')
+        board_manager.reset_game(5)
+    recorder.close()
+    assert len(os.listdir(tmp_path)) == 4
@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+from config.config_manager import GameConfigManager
+from engine import bitboard
+from engine.bitboard import DIRECTIONS
+from render.board_manager import BoardManager
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8048
+MAX_LINE = 4096
+SESSION_UNDO_KB = 8
+WRITE_HIGH_WATER = 64 * 1024
+DEFAULT_MAX_SESSIONS = 100000
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class GameSession:
+    __slots__ = ('sid', 'board')
+
+    def __init__(self, sid: int, config_manager, seed: Optional[int] = None):
+        self.sid = sid
+        self.board = BoardManager(config_manager, animate=False, seed=seed, history=True)
+
+    def reset(self, seed: Optional[int] = None):
+        self.board.reset_game(seed)
+
+    def move(self, direction: str) -> bool:
+        return self.board.move(direction)
+
+    def undo(self) -> bool:
+        return self.board.undo()
+
+    def redo(self) -> bool:
+        return self.board.redo()
+
+    def state(self) -> dict:
+        board = self.board
+        return {
+            'sid': self.sid,
+            'size': len(board.board),
+            'board': [cell for row in board.board for cell in row],
+            'score': board.score,
+            'won': board.won,
+            'over': board.game_over,
+        }
+
+
+class Connection:
+    __slots__ = ('sessions', 'current')
+
+    def __init__(self):
+        self.sessions: Dict[int, None] = {}
+        self.current: Optional[int] = None
+
+
+class GameServer:
+    def __init__(self, config_manager, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.config = config_manager
+        self.max_sessions = max_sessions
+        self.sessions: Dict[int, GameSession] = {}
+        self.next_sid = 1
+        self.connections = 0
+        self.requests = 0
+        self.started = time.monotonic()
+
+    def get_session(self, connection: Connection, request: dict) -> GameSession:
+        sid = request.get('sid', connection.current)
+        session = self.sessions.get(sid) if type(sid) is int and sid in connection.sessions else None
+        if session is None:
+            raise ProtocolError(f'unknown session {sid}')
+        return session
+
+    def new_session(self, connection: Connection, request: dict) -> dict:
+        seed = request.get('seed')
+        if 'sid' in request:
+            session = self.get_session(connection, request)
+            session.reset(seed)
+        else:
+            if len(self.sessions) >= self.max_sessions:
+                raise ProtocolError('session limit reached')
+            session = GameSession(self.next_sid, self.config, seed)
+            self.next_sid += 1
+            self.sessions[session.sid] = session
+            connection.sessions[session.sid] = None
+        connection.current = session.sid
+        response = session.state()
+        response['seed'] = session.board.seed
+        return response
+
+    def handle_request(self, connection: Connection, request: dict) -> dict:
+        op = request.get('op')
+        if op == 'new':
+            return self.new_session(connection, request)
+        if op == 'move':
+            session = self.get_session(connection, request)
+            direction = request.get('dir')
+            if direction not in DIRECTIONS:
+                raise ProtocolError(f'invalid direction {direction!r}')
+            moved = session.move(direction)
+            response = session.state()
+            response['moved'] = moved
+            return response
+        if op == 'state':
+            return self.get_session(connection, request).state()
+        if op == 'undo':
+            session = self.get_session(connection, request)
+            undone = session.undo()
+            response = session.state()
+            response['undone'] = undone
+            return response
+        if op == 'redo':
+            session = self.get_session(connection, request)
+            redone = session.redo()
+            response = session.state()
+            response['redone'] = redone
+            return response
+        if op == 'close':
+            session = self.get_session(connection, request)
+            self.close_session(connection, session.sid)
+            return {'sid': session.sid, 'closed': True}
+        if op == 'stats':
+            return self.stats()
+        raise ProtocolError(f'unknown op {op!r}')
+
+    def handle_line(self, connection: Connection, line: bytes) -> bytes:
+        self.requests += 1
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError('request must be a JSON object')
+            response = self.handle_request(connection, request)
+            response['ok'] = True
+        except (ProtocolError, TypeError, ValueError, RecursionError) as e:
+            response = {'ok': False, 'error': str(e)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return json.dumps(response, separators=(',', ':')).encode() + b'\n'
+
+    def close_session(self, connection: Connection, sid: int):
+        self.sessions.pop(sid, None)
+        connection.sessions.pop(sid, None)
+        if connection.current == sid:
+            connection.current = next(reversed(connection.sessions), None)
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            'sessions': len(self.sessions),
+            'connections': self.connections,
+            'requests': self.requests,
+            'uptime': round(elapsed, 3),
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        connection = Connection()
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"ok":false,"error":"request too long"}\n')
+                    break
+                if not line:
+                    break
+                writer.write(self.handle_line(connection, line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            for sid in connection.sessions:
+                self.sessions.pop(sid, None)
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE, backlog=1024)
+        print(f'serving on {host}:{port}', flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Headless 2048 game server, run as: python -m server.game_server')
+    parser.add_argument('--config', default='config/config.json')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-sessions', type=int, default=DEFAULT_MAX_SESSIONS)
+    parser.add_argument('--undo-kb', type=int, default=SESSION_UNDO_KB, help='undo history budget per session')
+    args = parser.parse_args(argv)
+
+    config = GameConfigManager()
+    config.load_config(args.config)
+    config.update(rng_block_size=1, undo_memory_kb=args.undo_kb)
+    if config.board_size == bitboard.SIZE:
+        bitboard.build_tables()
+    server = GameServer(config, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
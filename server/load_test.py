@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+from engine.bitboard import DIRECTIONS
+from server.game_server import DEFAULT_HOST, DEFAULT_PORT
+
+MOVE_REQUESTS = [json.dumps({'op': 'move', 'dir': direction}) for direction in DIRECTIONS]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: str,
+                  latencies: List[float], counters: dict) -> dict:
+    started = time.perf_counter()
+    writer.write(payload.encode() + b'\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    latencies.append(time.perf_counter() - started)
+    counters['requests'] += 1
+    if not response.get('ok'):
+        counters['errors'] += 1
+    return response
+
+
+async def open_sessions(host: str, port: int, sessions: int, seed: int, latencies: List[float],
+                        counters: dict) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, List[int]]:
+    reader, writer = await asyncio.open_connection(host, port)
+    sids = []
+    for k in range(sessions):
+        response = await request(reader, writer, json.dumps({'op': 'new', 'seed': seed * 100003 + k}),
+                                 latencies, counters)
+        sids.append(response['sid'])
+    counters['sessions'] += len(sids)
+    return reader, writer, sids
+
+
+async def drive_sessions(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, sids: List[int], seed: int,
+                         deadline: float, latencies: List[float], counters: dict):
+    rng = random.Random(seed)
+    clock = time.perf_counter
+    while clock() < deadline:
+        for sid in sids:
+            payload = '{"sid":%d,%s' % (sid, rng.choice(MOVE_REQUESTS)[1:])
+            response = await request(reader, writer, payload, latencies, counters)
+            if response.get('over'):
+                counters['games'] += 1
+                await request(reader, writer, json.dumps({'op': 'new', 'sid': sid}), latencies, counters)
+            elif rng.random() < 0.01:
+                await request(reader, writer, json.dumps({'op': 'undo', 'sid': sid}), latencies, counters)
+    writer.close()
+
+
+async def wait_for_server(host: str, port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(args) -> dict:
+    await wait_for_server(args.host, args.port)
+    latencies: List[float] = []
+    counters = {'requests': 0, 'errors': 0, 'sessions': 0, 'games': 0}
+    per_connection, extra = divmod(args.sessions, args.connections)
+    setup_started = time.perf_counter()
+    clients = await asyncio.gather(*(
+        open_sessions(args.host, args.port, per_connection + (k < extra), args.seed + k, latencies, counters)
+        for k in range(args.connections)))
+    started = time.perf_counter()
+    setup = started - setup_started
+    latencies.clear()
+    counters['requests'] = 0
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        drive_sessions(reader, writer, sids, args.seed + k, deadline, latencies, counters)
+        for k, (reader, writer, sids) in enumerate(clients)))
+    elapsed = time.perf_counter() - started
+    return {
+        **counters,
+        'setup': setup,
+        'elapsed': elapsed,
+        'requests_per_sec': counters['requests'] / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': max(latencies, default=0.0) * 1000,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Load test for the game server, run as: python -m server.load_test')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of move traffic after setup')
+    parser.add_argument('--seed', type=int, default=2048)
+    parser.add_argument('--spawn-server', action='store_true', help='start python -m server.game_server first')
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn_server:
+        server = subprocess.Popen([sys.executable, '-m', 'server.game_server', '--host', args.host,
+                                   '--port', str(args.port), '--max-sessions', str(args.sessions)])
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"sessions {result['sessions']}  requests {result['requests']}  errors {result['errors']}  "
+          f"games finished {result['games']}  setup {result['setup']:.2f} s")
+    print(f"{result['requests_per_sec']:.0f} req/s  p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  "
+          f"max {result['max_ms']:.3f} ms")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
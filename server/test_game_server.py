@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+
+from server.game_server import MAX_LINE, Connection, GameServer
+
+
+@pytest.fixture
+def server(make_config):
+    return GameServer(make_config(rng_block_size=1, undo_memory_kb=8), max_sessions=3)
+
+
+def call(server: GameServer, connection: Connection, request) -> dict:
+    line = request if isinstance(request, bytes) else json.dumps(request).encode()
+    return json.loads(server.handle_line(connection, line + b'\n'))
+
+
+def test_session_flow(server):
+    connection = Connection()
+    created = call(server, connection, {'op': 'new', 'seed': 5, 'id': 1})
+    assert created['ok'] and created['id'] == 1 and created['seed'] == 5
+    assert sum(cell != 0 for cell in created['board']) == 2
+
+    moves = [call(server, connection, {'op': 'move', 'dir': direction}) for direction in ('left', 'up', 'right')]
+    moved = [response for response in moves if response['moved']]
+    assert moved
+    assert call(server, connection, {'op': 'state'})['board'] == moved[-1]['board']
+
+    undone = call(server, connection, {'op': 'undo'})
+    assert undone['undone']
+    assert call(server, connection, {'op': 'redo'})['board'] == moved[-1]['board']
+
+    replayed = call(server, connection, {'op': 'new', 'sid': created['sid'], 'seed': 5})
+    assert replayed['board'] == created['board'] and replayed['sid'] == created['sid']
+    assert call(server, connection, {'op': 'close'}) == {'sid': created['sid'], 'closed': True, 'ok': True}
+    assert not call(server, connection, {'op': 'state'})['ok']
+
+
+def test_sessions_are_bound_to_their_connection(server):
+    owner, other = Connection(), Connection()
+    sid = call(server, owner, {'op': 'new'})['sid']
+    for op in ('state', 'move', 'undo', 'redo', 'close'):
+        response = call(server, other, {'op': op, 'sid': sid, 'dir': 'left'})
+        assert not response['ok'] and 'unknown session' in response['error']
+    assert call(server, owner, {'op': 'state', 'sid': sid})['ok']
+
+
+def test_closing_current_session_falls_back_to_latest(server):
+    connection = Connection()
+    first = call(server, connection, {'op': 'new'})['sid']
+    second = call(server, connection, {'op': 'new'})['sid']
+    call(server, connection, {'op': 'close', 'sid': second})
+    assert connection.current == first
+    call(server, connection, {'op': 'close'})
+    assert connection.current is None and not server.sessions
+
+
+@pytest.mark.parametrize('request_line, error', [
+    (b'not json', 'Expecting value'),
+    (b'[1, 2]', 'JSON object'),
+    (b'[' * 2000 + b']' * 2000, 'recursion'),
+    (b'[' * 4000, 'recursion'),
+    (b'{"op": "fly"}', 'unknown op'),
+    (b'{"op": "move", "dir": "sideways"}', 'unknown session'),
+    (b'{"op": "state", "sid": [1]}', 'unknown session'),
+    (b'{"op": "state", "sid": true}', 'unknown session'),
+], ids=['garbage', 'array', 'nested', 'unclosed', 'op', 'no-session', 'sid-list', 'sid-bool'])
+def test_bad_requests_get_error_responses(server, request_line, error):
+    connection = Connection()
+    assert len(request_line) < MAX_LINE
+    response = call(server, connection, request_line)
+    assert not response['ok'] and error in response['error']
+    assert call(server, connection, {'op': 'stats'})['ok']
+
+
+def test_invalid_direction_and_session_limit(server):
+    connection = Connection()
+    call(server, connection, {'op': 'new'})
+    assert 'invalid direction' in call(server, connection, {'op': 'move', 'dir': 'sideways'})['error']
+    call(server, connection, {'op': 'new'})
+    call(server, connection, {'op': 'new'})
+    assert call(server, connection, {'op': 'new'})['error'] == 'session limit reached'
+
+
+def test_connection_survives_bad_lines_and_cleans_up(server):
+    async def scenario():
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0, limit=MAX_LINE)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        async def send(line: bytes) -> dict:
+            writer.write(line + b'\n')
+            await writer.drain()
+            return json.loads(await reader.readline())
+
+        created = await send(b'{"op": "new", "seed": 9}')
+        assert not (await send(b'[' * 4000))['ok']
+        assert (await send(b'{"op": "state"}'))['board'] == created['board']
+        assert len(server.sessions) == 1
+        assert 'too long' in (await send(b'{"op": "state", "pad": "' + b'x' * MAX_LINE + b'"}'))['error']
+        writer.close()
+        for _ in range(100):
+            if not server.sessions:
+                break
+            await asyncio.sleep(0.01)
+        listener.close()
+        await listener.wait_closed()
+        assert not server.sessions and server.connections == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import tournament
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'config.json')
+TIMING_KEYS = ('elapsed', 'games_per_sec')
+
+
+def summary(policy: str, workers: int, chunk_size: int, overrides: dict = None) -> dict:
+    result = tournament.run_tournament(CONFIG_PATH, dict(overrides or {}, hot_reload=False), policy,
+                                       {'depth': 1, 'time_budget_ms': 0.0}, 24, 7, workers, chunk_size, 60)
+    for key in TIMING_KEYS:
+        result.pop(key)
+    return result
+
+
+@pytest.mark.parametrize('policy', tournament.POLICIES)
+def test_results_do_not_depend_on_workers_or_chunks(policy):
+    expected = summary(policy, 1, 24)
+    assert expected['games'] == 24
+    assert summary(policy, 2, 5) == expected
+    assert summary(policy, 3, 1) == expected
+
+
+def test_large_board_results_do_not_depend_on_workers():
+    overrides = {'board_size': 9, 'tile_size': 50, 'padding': 5}
+    assert summary('greedy', 2, 4, overrides) == summary('greedy', 1, 24, overrides)
+
+
+def test_game_seeds_are_distinct_and_stable():
+    seeds = [tournament.game_seed(7, index) for index in range(1000)]
+    assert len(set(seeds)) == len(seeds)
+    assert seeds[:10] == [tournament.game_seed(7, index) for index in range(10)]
+    assert tournament.game_seed(8, 0) != seeds[0]
+
+
+def test_unknown_policy_is_rejected(make_config):
+    with pytest.raises(ValueError, match='unknown policy'):
+        tournament.make_policy('minimax', make_config(), {})
@@ -0,0 +1,301 @@
+import argparse
+import json
+import math
+import sys
+import time
+from array import array
+from collections import Counter
+from multiprocessing import Pool, cpu_count
+from multiprocessing.util import Finalize
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from ai.expectimax import ExpectimaxPlayer
+from config.config_manager import GameConfigManager
+from engine import bitboard
+from engine.bitboard import DIRECTIONS
+from engine.rng import GameRandom, load_numpy
+from engine.rules import GridRules, PackedRules
+from render.board_manager import BoardManager
+
+POLICIES = ('random', 'greedy', 'expectimax')
+PERCENTILES = (0.10, 0.25, 0.50, 0.75, 0.90, 0.99)
+POLICY_SALT = 0x5DEECE66D
+
+
+class GameResult(NamedTuple):
+    seed: int
+    score: int
+    max_tile: int
+    moves: int
+    won: bool
+
+
+def game_seed(base_seed: int, index: int) -> int:
+    rng = GameRandom(base_seed)
+    rng.setstate(index)
+    return rng.next_u64() >> 1
+
+
+def load_config(config_path: str, overrides: Dict[str, object]) -> GameConfigManager:
+    config = GameConfigManager()
+    config.load_config(config_path)
+    if overrides:
+        config.update(**overrides)
+    return config
+
+
+class RandomPolicy:
+    def __init__(self, config_manager):
+        self.block_size = config_manager.rng_block_size
+        self.rng = GameRandom(0)
+
+    def reset(self, seed: int):
+        self.rng = GameRandom(seed ^ POLICY_SALT, self.block_size)
+
+    def choose(self, board_manager: BoardManager) -> Optional[str]:
+        return self.rng.choice(DIRECTIONS)
+
+
+class GreedyPolicy:
+    def __init__(self, config_manager):
+        size = config_manager.board_size
+        self.packed = PackedRules() if size == bitboard.SIZE else None
+        self.grid = GridRules(size)
+
+    def reset(self, seed: int):
+        pass
+
+    def choose(self, board_manager: BoardManager) -> Optional[str]:
+        state = board_manager.packed_state()
+        rules = self.packed
+        if state is None:
+            rules = self.grid
+            state = rules.encode(board_manager.board)
+
+        best = None
+        best_key = None
+        for direction in DIRECTIONS:
+            new_state, score = rules.move(state, direction)
+            if new_state != state:
+                key = (score, rules.evaluate(new_state))
+                if best_key is None or key > best_key:
+                    best, best_key = direction, key
+        return best
+
+
+class ExpectimaxPolicy:
+    def __init__(self, config_manager, time_budget_ms: float = 0.0, max_depth: int = 3):
+        time_budget = time_budget_ms / 1000 if time_budget_ms > 0 else math.inf
+        self.player = ExpectimaxPlayer(config_manager, time_budget=time_budget, max_depth=max_depth)
+
+    def reset(self, seed: int):
+        self.player.cache.clear()
+
+    def choose(self, board_manager: BoardManager) -> Optional[str]:
+        return self.player.best_move(board_manager.board)
+
+
+def make_policy(name: str, config_manager, options: Dict[str, float]):
+    if name == 'random':
+        return RandomPolicy(config_manager)
+    if name == 'greedy':
+        return GreedyPolicy(config_manager)
+    if name == 'expectimax':
+        return ExpectimaxPolicy(config_manager, options['time_budget_ms'], options['depth'])
+    raise ValueError(f'unknown policy {name!r}, expected one of {", ".join(POLICIES)}')
+
+
+def max_tile(board_manager: BoardManager) -> int:
+    state = board_manager.packed_state()
+    if state is not None:
+        return bitboard.max_tile(state)
+    if board_manager.index is not None:
+        return board_manager.index.max_value
+    return max(max(row) for row in board_manager.board)
+
+
+def play_game(config_manager, policy, seed: int, max_moves: int, recorder=None) -> GameResult:
+    board_manager = BoardManager(config_manager, animate=False, seed=seed)
+    if recorder is not None:
+        recorder.attach(board_manager)
+    policy.reset(seed)
+    moves = 0
+    while not board_manager.game_over and moves < max_moves:
+        direction = policy.choose(board_manager)
+        if direction is None:
+            break
+        if board_manager.move(direction):
+            moves += 1
+    if recorder is not None:
+        recorder.finish(board_manager)
+    return GameResult(seed, board_manager.score, max_tile(board_manager), moves, board_manager.won)
+
+
+_worker = None
+
+
+def init_worker(config_path: str, overrides: Dict[str, object], policy_name: str,
+                options: Dict[str, float], max_moves: int, analytics_dir: Optional[str] = None):
+    global _worker
+    load_numpy()
+    config_manager = load_config(config_path, overrides)
+    if config_manager.board_size == bitboard.SIZE:
+        bitboard.build_tables()
+    recorder = None
+    if analytics_dir:
+        from analytics.store import AnalyticsRecorder, ColumnWriter
+        recorder = AnalyticsRecorder(ColumnWriter(analytics_dir, config_manager))
+        Finalize(None, close_worker, exitpriority=10)
+    _worker = (config_manager, make_policy(policy_name, config_manager, options), max_moves, recorder)
+
+
+def close_worker():
+    global _worker
+    if _worker is not None and _worker[3] is not None:
+        _worker[3].close()
+    _worker = None
+
+
+def play_chunk(chunk: Tuple[int, int, int]) -> List[GameResult]:
+    base_seed, start, count = chunk
+    config_manager, policy, max_moves, recorder = _worker
+    return [play_game(config_manager, policy, game_seed(base_seed, index), max_moves, recorder)
+            for index in range(start, start + count)]
+
+
+def make_chunks(base_seed: int, games: int, chunk_size: int) -> Iterator[Tuple[int, int, int]]:
+    for start in range(0, games, chunk_size):
+        yield base_seed, start, min(chunk_size, games - start)
+
+
+class TournamentStats:
+    def __init__(self, target_score: int):
+        self.target_score = target_score
+        self.scores = array('q')
+        self.max_tiles: Counter = Counter()
+        self.wins = 0
+        self.moves = 0
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def add(self, results: List[GameResult]):
+        for result in results:
+            self.scores.append(result.score)
+            self.max_tiles[result.max_tile] += 1
+            self.wins += result.won
+            self.moves += result.moves
+
+    def summary(self, elapsed: float) -> dict:
+        games = len(self.scores)
+        ordered = sorted(self.scores)
+        return {
+            'games': games,
+            'elapsed': elapsed,
+            'games_per_sec': games / elapsed if elapsed else 0.0,
+            'moves_per_game': self.moves / games if games else 0.0,
+            'mean_score': sum(ordered) / games if games else 0.0,
+            'max_score': ordered[-1] if games else 0,
+            'percentiles': {f'p{round(fraction * 100)}': ordered[min(games - 1, int(fraction * games))]
+                            for fraction in PERCENTILES} if games else {},
+            'target_score': self.target_score,
+            'win_rate': self.wins / games if games else 0.0,
+            'max_tiles': {str(tile): count / games for tile, count in sorted(self.max_tiles.items())},
+        }
+
+
+def run_tournament(config_path: str, overrides: Dict[str, object], policy_name: str, options: Dict[str, float],
+                   games: int, seed: int, workers: int, chunk_size: int, max_moves: int,
+                   progress: bool = False, analytics_dir: Optional[str] = None) -> dict:
+    init_args = (config_path, overrides, policy_name, options, max_moves, analytics_dir)
+    target_score = load_config(config_path, overrides).target_score
+    stats = TournamentStats(target_score)
+    chunks = make_chunks(seed, games, chunk_size)
+    started = time.perf_counter()
+    last_report = started
+
+    if workers <= 1:
+        init_worker(*init_args)
+        results = map(play_chunk, chunks)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=init_worker, initargs=init_args)
+        results = pool.imap_unordered(play_chunk, chunks)
+    try:
+        for chunk in results:
+            stats.add(chunk)
+            now = time.perf_counter()
+            if progress and now - last_report >= 1.0:
+                last_report = now
+                print(f'\r{len(stats)}/{games} games  {len(stats) / (now - started):.0f} games/s',
+                      end='', file=sys.stderr, flush=True)
+    finally:
+        if pool is None:
+            close_worker()
+        else:
+            pool.close()
+            pool.join()
+    if progress:
+        print(file=sys.stderr)
+    return stats.summary(time.perf_counter() - started)
+
+
+def format_summary(name: str, summary: dict) -> str:
+    percentiles = '  '.join(f'{key} {value}' for key, value in summary['percentiles'].items())
+    tiles = '  '.join(f'{tile}: {share:.2%}' for tile, share in summary['max_tiles'].items())
+    return (f"{name}\n"
+            f"  games {summary['games']}  {summary['games_per_sec']:.1f} games/s  "
+            f"{summary['moves_per_game']:.1f} moves/game\n"
+            f"  score mean {summary['mean_score']:.1f}  max {summary['max_score']}  {percentiles}\n"
+            f"  win rate (>= {summary['target_score']}) {summary['win_rate']:.2%}\n"
+            f"  max tile  {tiles}")
+
+
+def parse_override(text: str) -> Tuple[str, object]:
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f'expected KEY=VALUE, got {text!r}')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Headless multi-process tournament runner')
+    parser.add_argument('--policy', choices=POLICIES, default='greedy')
+    parser.add_argument('--config', nargs='+', default=['config/config.json'], help='one or more config variants')
+    parser.add_argument('--set', type=parse_override, action='append', default=[], metavar='KEY=VALUE',
+                        help='override a config key for every variant, VALUE is parsed as JSON')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=2048)
+    parser.add_argument('--workers', type=int, default=cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--max-moves', type=int, default=1000000)
+    parser.add_argument('--depth', type=int, default=2, help='expectimax search depth')
+    parser.add_argument('--time-budget-ms', type=float, default=0.0,
+                        help='expectimax time per move, 0 searches to --depth every move')
+    parser.add_argument('--output', help='write summaries as JSON to this path')
+    parser.add_argument('--analytics', metavar='DIR', help='stream per-move and per-game records to this store')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    overrides = dict(args.set)
+    options = {'depth': args.depth, 'time_budget_ms': args.time_budget_ms}
+    report = []
+    for config_path in args.config:
+        summary = run_tournament(config_path, overrides, args.policy, options, args.games, args.seed,
+                                 args.workers, args.chunk_size, args.max_moves, progress=not args.quiet,
+                                 analytics_dir=args.analytics)
+        print(format_summary(f'{config_path}  policy={args.policy}', summary))
+        report.append({'config': config_path, 'overrides': overrides, 'policy': args.policy,
+                       'seed': args.seed, **summary})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())